@@ -1,3 +1,4 @@
+import os
 from datetime import timedelta
 
 from flask import Flask
@@ -5,6 +6,7 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_restx import Api
 from database import db
+from utilities.serialization import DEFAULT_CODEC, DEFAULT_LEVEL
 
 app = Flask(__name__)
 CORS(app)
@@ -19,6 +21,109 @@ app.config["SECRET_KEY"] = "secret-key"
 app.config["JWT_SECRET_KEY"] = "jwt-secret-key"
 app.config["JWT_TOKEN_LOCATION"] = ["headers"]
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = ACCESS_EXPIRES
+# key signing the method snapshots of /method/export and /method/import, read from the environment variable
+# DESDEO_SNAPSHOT_KEY. The instances moving method sessions between them must share the key. Both endpoints are
+# disabled when it is not set.
+app.config["SNAPSHOT_KEY"] = os.environ.get("DESDEO_SNAPSHOT_KEY")
+# codec used to compress the pickled problems and methods, see utilities.serialization.available_codecs
+app.config["PICKLE_COMPRESSION"] = DEFAULT_CODEC
+app.config["PICKLE_COMPRESSION_LEVEL"] = DEFAULT_LEVEL
+# NumPy arrays of at least PICKLE_BUFFER_THRESHOLD bytes are stored out-of-band in PICKLE_BUFFER_DIR, e.g.,
+# os.path.join(app.instance_path, "pickle_buffers"). The buffers are not removed with the pickles referencing them, run
+# collect_pickle_buffers.py periodically to remove the buffers not referenced anymore. None stores everything in the
+# database.
+app.config["PICKLE_BUFFER_DIR"] = None
+app.config["PICKLE_BUFFER_THRESHOLD"] = 1024 * 1024
+# the number of method sessions kept per user, the oldest sessions are deleted when a new one is created or imported.
+# None keeps all of them.
+app.config["METHOD_SESSION_LIMIT"] = 16
+# the number of initialized methods cached per process as templates for new method sessions, 0 disables the cache
+app.config["METHOD_TEMPLATE_CACHE_SIZE"] = 32
+# start newly created methods in the background right away, so that the first GET /method/control does not have to
+# wait for the start. A start is wasted if the method is not started from the same process. BACKGROUND_WORKERS is the
+# number of threads per process doing background work.
+app.config["PRECOMPUTE_METHOD_START"] = False
+app.config["BACKGROUND_WORKERS"] = 4
+# compute the next iteration of E-NAUTILUS for each intermediate point in the background while the decision maker is
+# choosing one, on SPECULATION_WORKERS threads per process, so that the choice is served right away
+app.config["SPECULATE_ENAUTILUS"] = False
+app.config["SPECULATION_WORKERS"] = 2
+# iterations of the methods listed in ASYNC_METHODS (e.g., "rvea", "irvea", "iopis") are run as background jobs, see
+# /method/job. Any method can be iterated as a job by setting 'asynchronous' in the request. JOB_WORKERS is the number
+# of threads per process running jobs, and the progress of running EAs is recorded every JOB_PROGRESS_INTERVAL seconds.
+app.config["ASYNC_METHODS"] = []
+app.config["JOB_WORKERS"] = 2
+app.config["JOB_PROGRESS_INTERVAL"] = 1.0
+# when EXTERNAL_JOB_WORKERS is set, the jobs are run by the processes started with job_worker.py instead. A worker leases
+# a job for JOB_LEASE seconds, renews the lease every JOB_HEARTBEAT_INTERVAL seconds, and a job whose lease expires is
+# run again by another worker, at most JOB_MAX_ATTEMPTS times in total.
+app.config["EXTERNAL_JOB_WORKERS"] = False
+app.config["JOB_LEASE"] = 60
+app.config["JOB_HEARTBEAT_INTERVAL"] = 10
+app.config["JOB_MAX_ATTEMPTS"] = 3
+# make the start and iterate calls of methods in METHOD_PROCESSES worker processes instead of the threads serving the
+# requests, 0 makes them in the serving threads. Each worker process is limited to METHOD_PROCESS_MEMORY_LIMIT bytes of
+# address space, and the pool of processes is replaced after METHOD_PROCESS_MAX_TASKS calls per process, None for no
+# limit.
+app.config["METHOD_PROCESSES"] = 0
+app.config["METHOD_PROCESS_MEMORY_LIMIT"] = None
+app.config["METHOD_PROCESS_MAX_TASKS"] = None
+# evaluate the objectives of the populations of EAs in EVALUATION_PROCESSES processes, split into blocks of at least
+# EVALUATION_MIN_BLOCK_SIZE decision vectors. 0 evaluates them in the process calling the method, as usual.
+app.config["EVALUATION_PROCESSES"] = 0
+app.config["EVALUATION_MIN_BLOCK_SIZE"] = 16
+# solve the scalarized subproblems of an iteration of synchronous NIMBUS in SCALARIZATION_PROCESSES processes, see
+# utilities.parallel_scalarization. 0 solves them one after another in the process calling the method, as usual.
+app.config["SCALARIZATION_PROCESSES"] = 0
+# solve each ASF subproblem of the reference point method on analytical problems by RPM_MULTISTART_STARTS local
+# minimizations of at most RPM_MULTISTART_MAXITER iterations, in SCALARIZATION_PROCESSES processes if positive, keeping
+# the best, see utilities.parallel_scalarization. 0 solves each by differential evolution, as usual.
+app.config["RPM_MULTISTART_STARTS"] = 0
+app.config["RPM_MULTISTART_MAXITER"] = 100
+# minimize the ASFs over the objectives of discrete problems in chunks of DISCRETE_CHUNK_SIZE rows, e.g., 16384,
+# scalarized in DISCRETE_SOLVER_WORKERS threads, see utilities.discrete_solver. 0 scalarizes all the rows at once, as
+# usual.
+app.config["DISCRETE_CHUNK_SIZE"] = 0
+app.config["DISCRETE_SOLVER_WORKERS"] = 1
+# discrete problems with at least OBJECTIVE_INDEX_MIN_POINTS solutions are stored with a spatial index over their
+# objective vectors, searched by NAUTILUS Navigator and E-NAUTILUS, see utilities.objective_index. None for no index.
+app.config["OBJECTIVE_INDEX_MIN_POINTS"] = 10000
+# the method "rvea/islands" evolves RVEA_ISLANDS populations of RVEA in RVEA_ISLAND_PROCESSES processes (None for one
+# per island, 1 to evolve them in the calling process), migrating RVEA_MIGRANTS elites every RVEA_MIGRATION_INTERVAL
+# generations, see utilities.islands
+app.config["RVEA_ISLANDS"] = 4
+app.config["RVEA_ISLAND_PROCESSES"] = None
+app.config["RVEA_MIGRATION_INTERVAL"] = 20
+app.config["RVEA_MIGRANTS"] = 4
+# the maximum number of seconds an iteration may take, None for no limit. Iterations are stopped at the next generation
+# of EAs or evaluation of the problem once past their deadline, and the methods are left as they were.
+app.config["ITERATION_TIMEOUT"] = None
+# the compute budget of the iterations of EAs, e.g., {"max_time_ms": 5000}, overridden by the budgets given to
+# /method/create and /method/control, see utilities.budgets. None for no budget.
+app.config["ITERATION_BUDGET"] = None
+# the state of EAs is written to CHECKPOINT_DIR every CHECKPOINT_INTERVAL seconds during an iteration, so that the
+# iteration can be resumed if its process dies. None disables the checkpoints.
+app.config["CHECKPOINT_DIR"] = os.path.join(app.instance_path, "checkpoints")
+app.config["CHECKPOINT_INTERVAL"] = 60
+# seconds between the keep-alive comments sent in the idle progress streams of /method/progress
+app.config["PROGRESS_KEEPALIVE"] = 15
+# the number of threads dispatching the requests to the app when it is served with ASGI, see asgi.py
+app.config["ASGI_WORKERS"] = 32
+# the number of bytes of the body of a request read before the request is dispatched when the app is served with ASGI,
+# the rest of a longer body is streamed to the app, see utilities.asgi
+app.config["ASGI_BODY_BUFFER"] = 64 * 1024
+# admission of the requests creating problems and methods, and starting and iterating methods, see utilities.admission.
+# At most ADMISSION_CAPACITY of them are served at a time, at most ADMISSION_USER_LIMITS[role] per user and
+# ADMISSION_ROLE_LIMITS[role] per role (a role missing is not limited). The rest wait, at most ADMISSION_USER_QUEUE_SIZE
+# per user and ADMISSION_QUEUE_SIZE in total, for at most ADMISSION_TIMEOUT seconds, and are rejected with 429
+# otherwise.
+app.config["ADMISSION_CAPACITY"] = 8
+app.config["ADMISSION_USER_LIMITS"] = {"user": 2, "guest": 1}
+app.config["ADMISSION_ROLE_LIMITS"] = {"guest": 4}
+app.config["ADMISSION_USER_QUEUE_SIZE"] = 4
+app.config["ADMISSION_QUEUE_SIZE"] = 64
+app.config["ADMISSION_TIMEOUT"] = 30
+app.config["ADMISSION_RETRY_AFTER"] = 1
 
 
 jwt = JWTManager(app)
@@ -71,6 +176,12 @@ api.add_resource(problem_resources.ProblemAccessAll, "/problem/access/all")
 # Add method endpoints
 api.add_resource(method_resources.MethodCreate, "/method/create")
 api.add_resource(method_resources.MethodControl, "/method/control")
+api.add_resource(method_resources.MethodExport, "/method/export")
+api.add_resource(method_resources.MethodImport, "/method/import")
+api.add_resource(method_resources.MethodJob, "/method/job")
+api.add_resource(method_resources.MethodJobResult, "/method/job/result")
+api.add_resource(method_resources.MethodProgress, "/method/progress")
+api.add_resource(method_resources.MethodCancel, "/method/cancel")
 
 # Add questionnaire endpoints
 api.add_resource(
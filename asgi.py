@@ -0,0 +1,12 @@
+"""The app as an ASGI application, to be served by an ASGI server, e.g., `uvicorn asgi:application`.
+
+See utilities.asgi.
+"""
+from app import app
+from utilities.asgi import DEFAULT_BODY_BUFFER, DEFAULT_WORKERS, AsgiApp
+
+application = AsgiApp(
+    app,
+    workers=app.config.get("ASGI_WORKERS", DEFAULT_WORKERS),
+    body_buffer=app.config.get("ASGI_BODY_BUFFER", DEFAULT_BODY_BUFFER),
+)
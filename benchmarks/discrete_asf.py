@@ -0,0 +1,71 @@
+"""Report the time and the peak memory it takes to minimize an ASF over discrete problems of increasing size, over the
+whole objective matrix at once and in chunks.
+
+Run from the root of the repository:
+
+    $> python benchmarks/discrete_asf.py
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from desdeo_tools.scalarization import DiscreteScalarizer  # noqa: E402
+from desdeo_tools.scalarization.ASF import PointMethodASF  # noqa: E402
+from desdeo_tools.solver import DiscreteMinimizer  # noqa: E402
+from utilities.discrete_solver import DEFAULT_CHUNK_SIZE, chunked_discrete_minimizations  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark minimizing ASFs over discrete problems in chunks.")
+parser.add_argument("--repeats", type=int, help="How many times each ASF is minimized.", default=5)
+parser.add_argument("--objectives", type=int, help="The number of objectives of the problems.", default=5)
+parser.add_argument("--chunk-size", type=int, help="The number of rows in a chunk.", default=DEFAULT_CHUNK_SIZE)
+parser.add_argument("--workers", type=int, help="The number of threads scalarizing the chunks.", default=4)
+
+
+def time_minimize(minimizer: DiscreteMinimizer, objectives: np.ndarray, repeats: int, settings=None) -> tuple:
+    """The mean time of a minimization in seconds, the peak memory allocated during one in bytes, and its result."""
+    with chunked_discrete_minimizations(*(settings or (0,))):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            minimizer.minimize(objectives)
+        elapsed = (time.perf_counter() - start) / repeats
+
+        tracemalloc.start()
+        result = minimizer.minimize(objectives)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return elapsed, peak, result
+
+
+def main():
+    args = vars(parser.parse_args())
+    rng = np.random.default_rng(1)
+
+    print(f"{'rows':>10}{'at once (ms)':>14}{'peak (MB)':>11}{'chunked (ms)':>14}{'peak (MB)':>11}", end="")
+    print(f"{'threads (ms)':>14}{'peak (MB)':>11}")
+
+    for n_rows in [10_000, 100_000, 1_000_000]:
+        objectives = rng.random((n_rows, args["objectives"]))
+        asf = PointMethodASF(objectives.max(axis=0), objectives.min(axis=0))
+        minimizer = DiscreteMinimizer(DiscreteScalarizer(asf, {"reference_point": rng.random(args["objectives"])}))
+
+        results = [
+            time_minimize(minimizer, objectives, args["repeats"], settings)
+            for settings in [None, (args["chunk_size"], 1), (args["chunk_size"], args["workers"])]
+        ]
+
+        # the same row is found either way
+        assert len({int(result["x"]) for _, _, result in results}) == 1
+
+        print(f"{n_rows:>10}", end="")
+        print("".join(f"{elapsed * 1e3:>14.1f}{peak / 1024**2:>11.1f}" for elapsed, peak, _ in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Report the time it takes to load discrete problems of increasing size with and without out-of-band buffers.
+
+Run from the root of the repository:
+
+    $> python benchmarks/out_of_band_buffers.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import dill
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from desdeo_problem import DiscreteDataProblem  # noqa: E402
+from flask import Flask  # noqa: E402
+from utilities.serialization import compressed_dill  # noqa: E402
+
+dill.settings["recurse"] = True
+
+parser = argparse.ArgumentParser(description="Benchmark loading problems with out-of-band buffers.")
+parser.add_argument("--repeats", type=int, help="How many times each problem is loaded.", default=5)
+
+
+def make_problem(n_rows: int, n_objectives: int = 3, n_variables: int = 7) -> DiscreteDataProblem:
+    rng = np.random.default_rng(1)
+    objective_names = [f"f{i+1}" for i in range(n_objectives)]
+    variable_names = [f"x{i+1}" for i in range(n_variables)]
+    df = pd.DataFrame(rng.random((n_rows, n_objectives + n_variables)), columns=objective_names + variable_names)
+    fs = df[objective_names].values
+
+    return DiscreteDataProblem(df, variable_names, objective_names, np.min(fs, axis=0), np.max(fs, axis=0))
+
+
+def time_loads(data: bytes, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        compressed_dill.loads(data)
+
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    args = vars(parser.parse_args())
+    app = Flask(__name__)
+
+    print(f"{'rows':>10}{'in-band (kB)':>14}{'load (ms)':>12}{'out-of-band (kB)':>18}{'load (ms)':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir, app.app_context():
+        for n_rows in [10_000, 100_000, 1_000_000]:
+            problem = make_problem(n_rows)
+
+            # compression is left out to compare the copying of the data only
+            app.config.update(PICKLE_COMPRESSION="none", PICKLE_BUFFER_DIR=None, PICKLE_BUFFER_THRESHOLD=None)
+            in_band = compressed_dill.dumps(problem)
+            in_band_time = time_loads(in_band, args["repeats"])
+
+            app.config.update(PICKLE_BUFFER_DIR=tmp_dir, PICKLE_BUFFER_THRESHOLD=1024 * 1024)
+            out_of_band = compressed_dill.dumps(problem)
+            out_of_band_time = time_loads(out_of_band, args["repeats"])
+
+            print(
+                f"{n_rows:>10}{len(in_band) / 1024:>14.1f}{in_band_time * 1e3:>12.1f}"
+                f"{len(out_of_band) / 1024:>18.1f}{out_of_band_time * 1e3:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Report the size and loading times of pickled problems and methods with and without compression.
+
+The test datasets in tests/data are used to define discrete problems and NAUTILUS Navigator and E-NAUTILUS methods
+for them. Each object is stored in a temporary SQLite database uncompressed (as it was stored before compression was
+introduced) and compressed with each available codec. The size of the database and the time it takes to load and
+unpickle all the rows is reported.
+
+Run from the root of the repository:
+
+    $> python benchmarks/pickle_compression.py
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import dill
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from desdeo_mcdm.interactive import ENautilus, NautilusNavigator  # noqa: E402
+from desdeo_problem import DiscreteDataProblem  # noqa: E402
+from utilities.serialization import available_codecs, compress, decompress  # noqa: E402
+
+dill.settings["recurse"] = True
+
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests", "data")
+
+parser = argparse.ArgumentParser(description="Benchmark the compression of pickled problems and methods.")
+parser.add_argument("--level", type=int, help="The compression level used.", default=None)
+parser.add_argument("--repeats", type=int, help="How many times the rows are loaded.", default=20)
+
+
+def load_problem(fname: str, n_objectives: int = 3) -> DiscreteDataProblem:
+    # each dataset has a single header row
+    data = np.genfromtxt(os.path.join(data_dir, fname), delimiter=",", skip_header=1)
+
+    objective_names = [f"f{i+1}" for i in range(n_objectives)]
+    variable_names = [f"x{i+1}" for i in range(data.shape[1] - n_objectives)]
+    df = pd.DataFrame(data, columns=objective_names + variable_names)
+    fs = data[:, :n_objectives]
+
+    return DiscreteDataProblem(df, variable_names, objective_names, np.min(fs, axis=0), np.max(fs, axis=0))
+
+
+def objects_to_store():
+    objects = {}
+
+    for fname in os.listdir(data_dir):
+        problem = load_problem(fname)
+        name = os.path.splitext(fname)[0]
+
+        objects[f"problem {name}"] = problem
+
+        navigator = NautilusNavigator(problem.objectives, problem.ideal, problem.nadir, problem.decision_variables)
+        objects[f"nautilus_navigator {name}"] = navigator
+
+        enautilus = ENautilus(problem.objectives, problem.ideal, problem.nadir, variables=problem.decision_variables)
+        objects[f"enautilus {name}"] = enautilus
+
+    return objects
+
+
+def store_and_load(blobs, repeats: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.db")
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE blobs (id INTEGER PRIMARY KEY, data BLOB)")
+        connection.executemany("INSERT INTO blobs (data) VALUES (?)", [(blob,) for blob in blobs])
+        connection.commit()
+        connection.execute("VACUUM")
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for (data,) in connection.execute("SELECT data FROM blobs"):
+                dill.loads(decompress(data))
+        load_time = (time.perf_counter() - start) / repeats
+
+        connection.close()
+
+    return size, load_time
+
+
+def main():
+    args = vars(parser.parse_args())
+
+    objects = objects_to_store()
+    pickles = {name: dill.dumps(obj) for name, obj in objects.items()}
+
+    print(f"{'codec':<8}{'db size (kB)':>14}{'ratio':>8}{'dump (ms)':>12}{'load (ms)':>12}")
+
+    baseline = None
+    for codec in ["none"] + [c for c in available_codecs if c != "none"]:
+        start = time.perf_counter()
+        blobs = [compress(dill.dumps(obj), codec=codec, level=args["level"]) for obj in objects.values()]
+        dump_time = time.perf_counter() - start
+
+        size, load_time = store_and_load(blobs, args["repeats"])
+        baseline = size if baseline is None else baseline
+
+        print(f"{codec:<8}{size / 1024:>14.1f}{baseline / size:>8.2f}{dump_time * 1e3:>12.1f}{load_time * 1e3:>12.1f}")
+
+    print()
+    print(f"{'object':<52}{'pickled (kB)':>14}")
+    for name, data in pickles.items():
+        print(f"{name:<52}{len(data) / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+
+from sqlalchemy import LargeBinary, PickleType, select, type_coerce
+
+from app import app, db
+from utilities.serialization import BufferStore, CompressedPickler, referenced_buffers
+
+parser = argparse.ArgumentParser(
+    description="Remove the out-of-band pickle buffers not referenced by any row in the database."
+)
+parser.add_argument(
+    "--min_age",
+    type=float,
+    help="Buffers used less than this many seconds ago are kept. Defaults to one hour.",
+    default=3600,
+)
+
+
+def collect_referenced_buffers() -> set:
+    referenced = set()
+
+    for table in db.metadata.sorted_tables:
+        for column in table.columns:
+            if isinstance(column.type, PickleType) and isinstance(column.type.pickler, CompressedPickler):
+                # select the raw bytes, skipping the unpickling done by PickleType
+                rows = db.session.execute(select(type_coerce(column, LargeBinary))).scalars()
+                for data in rows:
+                    referenced.update(referenced_buffers(data))
+
+    return referenced
+
+
+def main():
+    args = vars(parser.parse_args())
+
+    with app.app_context():
+        if not app.config.get("PICKLE_BUFFER_DIR"):
+            print("No PICKLE_BUFFER_DIR set, nothing to do.")
+            return
+
+        store = BufferStore(app.config["PICKLE_BUFFER_DIR"])
+        n_removed = store.remove_unreferenced(collect_referenced_buffers(), min_age=args["min_age"])
+
+        print(f"Removed {n_removed} unreferenced buffer(s) from {store.directory}.")
+
+
+if __name__ == "__main__":
+    main()
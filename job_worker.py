@@ -0,0 +1,70 @@
+import argparse
+import signal
+import time
+
+from app import app, db
+from resources.method_resources import run_iteration_job
+from utilities.jobs import run_next_job, worker_name
+
+parser = argparse.ArgumentParser(
+    description=(
+        "Run the iteration jobs queued in the database, see the config key EXTERNAL_JOB_WORKERS. Any number of workers "
+        "may be run, on any node sharing the database."
+    )
+)
+parser.add_argument(
+    "--poll_interval",
+    type=float,
+    help="The number of seconds to wait before looking for a job again when none is queued. Defaults to 1.",
+    default=1.0,
+)
+parser.add_argument(
+    "--max_jobs",
+    type=int,
+    help="The number of jobs to run before exiting. Defaults to no limit.",
+    default=None,
+)
+parser.add_argument(
+    "--burst",
+    action="store_true",
+    help="Exit once no job is queued instead of waiting for more.",
+)
+
+stopping = False
+
+
+def stop(signum, frame):
+    # the running job is finished first, its lease would expire otherwise
+    global stopping
+    stopping = True
+
+
+def main():
+    args = vars(parser.parse_args())
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    worker = worker_name()
+    n_jobs = 0
+
+    print(f"Worker {worker} waiting for jobs.")
+
+    with app.app_context():
+        db.create_all()
+
+        while not stopping and (args["max_jobs"] is None or n_jobs < args["max_jobs"]):
+            if run_next_job(run_iteration_job, worker):
+                n_jobs += 1
+                continue
+
+            if args["burst"]:
+                break
+
+            time.sleep(args["poll_interval"])
+
+    print(f"Worker {worker} stopped after {n_jobs} job(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+from database import db
+from utilities.serialization import compressed_dill
+
+# status of a job. Options: ["QUEUED", "RUNNING", "FINISHED", "FAILED", "CANCELLED"]
+job_statuses = ["QUEUED", "RUNNING", "FINISHED", "FAILED", "CANCELLED"]
+
+
+class Job(db.Model):
+    # an iteration of a method session run in the background, see utilities.jobs
+    id = db.Column(db.Integer, primary_key=True, unique=True)
+    method_id = db.Column(db.Integer, db.ForeignKey("method.id"), nullable=False, index=True)
+    status = db.Column(db.String(120), nullable=False, default="QUEUED")
+    # the parsed arguments of the request to POST /method/control
+    request = db.Column(db.PickleType(pickler=compressed_dill), nullable=False)
+    # the response to the request and its HTTP status code, once the job has run
+    result = db.Column(db.PickleType(pickler=compressed_dill), nullable=True)
+    # progress of the generations of EAs, updated while running
+    generation = db.Column(db.Integer, nullable=True)
+    evaluations = db.Column(db.Integer, nullable=True)
+    created = db.Column(db.DateTime, nullable=False)
+    started = db.Column(db.DateTime, nullable=True)
+    finished = db.Column(db.DateTime, nullable=True)
+    # the lease of the worker running the job, renewed by its heartbeat
+    worker = db.Column(db.String(255), nullable=True)
+    lease_expires = db.Column(db.DateTime, nullable=True)
+    heartbeat = db.Column(db.DateTime, nullable=True)
+    # the number of times the job has been leased
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # set to cancel a running job, possibly running in another process
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+
+    def __repr__(self):
+        return f"Job = id:{self.id}, method_id:{self.method_id}, status:{self.status}, worker:{self.worker}, attempts:{self.attempts}"
@@ -1,5 +1,6 @@
 import dill
 from database import db
+from utilities.serialization import compressed_dill
 
 # to be able to serialize lambdified expressions returned by SymPy
 # This might break some serializations!
@@ -9,16 +10,39 @@ dill.settings["recurse"] = True
 class Method(db.Model):
     id = db.Column(db.Integer, primary_key=True, unique=True)
     name = db.Column(db.String(120), nullable=False)
-    method_pickle = db.Column(db.PickleType(pickler=dill))
+    method_pickle = db.Column(db.PickleType(pickler=compressed_dill))
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
     guest_id = db.Column(db.Integer, db.ForeignKey("guest.id"), nullable=True)
     minimize = db.Column(db.String(120), nullable=False)
+    # id of the problem being solved, in Problem or GuestProblem depending on the owner
+    problem_id = db.Column(db.Integer, nullable=True)
     # status of the method. Options: ["NOT STARTED", "ITERATING", "FINISHED"]
     status = db.Column(db.String(120), nullable=True)
-    last_request = db.Column(db.PickleType(pickler=dill), nullable=True)
+    last_request = db.Column(db.PickleType(pickler=compressed_dill), nullable=True)
+    # the compute budget of the iterations of EAs as given on creation, see utilities.budgets
+    budget = db.Column(db.PickleType(pickler=compressed_dill), nullable=True)
+    # incremented on each update, an update is made only if the version is still the one read (compare-and-swap),
+    # otherwise sqlalchemy.orm.exc.StaleDataError is raised
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {"version_id_col": version}
 
     def __repr__(self):
         return (
             f"Method = id:{self.id}, name:{self.name}, user_id:{self.user_id}, minimize:{self.minimize}, "
-            f"status:{self.status}, last_request:{self.last_request}"
+            f"status:{self.status}, last_request:{self.last_request}, version:{self.version}"
         )
+
+
+class NavigatorState(db.Model):
+    # the state of NAUTILUS Navigator at a single step, kept so that the navigation can go back to a step by its number
+    id = db.Column(db.Integer, primary_key=True, unique=True)
+    method_id = db.Column(db.Integer, db.ForeignKey("method.id"), nullable=False, index=True)
+    step_number = db.Column(db.Integer, nullable=False)
+    state = db.Column(db.PickleType(pickler=compressed_dill), nullable=False)
+
+    # a single state per step of a method
+    __table_args__ = (db.UniqueConstraint("method_id", "step_number"),)
+
+    def __repr__(self):
+        return f"NavigatorState = id:{self.id}, method_id:{self.method_id}, step_number:{self.step_number}"
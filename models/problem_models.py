@@ -1,5 +1,6 @@
 import dill
 from database import db
+from utilities.serialization import compressed_dill
 from sqlalchemy.orm import validates
 
 # to be able to serialize lambdified expressions returned by SymPy
@@ -10,7 +11,7 @@ class GuestProblem(db.Model):
     id = db.Column(db.Integer, primary_key=True, unique=True)
     name = db.Column(db.String(120), nullable=False)
     problem_type = db.Column(db.String(120), nullable=False)
-    problem_pickle = db.Column(db.PickleType(pickler=dill))
+    problem_pickle = db.Column(db.PickleType(pickler=compressed_dill))
     user_id = db.Column(db.Integer, db.ForeignKey("guest.id"), nullable=False)
     minimize = db.Column(db.String(120), nullable=False)
 
@@ -21,7 +22,7 @@ class Problem(db.Model):
     id = db.Column(db.Integer, primary_key=True, unique=True)
     name = db.Column(db.String(120), nullable=False)
     problem_type = db.Column(db.String(120), nullable=False)
-    problem_pickle = db.Column(db.PickleType(pickler=dill))
+    problem_pickle = db.Column(db.PickleType(pickler=compressed_dill))
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     minimize = db.Column(db.String(120), nullable=False)
 
@@ -32,7 +33,7 @@ class Problem(db.Model):
 class SolutionArchive(db.Model):
     id = db.Column(db.Integer, primary_key=True, unique=True)
     problem_id = db.Column(db.Integer, db.ForeignKey("problem.id"), nullable=False)
-    solutions_dict_pickle = db.Column(db.PickleType(pickler=dill))
+    solutions_dict_pickle = db.Column(db.PickleType(pickler=compressed_dill))
     meta_data = db.Column(db.String(2000), nullable=False)
     date = db.Column(db.DateTime, nullable=False)
 
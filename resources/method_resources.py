@@ -13,12 +13,35 @@ from desdeo_mcdm.interactive import NimbusClassificationRequest
 from desdeo_problem.problem.Problem import DiscreteDataProblem
 from desdeo_emo.problem import IOPISProblem
 from desdeo_emo.EAs import RVEA, IOPIS_NSGAIII
+from flask import Response, current_app, request
 from flask_jwt_extended import get_jwt_identity, jwt_required, get_jwt
 from flask_restx import Resource, reqparse
-from models.method_models import Method
+from sqlalchemy import LargeBinary, select, type_coerce
+from sqlalchemy.orm import defer
+from sqlalchemy.orm.exc import StaleDataError
+from models.job_models import Job
+from models.method_models import Method, NavigatorState
 from models.problem_models import Problem, GuestProblem
 from models.user_models import UserModel, GuestUserModel, role_required, USER_ROLE, GUEST_ROLE
+from utilities.admission import admission_required
+from utilities.background import PendingResults, submit
+from utilities.budgets import IterationBudget
+from utilities.cancellation import CancelToken, IterationCancelled, deadline_after, running_iterations
 from utilities.expression_parser import NumpyEncoder, numpify_dict_items
+from utilities.checkpoints import Checkpoint, checkpoint_path, response_digest, resume_iteration
+from utilities.discrete_solver import chunked_discrete_minimizations, discrete_solver_settings
+from utilities.islands import DEFAULT_ISLANDS, DEFAULT_MIGRANTS, DEFAULT_MIGRATION_INTERVAL, IslandModel
+from utilities.iteration_hooks import combine_observers, has_generations
+from utilities.jobs import cancel_queued_jobs, create_job, request_job_cancellation, submit_job
+from utilities.method_processes import MethodProcessError, call_method
+from utilities.method_templates import content_digest, method_templates, template_key
+from utilities.navigation import navigate, step_summary
+from utilities.objective_index import IndexCache, index_settings
+from utilities.parallel_evaluation import evaluation_settings, parallel_evaluations
+from utilities.progress_streams import EventStream, progress_streams
+from utilities.session_locks import session_lock
+from utilities.snapshots import SnapshotError, read_snapshot, write_snapshot
+from utilities.speculation import SpeculativeIterations, enautilus_choice, enautilus_choices
 import pandas as pd
 import numpy as np
 
@@ -31,9 +54,25 @@ available_methods = {
     "irvea": RVEA,
     "iopis": IOPIS_NSGAIII,
     "rvea/class": RVEA,
+    "rvea/islands": IslandModel,
     "enautilus": ENautilus,
 }
 
+# the statuses of method sessions, see models.method_models.Method
+method_statuses = ["NOT STARTED", "ITERATING", "FINISHED"]
+# the message of /method/export and /method/import when no key signing the snapshots is configured
+SNAPSHOTS_DISABLED = "Method snapshots are disabled, no SNAPSHOT_KEY is configured."
+
+# how long the first request of a method started in the background is kept for GET /method/control, in seconds
+PENDING_START_TTL = 600
+# the first requests of newly created methods being computed in the background, keyed by the id of the method
+pending_starts = PendingResults(ttl=PENDING_START_TTL)
+# the next iterations of E-NAUTILUS computed in the background for each choice, keyed by the id of the method
+speculative_iterations = SpeculativeIterations()
+# the spatial indexes of the objective vectors of discrete problems, keyed by the table, the owner, and the id of the
+# problem
+objective_indexes = IndexCache()
+
 method_create_parser = reqparse.RequestParser()
 method_create_parser.add_argument(
     "problem_id",
@@ -49,6 +88,15 @@ method_create_parser.add_argument(
     ),
     required=True,
 )
+method_create_parser.add_argument(
+    "budget",
+    type=dict,
+    help=(
+        "The compute budget of the iterations of EAs, see utilities.budgets, and 'population_size'. The method is "
+        "created with the population size and 'max_generations' generations per iteration."
+    ),
+    default=None,
+)
 
 method_control_parser = reqparse.RequestParser()
 method_control_parser.add_argument(
@@ -66,33 +114,567 @@ method_control_parser.add_argument(
     help="The preference type chosen. Indexing starts at 0, -1 indicates no preference type has been chosen.",
     default=None,
 )
+method_control_parser.add_argument(
+    "method_id",
+    type=int,
+    help="The id of the method session to iterate. Defaults to the latest method created by the user.",
+    default=None,
+)
+method_control_parser.add_argument(
+    "version",
+    type=int,
+    help=(
+        "The version of the method session the response was given to, as returned by the previous request. "
+        "If given, the method is iterated only if it has not been modified since."
+    ),
+    default=None,
+)
+method_control_parser.add_argument(
+    "timeout",
+    type=float,
+    help=(
+        "The number of seconds the iteration may take, counted from the request. The iteration is stopped and the "
+        "method left as it was if not finished in time. Limited by the config ITERATION_TIMEOUT."
+    ),
+    default=None,
+)
+method_control_parser.add_argument(
+    "asynchronous",
+    type=bool,
+    help=(
+        "Run the iteration as a background job and return its id right away, see /method/job. Defaults to true for "
+        "the methods listed in the config ASYNC_METHODS."
+    ),
+    default=None,
+)
+method_control_parser.add_argument(
+    "steps",
+    type=int,
+    help=(
+        "NAUTILUS Navigator only: the number of steps to navigate with the response, 0 to navigate to the Pareto "
+        "front. The state of each step is returned in 'steps'."
+    ),
+    default=None,
+)
+method_control_parser.add_argument(
+    "budget",
+    type=dict,
+    help=(
+        "The compute budget of the iteration of EAs, see utilities.budgets. Overrides the limits of the budget the "
+        "method session was created with."
+    ),
+    default=None,
+)
+
+method_session_parser = reqparse.RequestParser()
+method_session_parser.add_argument(
+    "method_id",
+    type=int,
+    help="The id of the method session. Defaults to the latest method created by the user.",
+    location="args",
+    default=None,
+)
+
+method_cancel_parser = reqparse.RequestParser()
+method_cancel_parser.add_argument(
+    "method_id",
+    type=int,
+    help=(
+        "The id of the method session whose iterations are cancelled. Defaults to the latest method created by the "
+        "user."
+    ),
+    default=None,
+)
+method_cancel_parser.add_argument(
+    "job_id",
+    type=int,
+    help="The id of a job to cancel. If given, only the job is cancelled.",
+    default=None,
+)
+
+method_job_parser = reqparse.RequestParser()
+method_job_parser.add_argument(
+    "job_id",
+    type=int,
+    help="The id of the job, as returned by POST /method/control.",
+    location="args",
+    required=True,
+)
+
+method_progress_parser = reqparse.RequestParser()
+method_progress_parser.add_argument(
+    "method_id",
+    type=int,
+    help="The id of the method session. Defaults to the latest method created by the user.",
+    location="args",
+    default=None,
+)
+method_progress_parser.add_argument(
+    "front_size",
+    type=int,
+    help="The maximum number of points of the current front of EAs included in the progress, 0 for none.",
+    location="args",
+    default=0,
+)
+
+method_import_parser = reqparse.RequestParser()
+method_import_parser.add_argument(
+    "problem_id",
+    type=int,
+    help=(
+        "The id of the problem the imported method solves. Defaults to the problem referenced in the snapshot, if the "
+        "user has a problem with the same id and name."
+    ),
+    location="args",
+    default=None,
+)
+
+
+def find_user_owner():
+    """Return the column and the id identifying the current user as the owner of a method.
+
+    Returns:
+        dict: Either {"user_id": id} or {"guest_id": id}, or None if the role of the user is not known.
+    """
+    claims = get_jwt()
+    current_user = get_jwt_identity()
+
+    if claims["role"] == USER_ROLE:
+        return {"user_id": UserModel.query.filter_by(username=current_user).first().id}
+    elif claims["role"] == GUEST_ROLE:
+        return {"guest_id": GuestUserModel.query.filter_by(username=current_user).first().id}
+
+    return None
+
+
+def find_user_problem(problem_id):
+    """Find a problem of the current user.
+
+    Args:
+        problem_id (int): The id of the problem.
+
+    Returns:
+        Problem or GuestProblem: The problem, or None if not found.
+    """
+    owner = find_user_owner()
+
+    if owner is None:
+        return None
+    elif "user_id" in owner:
+        return Problem.query.filter_by(user_id=owner["user_id"], id=problem_id).first()
+    else:
+        return GuestProblem.query.filter_by(user_id=owner["guest_id"], id=problem_id).first()
+
+
+def find_user_methods():
+    """Query the method sessions of the current user.
+
+    Returns:
+        Query: A query of the methods of the current user, newest first, or None if the role of the user is not known.
+    """
+    owner = find_user_owner()
+
+    if owner is None:
+        return None
+
+    return Method.query.filter_by(**owner).order_by(Method.id.desc())
+
+
+def find_user_method(method_id=None):
+    """Find a method session of the current user.
+
+    Args:
+        method_id (int, optional): The id of the method session. Defaults to None, in which case the latest method
+            created by the user is returned.
+
+    Returns:
+        Method: The method, or None if not found.
+    """
+    query = find_user_methods()
+
+    if query is None:
+        return None
+
+    if method_id is not None:
+        query = query.filter_by(id=method_id)
+
+    return query.first()
+
+
+def commit_method(method_query):
+    """Commit the changes to a method session, given that it has not been modified by another request.
+
+    Args:
+        method_query (Method): The modified row of the method session.
+
+    Raises:
+        StaleDataError: The method session was modified by another request after it was read. Nothing is committed.
+
+    Returns:
+        int: The new version of the method session.
+    """
+    try:
+        # the compare-and-swap on the version is made when flushing
+        db.session.flush()
+        version = method_query.version
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        raise
+
+    return version
+
+
+def evict_methods(owner, limit):
+    """Delete the oldest method sessions of an owner over a limit, with their navigation history and jobs.
+
+    The sessions with jobs queued or running are kept until their jobs have finished, and deleted by a later call. The
+    work pending in the background for the deleted sessions is dropped. The deletion is committed.
+
+    Args:
+        owner (dict): The owner of the sessions, see `find_user_owner`.
+        limit (int): The number of the newest sessions kept, None to keep all of them.
+
+    Returns:
+        list: The ids of the deleted sessions.
+    """
+    if limit is None:
+        return []
+
+    newest_first = db.session.query(Method.id).filter_by(**owner).order_by(Method.id.desc())
+    method_ids = [method_id for (method_id,) in newest_first.offset(limit)]
+    busy = {
+        method_id
+        for (method_id,) in db.session.query(Job.method_id).filter(
+            Job.method_id.in_(method_ids), Job.status.in_(["QUEUED", "RUNNING"])
+        )
+    }
+    method_ids = [method_id for method_id in method_ids if method_id not in busy]
+
+    if not method_ids:
+        return []
+
+    NavigatorState.query.filter(NavigatorState.method_id.in_(method_ids)).delete(synchronize_session="fetch")
+    Job.query.filter(Job.method_id.in_(method_ids)).delete(synchronize_session="fetch")
+    Method.query.filter(Method.id.in_(method_ids)).delete(synchronize_session="fetch")
+    db.session.commit()
+
+    for method_id in method_ids:
+        pending = pending_starts.pop(method_id)
+        if pending is not None:
+            pending[0].cancel()
+        speculative_iterations.take(method_id, None, None)
+
+    return method_ids
+
+
+def conflict_response(method_id):
+    """The response given when a method session was modified by another request.
+
+    Args:
+        method_id (int): The id of the method session.
+
+    Returns:
+        (tuple): tuple containing:
+            (dict): A message and the current version of the method session.
+            (int): HTTP status code 409.
+    """
+    version = db.session.query(Method.version).filter_by(id=method_id).scalar()
+
+    return {
+        "message": (
+            "The method was modified by another request. Fetch its current state and resend the response if needed."
+        ),
+        "method_id": method_id,
+        "version": version,
+    }, 409
+
+
+def cancelled_response(method_id, reason):
+    """The response given when an iteration of a method session was stopped before it finished.
+
+    Args:
+        method_id (int): The id of the method session.
+        reason (str): Either 'cancelled' or 'deadline', see `utilities.cancellation.IterationCancelled`.
+
+    Returns:
+        (tuple): tuple containing:
+            (dict): A message, the reason, and the current version of the method session.
+            (int): HTTP status code 409 if cancelled, 408 if past the deadline.
+    """
+    if reason == "deadline":
+        message, code = "The iteration did not finish in time.", 408
+    else:
+        message, code = "The iteration was cancelled.", 409
+
+    return {
+        "message": f"{message} The method has been left as it was before the iteration.",
+        "cancelled": True,
+        "reason": reason,
+        "method_id": method_id,
+        "version": db.session.query(Method.version).filter_by(id=method_id).scalar(),
+    }, code
+
+
+def iteration_checkpoint(method_query, method, response):
+    """The checkpoint of an iteration of a method session, if checkpoints are written for the method.
+
+    Args:
+        method_query (Method): The row of the method session.
+        method: The method being iterated.
+        response: The response the method is iterated with, as received.
+
+    Returns:
+        Checkpoint: The checkpoint, or None if the method is not an EA or checkpoints are disabled.
+    """
+    interval = current_app.config.get("CHECKPOINT_INTERVAL")
+
+    if interval is None or not has_generations(method):
+        return None
+
+    return Checkpoint(
+        checkpoint_path(current_app.config["CHECKPOINT_DIR"], method_query.id),
+        interval,
+        {"method_id": method_query.id, "version": method_query.version, "response": response_digest(response)},
+    )
+
+
+def read_create_budget(budget_data):
+    """Read the budget given to POST /method/create.
+
+    Args:
+        budget_data (dict): The budget, see `utilities.budgets`, and optionally 'population_size'. None for no budget.
+
+    Raises:
+        ValueError: The budget is not valid, the message explains why.
+
+    Returns:
+        (tuple): tuple containing:
+            (dict): The budget of the iterations of the method session, or None.
+            (dict): The keyword arguments of the EAs implied by the budget, see `initialize_method`.
+    """
+    if budget_data is None:
+        return None, {}
+
+    budget_data = dict(budget_data)
+    population_size = budget_data.pop("population_size", None)
+
+    if population_size is not None and (
+        isinstance(population_size, bool) or not isinstance(population_size, int) or population_size < 2
+    ):
+        raise ValueError("The budget 'population_size' must be an integer of at least 2.")
+
+    budget = IterationBudget.from_dict(budget_data)
+    parameters = {}
+
+    if population_size is not None:
+        parameters["population_size"] = population_size
+    if budget.max_generations is not None:
+        parameters["n_gen_per_iter"] = budget.max_generations
+
+    return budget.to_dict() or None, parameters
+
+
+def iteration_budget(method_query, budget_data=None):
+    """The budget of an iteration of a method session: the budget in the config ITERATION_BUDGET, overridden by the
+    budget the session was created with, overridden by the budget of the request.
+
+    Args:
+        method_query (Method): The row of the method session.
+        budget_data (dict, optional): The budget of the request. Defaults to None.
+
+    Returns:
+        IterationBudget: The budget.
+    """
+    budget = IterationBudget.from_dict(current_app.config.get("ITERATION_BUDGET"))
+
+    for overriding in (method_query.budget, budget_data):
+        budget = budget.override(IterationBudget.from_dict(overriding))
+
+    return budget
+
+
+def method_objective_index(method_query):
+    """The index of the objective vectors of the discrete problem of a method session, see
+    `utilities.objective_index`. The problem is loaded only if its index is not cached.
+
+    Args:
+        method_query (Method): The row of the method session.
+
+    Returns:
+        ObjectiveIndex: The index, or None if the method does not search the objective vectors, or the problem is not
+            indexed.
+    """
+    if method_query.name not in ("nautilus_navigator", "enautilus") or method_query.problem_id is None:
+        return None
+
+    # as find_user_problem, by the owner of the session, the ids of guests being stored as user_id of GuestProblem
+    if method_query.user_id is not None:
+        problem_model, owner_id = Problem, method_query.user_id
+    else:
+        problem_model, owner_id = GuestProblem, method_query.guest_id
+
+    def load_problem():
+        query = problem_model.query.filter_by(user_id=owner_id, id=method_query.problem_id).first()
+        return query.problem_pickle if query is not None else None
+
+    return objective_indexes.get(
+        (problem_model.__name__, owner_id, method_query.problem_id), load_problem, index_settings()
+    )
+
+
+def initialization_settings():
+    """Read the settings of the current app `initialize_method` depends on, see `template_key`.
+
+    Returns:
+        tuple: The settings of the parallel evaluations, of the discrete minimizations, and of the island model.
+    """
+    config = current_app.config
+
+    return (
+        evaluation_settings(),
+        discrete_solver_settings(),
+        (
+            config.get("RVEA_ISLANDS", DEFAULT_ISLANDS),
+            config.get("RVEA_ISLAND_PROCESSES"),
+            config.get("RVEA_MIGRATION_INTERVAL", DEFAULT_MIGRATION_INTERVAL),
+            config.get("RVEA_MIGRANTS", DEFAULT_MIGRANTS),
+        ),
+    )
+
+
+def initialize_method(method_name, problem, problem_type, ea_parameters=None):
+    """Initialize a method to solve a problem.
+
+    Args:
+        method_name (str): The name of the method, one of `available_methods`.
+        problem: The problem to be solved.
+        problem_type (str): The type of the problem, e.g., 'Analytical' or 'Discrete'.
+        ea_parameters (dict, optional): Keyword arguments of the EAs, e.g., 'population_size' and 'n_gen_per_iter',
+            see `ea_parameters`. Defaults to None, in which case the defaults of desdeo_emo are used.
+
+    Returns:
+        (tuple): tuple containing:
+            The initialized method, or None if the method could not be initialized.
+            (tuple): A message and an HTTP status code explaining why the method could not be initialized, or None.
+    """
+    ea_parameters = ea_parameters or {}
+
+    # match the method and initialize
+    # TODO: add more methods here!
+    if method_name == "reference_point_method":
+        method = ReferencePointMethod(problem, problem.ideal, problem.nadir)
+    elif method_name == "synchronous_nimbus":
+        # the initial solution of discrete problems is found by minimizing an ASF
+        with chunked_discrete_minimizations(*discrete_solver_settings()):
+            method = NIMBUS(problem)
+    elif method_name == "reference_point_method_alt":
+        method = ReferencePointMethod(problem, problem.ideal, problem.nadir)
+    elif method_name == "nautilus_navigator":
+        if problem_type == "Discrete":
+            problem: DiscreteDataProblem
+            method = NautilusNavigator(
+                problem.objectives,
+                problem.ideal,
+                problem.nadir,
+                problem.decision_variables,
+            )
+            method._steps_remaining = 40
+        else:
+            # not discrete problem
+            message = "Currently NAUTILUS Navigator supports only the solving of discrete problem."
+            return None, ({"message": message}, 406)
+    elif method_name == "enautilus":
+        if problem_type == "Discrete":
+            problem: DiscreteDataProblem
+            method = ENautilus(
+                problem.objectives,
+                problem.ideal,
+                problem.nadir,
+                variables=problem.decision_variables,
+            )
+        else:
+            # enautilus supports only discrete problems
+            message = "E-NAUTILUS supports solcing discrete problems only"
+            return None, ({"message": message}, 406)
+    elif method_name == "rvea":
+        if problem_type == "Analytical":
+            with parallel_evaluations([problem], *evaluation_settings()):
+                method = RVEA(problem, interact=False, **ea_parameters)
+        else:
+            # not analytical problem
+            message = "Currently RVEA supports only analytical problem types."
+            return None, ({"message": message}, 406)
+    elif method_name == "irvea" or method_name == "rvea/class":
+        if problem_type == "Analytical" or "Classification PIS":
+            with parallel_evaluations([problem], *evaluation_settings()):
+                method = RVEA(problem, interact=True, **ea_parameters)
+        else:
+            # not analytical problem
+            message = "Currently RVEA supports only analytical problem types."
+            return None, ({"message": message}, 406)
+    elif method_name == "rvea/islands":
+        if problem_type == "Analytical":
+            config = current_app.config
+            with parallel_evaluations([problem], *evaluation_settings()):
+                islands = [
+                    RVEA(problem, interact=True, **ea_parameters)
+                    for _ in range(config.get("RVEA_ISLANDS", DEFAULT_ISLANDS))
+                ]
+            method = IslandModel(
+                islands,
+                processes=config.get("RVEA_ISLAND_PROCESSES"),
+                migration_interval=config.get("RVEA_MIGRATION_INTERVAL", DEFAULT_MIGRATION_INTERVAL),
+                n_migrants=config.get("RVEA_MIGRANTS", DEFAULT_MIGRANTS),
+            )
+        else:
+            # not analytical problem
+            message = "Currently RVEA supports only analytical problem types."
+            return None, ({"message": message}, 406)
+    elif method_name == "iopis":
+        if problem_type == "Analytical":
+            with parallel_evaluations([problem], *evaluation_settings()):
+                method = IOPIS_NSGAIII(problem, **ea_parameters)
+        else:
+            # not analytical problem
+            message = "Currently IOPIS supports only analytical problem types."
+            return None, ({"message": message}, 406)
+    else:
+        # internal error
+        return None, ({
+            "message": f"For some reason could not initialize method {method_name}"
+        }, 500)
+
+    return method, None
 
 
 class MethodCreate(Resource):
     @jwt_required()
     @role_required(USER_ROLE, GUEST_ROLE)
     def get(self):
-        claims = get_jwt()
-        current_user = get_jwt_identity()
+        methods_query = find_user_methods()
 
-        if claims["role"] == USER_ROLE: 
-            current_user_id = UserModel.query.filter_by(username=current_user).first().id
-            method = Method.query.filter_by(user_id=current_user_id).first()
-        elif claims["role"] == GUEST_ROLE:
-            current_user_id = GuestUserModel.query.filter_by(username=current_user).first().id
-            method = Method.query.filter_by(guest_id=current_user_id).first()
-        else:
+        if methods_query is None:
             return {"message": "User role not found."}, 404
 
-        if method is None:
+        methods = methods_query.all()
+
+        if not methods:
             # not found
             return {"message": "No method found defined for the current user."}, 404
 
         # ok
-        return {"message": "Method found!"}, 200
+        return {
+            "message": "Method found!",
+            "methods": [
+                {"method_id": method.id, "name": method.name, "status": method.status}
+                for method in methods
+            ],
+        }, 200
 
     @jwt_required()
     @role_required(USER_ROLE, GUEST_ROLE)
+    @admission_required
     def post(self):
         data = method_create_parser.parse_args()
 
@@ -102,14 +684,18 @@ class MethodCreate(Resource):
             claims = get_jwt()
             current_user = get_jwt_identity()
 
+            # the problem is unpickled only if the method must be initialized, see below
             if claims["role"] == USER_ROLE: 
                 current_user_id = UserModel.query.filter_by(username=current_user).first().id
-                query = Problem.query.filter_by(user_id=current_user_id, id=problem_id).first()
+                query = Problem.query.options(defer(Problem.problem_pickle)).filter_by(
+                    user_id=current_user_id, id=problem_id
+                ).first()
             elif claims["role"] == GUEST_ROLE:
                 current_user_id = GuestUserModel.query.filter_by(username=current_user).first().id
-                query = GuestProblem.query.filter_by(user_id=current_user_id, id=problem_id).first()
+                query = GuestProblem.query.options(defer(GuestProblem.problem_pickle)).filter_by(
+                    user_id=current_user_id, id=problem_id
+                ).first()
 
-            problem = query.problem_pickle
             problem_minimize = query.minimize
 
         except Exception as e:
@@ -130,103 +716,70 @@ class MethodCreate(Resource):
                 )
             }, 404
 
-        # match the method and initialize
-        # TODO: add more methods here!
-        if method_name == "reference_point_method":
-            method = ReferencePointMethod(problem, problem.ideal, problem.nadir)
-        elif method_name == "synchronous_nimbus":
-            method = NIMBUS(problem)
-        elif method_name == "reference_point_method_alt":
-            method = ReferencePointMethod(problem, problem.ideal, problem.nadir)
-        elif method_name == "nautilus_navigator":
-            if query.problem_type == "Discrete":
-                problem: DiscreteDataProblem
-                method = NautilusNavigator(
-                    problem.objectives,
-                    problem.ideal,
-                    problem.nadir,
-                    problem.decision_variables,
-                )
-                method._steps_remaining = 40
-            else:
-                # not discrete problem
-                message = "Currently NAUTILUS Navigator supports only the solving of discrete problem."
-                return {"message": message}, 406
-        elif method_name == "enautilus":
-            if query.problem_type == "Discrete":
-                problem: DiscreteDataProblem
-                method = ENautilus(
-                    problem.objectives,
-                    problem.ideal,
-                    problem.nadir,
-                    variables=problem.decision_variables,
-                )
-            else:
-                # enautilus supports only discrete problems
-                message = "E-NAUTILUS supports solcing discrete problems only"
-                return {"message": message}, 406
-        elif method_name == "rvea":
-            if query.problem_type == "Analytical":
-                method = RVEA(problem, interact=False)
-            else:
-                # not analytical problem
-                message = "Currently RVEA supports only analytical problem types."
-                return {"message": message}, 406
-        elif method_name == "irvea" or method_name == "rvea/class":
-            if query.problem_type == "Analytical" or "Classification PIS":
-                method = RVEA(problem, interact=True)
-            else:
-                # not analytical problem
-                message = "Currently RVEA supports only analytical problem types."
-                return {"message": message}, 406
-        elif method_name == "iopis":
-            if query.problem_type == "Analytical":
-                method = IOPIS_NSGAIII(problem)
-            else:
-                # not analytical problem
-                message = "Currently IOPIS supports only analytical problem types."
-                return {"message": message}, 406
-        else:
-            # internal error
-            return {
-                "message": f"For some reason could not initialize method {method_name}"
-            }, 500
-        # add method to database, but keep only one method at any given time
-        # if method already exists, delete it
-        print(f"DEBUG: deleted {Method.query.filter_by(user_id=current_user_id).all()}")
-        if claims["role"] == USER_ROLE:
-            Method.query.filter_by(user_id=current_user_id).delete()
-        elif claims["role"] == GUEST_ROLE: 
-            Method.query.filter_by(guest_id=current_user_id).delete()
-        db.session.commit()
+        try:
+            budget, parameters = read_create_budget(data["budget"])
+        except ValueError as e:
+            print(f"DEBUG: {e}")
+            # bad request
+            return {"message": str(e)}, 400
+
+        # new sessions start from a copy of a cached method initialized earlier with the same problem and parameters
+        problem_model = type(query)
+        problem_data = db.session.execute(
+            select(type_coerce(problem_model.problem_pickle, LargeBinary)).where(problem_model.id == query.id)
+        ).scalar()
+        key = template_key(
+            content_digest(problem_data),
+            method_name,
+            {"problem_type": query.problem_type, **parameters},
+            initialization_settings(),
+        )
+
+        method = method_templates.get(key)
+
+        if method is None:
+            method, error = initialize_method(method_name, query.problem_pickle, query.problem_type, parameters)
+
+            if error is not None:
+                return error
+
+            method_templates.put(key, method)
 
-        # add method to db
+        # add method to db as a new session, the existing sessions of the user are kept
         if claims["role"] == USER_ROLE:
-            db.session.add(
-                Method(
-                    name=method_name,
-                    method_pickle=method,
-                    user_id=current_user_id,
-                    minimize=problem_minimize,
-                    status="NOT STARTED",
-                    last_request=None,
-                )
+            method_query = Method(
+                name=method_name,
+                method_pickle=method,
+                user_id=current_user_id,
+                minimize=problem_minimize,
+                problem_id=query.id,
+                status="NOT STARTED",
+                last_request=None,
+                budget=budget,
             )
-            db.session.commit()
         elif claims["role"] == GUEST_ROLE:
-            db.session.add(
-                Method(
-                    name=method_name,
-                    method_pickle=method,
-                    guest_id=current_user_id,
-                    minimize=problem_minimize,
-                    status="NOT STARTED",
-                    last_request=None,
-                )
+            method_query = Method(
+                name=method_name,
+                method_pickle=method,
+                guest_id=current_user_id,
+                minimize=problem_minimize,
+                problem_id=query.id,
+                status="NOT STARTED",
+                last_request=None,
+                budget=budget,
+            )
+        db.session.add(method_query)
+        version = commit_method(method_query)
+        evict_methods(find_user_owner(), current_app.config.get("METHOD_SESSION_LIMIT"))
+
+        if current_app.config.get("PRECOMPUTE_METHOD_START", False):
+            # start the method ahead of GET /method/control, which usually follows right away. The method is not used
+            # by this request anymore, so it can be modified in the background.
+            pending_starts.put(
+                method_query.id, (submit(start_method, method), method, (method_name, query.id, version))
             )
-            db.session.commit()
 
-        response = {"method": method_name, "owner": current_user}
+        response = {"method": method_name, "owner": current_user, "method_id": method_query.id}
 
         # created
         return response, 201
@@ -235,59 +788,67 @@ class MethodCreate(Resource):
 class MethodControl(Resource):
     @jwt_required()
     @role_required(USER_ROLE, GUEST_ROLE)
+    @admission_required
     def get(self):
-        try:
-            claims = get_jwt()
-            current_user = get_jwt_identity()
-
-            if claims["role"] == USER_ROLE:
-                current_user_id = UserModel.query.filter_by(username=current_user).first().id
-                method_query = Method.query.filter_by(user_id=current_user_id).first()
-            elif claims["role"] == GUEST_ROLE:
-                current_user_id = GuestUserModel.query.filter_by(username=current_user).first().id
-                method_query = Method.query.filter_by(guest_id=current_user_id).first()
+        data = method_session_parser.parse_args()
 
+        try:
+            method_query = find_user_method(data["method_id"])
         except Exception as e:
             print(f"DEBUG: {e}")
             # not found
-            return {"message": f"Could not find user with id={current_user_id}."}, 404
+            return {"message": f"Could not find user {get_jwt_identity()}."}, 404
 
         if method_query is None:
             # not found
             return {"message": "No defined method found for the current user."}, 404
 
+        with session_lock(method_query):
+            return self.start(method_query)
+
+    def start(self, method_query):
         if method_query.status != "NOT STARTED":
             # wrong method status, bad request
             return {"message": "Method has already been started."}, 400
 
-        # need to make deepcopy to have a new mem addres so that sqlalchemy updates the pickle
-        # TODO: use a Mutable column
-        method = deepcopy(method_query.method_pickle)
-
-        # EA methods handle a bit differently, multiple requests to be handled
-        if type(method).__name__ == RVEA.__name__:
-            return_message, request = EAControlGet(method)
-        elif isinstance(method, IOPIS_NSGAIII):
-            return_message, request = IOPISControlGet(method)
+        started = None
+        pending = pending_starts.pop(method_query.id)
+
+        if pending is not None:
+            future, pending_method, pending_state = pending
+            state = (method_query.name, method_query.problem_id, method_query.version)
+
+            # if the start has not begun, it is cheaper to start here than to wait for a free background worker, and a
+            # start of another state of the session is not needed at all
+            if not future.cancel() and pending_state == state:
+                try:
+                    started = (pending_method, *future.result())
+                except Exception as e:
+                    print(f"DEBUG: {e}")
+                    # could not start in the background, try again below
+
+        if started is None:
+            # need to make deepcopy to have a new mem addres so that sqlalchemy updates the pickle
+            # TODO: use a Mutable column
+            method = deepcopy(method_query.method_pickle)
+            return_message, request = start_method(method)
         else:
-            # start the method and set response
-            request = method.start()  # None if method is non interactive
-            if isinstance(request, tuple):
-                # needed when multiple requests are returned as separate objects. This is needed in, e.g., NIMBUS and EA methods.
-                request = request[0]
-
-            # We dump the data here temporarily because the data must be encoded using a custom encoder to be first parsed
-            # into valid JSON, then we load it again before returning.
-            # ignore_nan will result in np.nan to be converted to valid null in JSON
+            method, return_message, request = started
 
-            response = json.dumps(request.content, cls=NumpyEncoder, ignore_nan=True)
-            return_message = {"response": json.loads(response)}, 200
+        if type(request).__name__ == NautilusNavigatorRequest.__name__:
+            save_navigator_state(method_query.id, method, request)
 
         # set status to iterating and last_request
         method_query.status = "ITERATING"
         method_query.last_request = request
         method_query.method_pickle = method
-        db.session.commit()
+
+        try:
+            return_message[0]["version"] = commit_method(method_query)
+        except StaleDataError as e:
+            print(f"DEBUG: {e}")
+            # started by another request
+            return conflict_response(method_query.id)
 
         # ok
         # flask-restx will automatically parse the return value from Python dicts to valid JSON, this is why
@@ -305,75 +866,150 @@ class MethodControl(Resource):
 
     @jwt_required()
     @role_required(USER_ROLE, GUEST_ROLE)
+    @admission_required
     def post(self):
         data = method_control_parser.parse_args()
-        user_response_raw = data["response"]
 
         try:
-            claims = get_jwt()
-            current_user = get_jwt_identity()
-
-            if claims["role"] == USER_ROLE:
-                current_user_id = UserModel.query.filter_by(username=current_user).first().id
-                method_query = Method.query.filter_by(user_id=current_user_id).first()
-            elif claims["role"] == GUEST_ROLE:
-                current_user_id = GuestUserModel.query.filter_by(username=current_user).first().id
-                method_query = Method.query.filter_by(guest_id=current_user_id).first()
-
+            method_query = find_user_method(data["method_id"])
         except Exception as e:
             print(f"DEBUG: {e}")
             # not found
-            return {"message": f"Could not find user with id={current_user_id}."}, 404
+            return {"message": f"Could not find user {get_jwt_identity()}."}, 404
 
         if method_query is None:
             # not found
             return {"message": "No defined method found for the current user."}, 404
 
-        if method_query.status != "ITERATING":
-            # wrong method status, bad request
-            return {"message": "Method has not been started or is finished."}, 400
-
-        if method_query.last_request is None:
-            # method has no last request defined, bas request
-            return {"message": "The method has no last request defined."}, 400
-
-        # need to make deepcopy to have a new mem addres so that sqlalchemy updates the pickle
-        # TODO: use a Mutable column
-        method = deepcopy(method_query.method_pickle)
-
-        if type(method).__name__ == RVEA.__name__:
-        # EA methods (RVEA for now) require that a preference type is chosen.
-            """if data["preference_type"] < -1:
-                # preference type not specified
-                return {
-                    "message": (
-                        "When using evolutionary methods, the entry in the JSON response "
-                        "'preference_type' must be either positive, or -1 to indicate termination."
-                    )
-                }, 400
-            elif data["preference_type"] == -1:
-                # do non-dominated sorting and return
-                ea_individuals, ea_objectives = method.end()
-                response = json.dumps(
-                    {"individuals": ea_individuals, "objectives": ea_objectives},
-                    cls=NumpyEncoder,
-                    ignore_nan=True,
-                )
-                return json.loads(response), 200"""
+        data["deadline"] = deadline_after(data["timeout"], current_app.config.get("ITERATION_TIMEOUT"))
 
-        last_request = method_query.last_request
+        try:
+            IterationBudget.from_dict(data["budget"])
+        except ValueError as e:
+            print(f"DEBUG: {e}")
+            # bad request
+            return {"message": str(e)}, 400
 
-        # cast lists, which have numerical content, to numpy arrays
-        user_response = numpify_dict_items(user_response_raw)
+        asynchronous = data["asynchronous"]
+        if asynchronous is None:
+            asynchronous = method_query.name in current_app.config.get("ASYNC_METHODS", [])
 
-        try:
-            if (
-                (type(method).__name__ == NautilusNavigator.__name__)
-                and user_response["go_to_previous"]
-            ):
-                # for navigation methods, we need to copy the whole response as the contents of the request when going back
-                # since historic information is expected in the contents, but is contained in the response.
-                # TODO this is stupid, fix NautilusNavigator to expect these fields in the response instead...
+        if asynchronous:
+            # the job iterates the method later, holding the lock of the session then
+            job = create_job(method_query.id, dict(data))
+            db.session.commit()
+            if not current_app.config.get("EXTERNAL_JOB_WORKERS", False):
+                submit_job(job.id, run_iteration_job)
+
+            # accepted
+            return {
+                "message": "The iteration has been queued.",
+                "job_id": job.id,
+                "method_id": method_query.id,
+                "status": job.status,
+            }, 202
+
+        with session_lock(method_query):
+            return iterate_method(method_query, data)
+
+
+def iterate_method(method_query, data, observer=None):
+    """Iterate a method session with a response. The lock of the session must be held, see `session_lock`.
+
+    Args:
+        method_query (Method): The row of the method session.
+        data (dict): The parsed arguments of POST /method/control.
+        observer (Callable, optional): Called before each generation of EAs with the progress of the iteration, see
+            `utilities.iteration_hooks.observe_generations`. Defaults to None.
+
+    Returns:
+        (tuple): tuple containing:
+            (dict): The new request of the method, or a message explaining why it could not be iterated.
+            (int): HTTP status code.
+    """
+    method_id = method_query.id
+    message, code = _iterate_method(method_query, data, observer)
+
+    # ends the progress streams of the iteration
+    progress_streams.publish(
+        method_id, "iteration", {"method_id": method_id, "status_code": code, "version": message.get("version")}
+    )
+
+    return message, code
+
+
+def _iterate_method(method_query, data, observer):
+    user_response_raw = data["response"]
+
+    if method_query.status != "ITERATING":
+        # wrong method status, bad request
+        return {"message": "Method has not been started or is finished."}, 400
+
+    if method_query.last_request is None:
+        # method has no last request defined, bas request
+        return {"message": "The method has no last request defined."}, 400
+
+    if data["version"] is not None and data["version"] != method_query.version:
+        # the method has been iterated after the response was given, e.g., the response was sent twice
+        return conflict_response(method_query.id)
+
+    steps = data.get("steps")
+
+    if steps is not None and (method_query.name != "nautilus_navigator" or steps < 0):
+        # bad request
+        return {"message": "'steps' must be a non-negative number of steps of NAUTILUS Navigator."}, 400
+
+    # need to make deepcopy to have a new mem addres so that sqlalchemy updates the pickle
+    # TODO: use a Mutable column
+    method = deepcopy(method_query.method_pickle)
+
+    if type(method).__name__ == RVEA.__name__:
+    # EA methods (RVEA for now) require that a preference type is chosen.
+        """if data["preference_type"] < -1:
+            # preference type not specified
+            return {
+                "message": (
+                    "When using evolutionary methods, the entry in the JSON response "
+                    "'preference_type' must be either positive, or -1 to indicate termination."
+                )
+            }, 400
+        elif data["preference_type"] == -1:
+            # do non-dominated sorting and return
+            ea_individuals, ea_objectives = method.end()
+            response = json.dumps(
+                {"individuals": ea_individuals, "objectives": ea_objectives},
+                cls=NumpyEncoder,
+                ignore_nan=True,
+            )
+            return json.loads(response), 200"""
+
+    last_request = method_query.last_request
+
+    # cast lists, which have numerical content, to numpy arrays
+    user_response = numpify_dict_items(user_response_raw)
+
+    try:
+        if (
+            (type(method).__name__ == NautilusNavigator.__name__)
+            and user_response["go_to_previous"]
+        ):
+            # NautilusNavigator expects the state of the previous step in the contents of the request when going
+            # back. The state is restored from the history kept by the server, so that only the step number needs
+            # to be given in the response.
+            previous_state = NavigatorState.query.filter_by(
+                method_id=method_query.id, step_number=user_response["step_number"]
+            ).first()
+
+            if previous_state is not None:
+                last_request = load_navigator_request(method, previous_state)
+                # the preferences are not used when going back, but they are still expected and validated
+                user_response.setdefault("reference_point", last_request.content["navigation_point"])
+                user_response.setdefault("speed", last_request.content["current_speed"])
+                user_response.setdefault("stop", False)
+                user_response.setdefault("user_bounds", last_request.content["user_bounds"])
+            else:
+                # the step is not in the history (e.g., the method was started before the history was kept), the
+                # whole state of the step must then be given in the response
                 last_request = NautilusNavigatorRequest(
                     user_response["ideal"],
                     user_response["nadir"],
@@ -388,88 +1024,639 @@ class MethodControl(Resource):
                     user_response["current_speed"],
                     user_response["navigation_point"],
                 )
-            preference_type = data["preference_type"]
-
-            
-            last_request.response = user_response
-            new_request = method.iterate(last_request)
-            if isinstance(
-                new_request, tuple
-            ):  # For methods that return mutliple object from an iterate call (e.g., NIMBUS (for now) and EA methods)
-                new_request = new_request[0]
-
-            method_query.method_pickle = method
-            method_query.last_request = new_request
-            db.session.commit()
-        except Exception as e:
-            print(f"DEBUG: {e}")
-            # error, could not iterate, internal server error
-            if isinstance(last_request, tuple):
-                last_request_dump = [
-                    json.dumps(r.content, cls=NumpyEncoder, ignore_nan=True)
-                    for r in last_request
-                ]
-            else:
-                last_request_dump = json.dumps(
-                    last_request.content, cls=NumpyEncoder, ignore_nan=True
-                )
-            return {
-                "message": "Could not iterate the method with the given response",
-                "last_request": last_request_dump,
-            }, 400
+        preference_type = data["preference_type"]
+
+        
+        last_request.response = user_response
+        # the iteration can be cancelled by POST /method/cancel, and the progress is published for the clients
+        # streaming it, see MethodProgress
+        # long iterations of EAs are checkpointed, and resumed from the checkpoint if their process died
+        checkpoint = iteration_checkpoint(method_query, method, user_response_raw)
+        resumed = checkpoint.read() if checkpoint is not None else None
+
+        if resumed is not None:
+            method, _ = resumed
+            call = (resume_iteration,)
+        elif steps is not None:
+            # several steps of NAUTILUS Navigator in one call
+            call = (navigate, last_request, steps)
+        else:
+            call = ("iterate", last_request)
+
+        speculated = None
+        if method_query.name == "enautilus" and resumed is None and steps is None and data.get("budget") is None:
+            # the iteration may have been computed while the decision maker was choosing, see utilities.speculation
+            speculated = speculative_iterations.take(
+                method_query.id, method_query.version, enautilus_choice(user_response)
+            )
+
+        if speculated is not None:
+            method, new_request = speculated
+        else:
+            token = CancelToken(data.get("deadline"))
+            budget = iteration_budget(method_query, data.get("budget"))
+            with running_iterations.register(method_query.id, token):
+                token.check()
+                try:
+                    new_request = call_method(
+                        method,
+                        *call,
+                        observer=combine_observers(observer, progress_streams.observer(method_query.id)),
+                        front_size=progress_streams.front_size(method_query.id),
+                        token=token,
+                        checkpoint=checkpoint,
+                        budget=budget,
+                        objective_index=method_objective_index(method_query),
+                    )
+                except MethodProcessError:
+                    # the worker process died, its checkpoint is kept for resuming
+                    raise
+                except Exception:
+                    if checkpoint is not None:
+                        checkpoint.remove()
+                    raise
+
+            if checkpoint is not None:
+                checkpoint.remove()
+
+        if steps is not None:
+            step_requests = new_request
+            new_request = step_requests[-1]
+        else:
+            step_requests = [new_request]
 
-        # we dump the response first so that we can have it encoded into valid JSON using a custom encoder
-        # ignore_nan=True will ensure np.nan is coverted to valid JSON value 'null'.
-        if type(method).__name__ in [RVEA.__name__, IOPIS_NSGAIII.__name__]: # EA methods handle a bit differently, multiple requests to be handled
-            """contents = [
+        if isinstance(
+            new_request, tuple
+        ):  # For methods that return mutliple object from an iterate call (e.g., NIMBUS (for now) and EA methods)
+            new_request = new_request[0]
+
+        step_requests = [
+            request for request in step_requests if type(request).__name__ == NautilusNavigatorRequest.__name__
+        ]
+        if step_requests:
+            save_navigator_states(method_query.id, method, step_requests)
+
+        method_query.method_pickle = method
+        method_query.last_request = new_request
+        version = commit_method(method_query)
+
+        choices = enautilus_choices(new_request) if method_query.name == "enautilus" else {}
+        if choices and current_app.config.get("SPECULATE_ENAUTILUS", False):
+            # the method is not used by this request anymore, so it can be copied in the background
+            speculative_iterations.speculate(
+                method_query.id,
+                version,
+                method,
+                new_request,
+                choices,
+                budget=iteration_budget(method_query),
+                objective_index=method_objective_index(method_query),
+            )
+    except StaleDataError as e:
+        print(f"DEBUG: {e}")
+        # iterated by another request at the same time, the other iteration is kept
+        return conflict_response(method_query.id)
+    except IterationCancelled as e:
+        print(f"DEBUG: {e}")
+        # stopped, nothing is committed so the method is left as it was
+        return cancelled_response(method_query.id, e.reason)
+    except Exception as e:
+        print(f"DEBUG: {e}")
+        # error, could not iterate, internal server error
+        if isinstance(last_request, tuple):
+            last_request_dump = [
                 json.dumps(r.content, cls=NumpyEncoder, ignore_nan=True)
-                for r in new_request
+                for r in last_request
             ]
-            response = json.dumps(contents, cls=NumpyEncoder, ignore_nan=True)"""
-            ea_individuals = json.dumps(
-                method.population.individuals, cls=NumpyEncoder, ignore_nan=True
-            )
-            ea_objectives = json.dumps(
-                method.population.objectives, cls=NumpyEncoder, ignore_nan=True
+        else:
+            last_request_dump = json.dumps(
+                last_request.content, cls=NumpyEncoder, ignore_nan=True
             )
+        return {
+            "message": "Could not iterate the method with the given response",
+            "last_request": last_request_dump,
+        }, 400
+
+    # we dump the response first so that we can have it encoded into valid JSON using a custom encoder
+    # ignore_nan=True will ensure np.nan is coverted to valid JSON value 'null'.
+    # EA methods handle a bit differently, multiple requests to be handled
+    if type(method).__name__ in [RVEA.__name__, IOPIS_NSGAIII.__name__, IslandModel.__name__]:
+        """contents = [
+            json.dumps(r.content, cls=NumpyEncoder, ignore_nan=True)
+            for r in new_request
+        ]
+        response = json.dumps(contents, cls=NumpyEncoder, ignore_nan=True)"""
+        ea_individuals = json.dumps(
+            method.population.individuals, cls=NumpyEncoder, ignore_nan=True
+        )
+        ea_objectives = json.dumps(
+            method.population.objectives, cls=NumpyEncoder, ignore_nan=True
+        )
+
+        ideal = json.dumps(
+            method.population.problem.ideal, cls=NumpyEncoder, ignore_nan=True
+        )
+        nadir = json.dumps(
+            method.population.problem.nadir, cls=NumpyEncoder, ignore_nan=True
+        )
 
-            ideal = json.dumps(
-                method.population.problem.ideal, cls=NumpyEncoder, ignore_nan=True
-            )
-            nadir = json.dumps(
-                method.population.problem.nadir, cls=NumpyEncoder, ignore_nan=True
+        # ok
+        # We will deserialize the response into a Python dict here because flask-restx will automatically
+        # serialize the response into valid JSON.
+        return {
+            "response": 0,
+            "preference_type": -1,
+            "individuals": json.loads(ea_individuals),
+            "objectives": json.loads(ea_objectives),
+            "ideal": json.loads(ideal),
+            "nadir": json.loads(nadir),
+            "version": version,
+        }, 200
+    else:
+        response = json.dumps(
+            new_request.content, cls=NumpyEncoder, ignore_nan=True
+        )
+
+        if steps is not None:
+            # the states of the steps navigated, e.g., to be animated by the client
+            response_steps = json.dumps(
+                [step_summary(request) for request in step_requests], cls=NumpyEncoder, ignore_nan=True
             )
 
             # ok
-            # We will deserialize the response into a Python dict here because flask-restx will automatically
-            # serialize the response into valid JSON.
-            return {
-                "response": 0,
-                "preference_type": -1,
-                "individuals": json.loads(ea_individuals),
-                "objectives": json.loads(ea_objectives),
-                "ideal": json.loads(ideal),
-                "nadir": json.loads(nadir),
-            }, 200
+            return {"response": json.loads(response), "steps": json.loads(response_steps), "version": version}, 200
+
+        # ok
+        # We will deserialize the response into a Python dict here because flask-restx will automatically
+        # serialize the response into valid JSON.
+        return {"response": json.loads(response), "version": version}, 200
+
+
+def run_iteration_job(job, observer):
+    """Iterate the method session of a job with the request of the job, see `utilities.jobs.run_job`.
+
+    Args:
+        job (Job): The job.
+        observer (Callable): Called with the progress of the iteration.
+
+    Returns:
+        (tuple): The response of POST /method/control and its HTTP status code.
+    """
+    method_query = db.session.get(Method, job.method_id)
+
+    if method_query is None:
+        # not found
+        return {"message": f"Could not find method with id={job.method_id}."}, 404
+
+    with session_lock(method_query):
+        return iterate_method(method_query, job.request, observer)
+
+
+def find_user_job(job_id):
+    """Find a job on a method session of the current user.
+
+    Args:
+        job_id (int): The id of the job.
+
+    Returns:
+        Job: The job, or None if not found.
+    """
+    owner = find_user_owner()
+
+    if owner is None:
+        return None
+
+    return Job.query.join(Method, Job.method_id == Method.id).filter(Job.id == job_id).filter_by(**owner).first()
+
+
+class MethodCancel(Resource):
+    @jwt_required()
+    @role_required(USER_ROLE, GUEST_ROLE)
+    def post(self):
+        """Cancel the running iteration and the queued jobs of a method session, or a single job.
+
+        Returns:
+            (tuple): tuple containing:
+                (dict): The ids of the cancelled jobs and whether a running iteration was cancelled.
+                (int): HTTP status code: 200 if something was cancelled.
+        """
+        data = method_cancel_parser.parse_args()
+
+        try:
+            if data["job_id"] is not None:
+                job = find_user_job(data["job_id"])
+                method_query = find_user_method(job.method_id) if job is not None else None
+            else:
+                method_query = find_user_method(data["method_id"])
+        except Exception as e:
+            print(f"DEBUG: {e}")
+            # not found
+            return {"message": f"Could not find user {get_jwt_identity()}."}, 404
+
+        if method_query is None:
+            # not found
+            return {"message": "No defined method or job found for the current user."}, 404
+
+        method_id = method_query.id
+        cancelled_jobs = cancel_queued_jobs(method_id, data["job_id"])
+
+        # a running job is cancelled by cancelling its iteration, in this process or by the heartbeat of its worker
+        requested_jobs = request_job_cancellation(method_id, data["job_id"])
+        running = data["job_id"] is None or bool(requested_jobs)
+
+        # the iteration stops at its next check, and responds to its own request
+        running_cancelled = (running and running_iterations.cancel(method_id)) or bool(requested_jobs)
+
+        if not cancelled_jobs and not running_cancelled:
+            # not found
+            return {"message": "No running iteration or queued job found for the method."}, 404
+
+        # ok
+        return {
+            "message": "Cancelled.",
+            "method_id": method_id,
+            "cancelled_jobs": cancelled_jobs,
+            "running_cancelled": running_cancelled,
+        }, 200
+
+
+class MethodJob(Resource):
+    @jwt_required()
+    @role_required(USER_ROLE, GUEST_ROLE)
+    def get(self):
+        """Get the status and progress of a job created by POST /method/control.
+
+        Returns:
+            (tuple): tuple containing:
+                (dict): The status and progress of the job, or a message explaining why it was not found.
+                (int): HTTP status code.
+        """
+        data = method_job_parser.parse_args()
+
+        try:
+            job = find_user_job(data["job_id"])
+        except Exception as e:
+            print(f"DEBUG: {e}")
+            # not found
+            return {"message": f"Could not find user {get_jwt_identity()}."}, 404
+
+        if job is None:
+            # not found
+            return {"message": f"Could not find job with id={data['job_id']}."}, 404
+
+        # ok
+        return {
+            "job_id": job.id,
+            "method_id": job.method_id,
+            "status": job.status,
+            "progress": {"generation": job.generation, "evaluations": job.evaluations},
+            "created": str(job.created),
+            "started": str(job.started) if job.started is not None else None,
+            "finished": str(job.finished) if job.finished is not None else None,
+        }, 200
+
+
+class MethodJobResult(Resource):
+    @jwt_required()
+    @role_required(USER_ROLE, GUEST_ROLE)
+    def get(self):
+        """Get the result of a job created by POST /method/control.
+
+        Returns:
+            (tuple): tuple containing:
+                (dict): The response of POST /method/control the job was run for, or the status of the job if it has
+                    not finished.
+                (int): HTTP status code: the code of the response if finished, 202 if not.
+        """
+        data = method_job_parser.parse_args()
+
+        try:
+            job = find_user_job(data["job_id"])
+        except Exception as e:
+            print(f"DEBUG: {e}")
+            # not found
+            return {"message": f"Could not find user {get_jwt_identity()}."}, 404
+
+        if job is None:
+            # not found
+            return {"message": f"Could not find job with id={data['job_id']}."}, 404
+
+        if job.status not in ["FINISHED", "FAILED", "CANCELLED"]:
+            # accepted, but not done yet
+            return {"message": "The job has not finished.", "job_id": job.id, "status": job.status}, 202
+
+        message, code = job.result
+
+        return {**message, "job_id": job.id}, code
+
+
+class MethodProgress(Resource):
+    @jwt_required()
+    @role_required(USER_ROLE, GUEST_ROLE)
+    def get(self):
+        """Stream the progress of the next iteration of a method session as server-sent events.
+
+        Returns:
+            Response: The events streamed as text/event-stream until the iteration has finished.
+        """
+        data = method_progress_parser.parse_args()
+
+        try:
+            method_query = find_user_method(data["method_id"])
+        except Exception as e:
+            print(f"DEBUG: {e}")
+            # not found
+            return {"message": f"Could not find user {get_jwt_identity()}."}, 404
+
+        if method_query is None:
+            # not found
+            return {"message": "No defined method found for the current user."}, 404
+
+        method_id = method_query.id
+        keepalive = current_app.config.get("PROGRESS_KEEPALIVE", 15)
+
+        # subscribe before responding, so that no progress is missed between the response and the first read
+        listener = progress_streams.subscribe(method_id, max(data["front_size"], 0))
+
+        # the stream is the response iterable itself, so that it can be waited on asynchronously when served by
+        # utilities.asgi, and it unsubscribes the listener when closed by the server
+        stream = EventStream(listener, keepalive, on_close=lambda: progress_streams.unsubscribe(method_id, listener))
+
+        response = Response(
+            stream,
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            direct_passthrough=True,
+        )
+
+        return response
+
+
+class MethodExport(Resource):
+    @jwt_required()
+    @role_required(USER_ROLE, GUEST_ROLE)
+    def get(self):
+        """Export a method session as a snapshot, which can be imported on another instance using /method/import.
+
+        Returns:
+            Response: The snapshot streamed as application/octet-stream, see utilities.snapshots.
+        """
+        data = method_session_parser.parse_args()
+        key = current_app.config.get("SNAPSHOT_KEY")
+
+        if not key:
+            return {"message": SNAPSHOTS_DISABLED}, 503
+
+        try:
+            method_query = find_user_method(data["method_id"])
+        except Exception as e:
+            print(f"DEBUG: {e}")
+            # not found
+            return {"message": f"Could not find user {get_jwt_identity()}."}, 404
+
+        if method_query is None:
+            # not found
+            return {"message": "No defined method found for the current user."}, 404
+
+        # read the session consistently, the snapshot itself is written after the lock is released
+        with session_lock(method_query):
+            problem = find_user_problem(method_query.problem_id) if method_query.problem_id is not None else None
+            header = {
+                "name": method_query.name,
+                "status": method_query.status,
+                "minimize": method_query.minimize,
+                "problem_id": method_query.problem_id,
+                "problem_name": problem.name if problem is not None else None,
+                "version": method_query.version,
+                "budget": method_query.budget,
+            }
+            method = method_query.method_pickle
+            last_request = method_query.last_request
+            history = [
+                {"step_number": navigator_state.step_number, "state": navigator_state.state}
+                for navigator_state in NavigatorState.query.filter_by(method_id=method_query.id).order_by(
+                    NavigatorState.step_number
+                )
+            ]
+            method_id = method_query.id
+
+        return Response(
+            write_snapshot(header, method, last_request, history, key),
+            mimetype="application/octet-stream",
+            headers={"Content-Disposition": f"attachment; filename=method_{method_id}.snapshot"},
+        )
+
+
+class MethodImport(Resource):
+    @jwt_required()
+    @role_required(USER_ROLE, GUEST_ROLE)
+    def post(self):
+        """Import a method session from a snapshot exported by /method/export as a new session of the current user.
+
+        The snapshot is read from the body of the request as it is received.
+
+        Returns:
+            (tuple): tuple containing:
+                (dict): The name, id, and status of the new method session, or a message explaining the failure.
+                (int): HTTP status code: 201 if imported.
+        """
+        data = method_import_parser.parse_args()
+        key = current_app.config.get("SNAPSHOT_KEY")
+
+        if not key:
+            return {"message": SNAPSHOTS_DISABLED}, 503
+
+        try:
+            owner = find_user_owner()
+        except Exception as e:
+            print(f"DEBUG: {e}")
+            # not found
+            return {"message": f"Could not find user {get_jwt_identity()}."}, 404
+
+        try:
+            header, method, last_request, history = read_snapshot(request.stream, key)
+        except SnapshotError as e:
+            print(f"DEBUG: {e}")
+            return {"message": f"Could not import the method snapshot: {e}"}, 400
+
+        if not isinstance(header, dict) or header.get("name") not in available_methods:
+            return {"message": "Could not import the method snapshot: unknown method."}, 400
+
+        if header.get("status") not in method_statuses:
+            return {"message": f"Could not import the method snapshot: invalid status {header.get('status')}."}, 400
+
+        if data["problem_id"] is not None:
+            problem = find_user_problem(data["problem_id"])
+
+            if problem is None:
+                # not found
+                return {"message": f"Could not find problem with id={data['problem_id']}."}, 404
+        elif header["problem_id"] is not None:
+            # the ids are not the same on different instances, the name must match as well
+            problem = find_user_problem(header["problem_id"])
+
+            if problem is not None and problem.name != header["problem_name"]:
+                problem = None
         else:
-            response = json.dumps(
-                new_request.content, cls=NumpyEncoder, ignore_nan=True
+            problem = None
+
+        method_query = Method(
+            name=header["name"],
+            method_pickle=method,
+            minimize=header["minimize"],
+            problem_id=problem.id if problem is not None else None,
+            status=header["status"],
+            last_request=last_request,
+            # snapshots exported before budgets were kept have none
+            budget=header.get("budget"),
+            **owner,
+        )
+        db.session.add(method_query)
+        # flush to get the id of the new session
+        db.session.flush()
+
+        for state in history:
+            db.session.add(
+                NavigatorState(method_id=method_query.id, step_number=state["step_number"], state=state["state"])
             )
 
-            # ok
-            # We will deserialize the response into a Python dict here because flask-restx will automatically
-            # serialize the response into valid JSON.
-            return {"response": json.loads(response)}, 200
+        response = {
+            "method": method_query.name,
+            "owner": get_jwt_identity(),
+            "method_id": method_query.id,
+            "status": method_query.status,
+        }
+        db.session.commit()
+        evict_methods(owner, current_app.config.get("METHOD_SESSION_LIMIT"))
+
+        # created
+        return response, 201
+
+
+def start_method(method):
+    """Start a method.
+
+    Args:
+        method: The method, modified in place.
+
+    Returns:
+        (tuple): tuple containing:
+            (tuple): The response of GET /method/control and its HTTP status code.
+            The first request of the method.
+    """
+    # EA methods handle a bit differently, multiple requests to be handled
+    if type(method).__name__ in [RVEA.__name__, IslandModel.__name__]:
+        return_message, request = EAControlGet(method)
+    elif isinstance(method, IOPIS_NSGAIII):
+        return_message, request = IOPISControlGet(method)
+    else:
+        # start the method and set response
+        request = call_method(method, "start")  # None if method is non interactive
+        if isinstance(request, tuple):
+            # needed when multiple requests are returned as separate objects. This is needed in, e.g., NIMBUS and EA methods.
+            request = request[0]
+
+        # We dump the data here temporarily because the data must be encoded using a custom encoder to be first parsed
+        # into valid JSON, then we load it again before returning.
+        # ignore_nan will result in np.nan to be converted to valid null in JSON
+
+        response = json.dumps(request.content, cls=NumpyEncoder, ignore_nan=True)
+        return_message = {"response": json.loads(response)}, 200
+
+    return return_message, request
+
+
+def save_navigator_state(method_id, method, request):
+    """Add the state of NAUTILUS Navigator in a request to the history of the method.
+
+    Any states at or after the step of the request are discarded, since they belong to a navigation that was gone back
+    from. The ideal and nadir points are not stored, as they do not change during the navigation, and the indices of
+    the reachable solutions are stored as a bit mask over the Pareto front. The session is not committed.
+
+    Args:
+        method_id (int): The id of the method in the database.
+        method (NautilusNavigator): The method that returned the request.
+        request (NautilusNavigatorRequest): The request with the state.
+    """
+    save_navigator_states(method_id, method, [request])
+
+
+def save_navigator_states(method_id, method, requests):
+    """Add the states of NAUTILUS Navigator in the requests of consecutive steps to the history of the method, see
+    `save_navigator_state`. Of the requests of the same step, the last one is kept.
+
+    Args:
+        method_id (int): The id of the method in the database.
+        method (NautilusNavigator): The method that returned the requests.
+        requests (list): The requests with the states, in the order returned.
+    """
+    states = {}
+
+    for request in requests:
+        content = request.content
+
+        reachable = np.zeros(method._pareto_front.shape[0], dtype=bool)
+        reachable[np.atleast_1d(content["reachable_idx"])] = True
+
+        states[content["step_number"]] = {
+            "reachable_lb": content["reachable_lb"],
+            "reachable_ub": content["reachable_ub"],
+            "user_bounds": content["user_bounds"],
+            "reachable_mask": np.packbits(reachable),
+            "steps_remaining": content["steps_remaining"],
+            "distance": content["distance"],
+            "allowed_speeds": content["allowed_speeds"],
+            "current_speed": content["current_speed"],
+            "navigation_point": content["navigation_point"],
+        }
+
+    # the deleted states may be in the session, e.g., the state gone back to, and their ids reused by the new ones
+    NavigatorState.query.filter(
+        NavigatorState.method_id == method_id, NavigatorState.step_number >= min(states)
+    ).delete(synchronize_session="fetch")
+    db.session.add_all(
+        NavigatorState(method_id=method_id, step_number=step_number, state=state)
+        for step_number, state in states.items()
+    )
+
+
+def load_navigator_request(method, navigator_state):
+    """Rebuild the request of NAUTILUS Navigator at a step stored by `save_navigator_state`.
+
+    Args:
+        method (NautilusNavigator): The method the state belongs to.
+        navigator_state (NavigatorState): The stored state.
+
+    Returns:
+        NautilusNavigatorRequest: The request as it was at the step.
+    """
+    state = navigator_state.state
+    reachable = np.unpackbits(state["reachable_mask"], count=method._pareto_front.shape[0]).astype(bool)
+
+    return NautilusNavigatorRequest(
+        method._ideal,
+        method._nadir,
+        state["reachable_lb"],
+        state["reachable_ub"],
+        state["user_bounds"],
+        np.flatnonzero(reachable),
+        navigator_state.step_number,
+        state["steps_remaining"],
+        state["distance"],
+        state["allowed_speeds"],
+        state["current_speed"],
+        state["navigation_point"],
+    )
 
 
 def EAControlGet(method):
     if type(method.population.problem).__name__ ==  IOPISProblem.__name__:
         method.set_interaction_type('Reference point')
-        request = method.start()[0]
+        request = call_method(method, "start")[0]
         """contents = [json.dumps(r, cls=NumpyEncoder, ignore_nan=True) for r in request]"""
     else:
         method.set_interaction_type('Reference point')
-        request = method.start()[0]
+        request = call_method(method, "start")[0]
         """contents = [
             json.dumps(r.content, cls=NumpyEncoder, ignore_nan=True) for r in request
         ]"""
@@ -495,7 +1682,7 @@ def EAControlGet(method):
 
 
 def IOPISControlGet(method):
-    request = method.start()
+    request = call_method(method, "start")
     """contents = [
         json.dumps(r.content, cls=NumpyEncoder, ignore_nan=True) for r in request
     ]
@@ -15,7 +15,9 @@ from flask_jwt_extended import get_jwt_identity, jwt_required, get_jwt
 from flask_restx import Resource, reqparse
 from models.problem_models import Problem, GuestProblem
 from models.user_models import UserModel, GuestUserModel, role_required, USER_ROLE, GUEST_ROLE
+from utilities.admission import admission_required
 from utilities.expression_parser import numpify_expressions
+from utilities.objective_index import index_problem, index_settings
 
 # The vailable problem types
 available_problem_types = ["Analytical", "Discrete", "Classification PIS", "Test problem"]
@@ -359,6 +361,7 @@ class ProblemCreation(Resource):
 
     @jwt_required()
     @role_required(USER_ROLE)
+    @admission_required
     def post(self):
         """Specify and add a problem to the DB.
 
@@ -643,6 +646,8 @@ class ProblemCreation(Resource):
             problem = DiscreteDataProblem(
                 df, variable_names, objective_names, ideal, nadir
             )
+            # stored with the problem, see utilities.objective_index
+            index_problem(problem, index_settings())
 
             # Add to DB for current user
             current_user = get_jwt_identity()
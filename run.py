@@ -1,4 +1,31 @@
+import argparse
+
 from app import app
 
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the development server of the app.")
+    parser.add_argument(
+        "--asgi",
+        action="store_true",
+        help="Serve the app with uvicorn through asgi.py instead of the WSGI development server.",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="The host to listen on.")
+    parser.add_argument("--port", type=int, default=5000, help="The port to listen on.")
+    args = parser.parse_args()
+
+    if not args.asgi:
+        app.run(host=args.host, port=args.port, debug=True)
+        return
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("Serving the app with ASGI requires uvicorn, install it with 'pip install uvicorn'.")
+        return
+
+    uvicorn.run("asgi:application", host=args.host, port=args.port)
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
+    main()
@@ -0,0 +1,46 @@
+import threading
+import time
+import unittest
+
+import pytest
+from utilities.admission import AdmissionLimits, AdmissionRejected, FairScheduler
+
+
+@pytest.mark.method
+class TestFairScheduler(unittest.TestCase):
+    def test_turns(self):
+        # the waiting users are served in turns, and not in the order their requests arrived
+        fair = FairScheduler()
+        limits = AdmissionLimits(capacity=1, user_limits={}, user_queue_size=4, timeout=10)
+        served = []
+
+        def serve(user):
+            with fair.admit(user, "user", limits):
+                served.append(user)
+
+        with fair.admit("busy", "user", limits):
+            threads = []
+            for user in ["a", "a", "a", "b"]:
+                threads.append(threading.Thread(target=serve, args=(user,)))
+                threads[-1].start()
+                # the requests are queued in order
+                while fair._n_waiting < len(threads):
+                    time.sleep(0.01)
+
+        for thread in threads:
+            thread.join()
+
+        assert served == ["a", "b", "a", "a"]
+        assert fair.in_flight() == 0
+
+    def test_timeout(self):
+        # a request waiting too long is rejected
+        fair = FairScheduler()
+        limits = AdmissionLimits(capacity=1, user_limits={}, timeout=0.1)
+
+        with fair.admit("busy", "user", limits):
+            with pytest.raises(AdmissionRejected):
+                with fair.admit("a", "user", limits):
+                    pass
+
+        assert fair.in_flight() == 0
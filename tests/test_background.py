@@ -0,0 +1,51 @@
+import time
+import unittest
+from concurrent.futures import Future
+
+from utilities.background import PendingResults
+
+
+def future_with(result) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class TestPendingResults(unittest.TestCase):
+    def test_max_size(self):
+        pending = PendingResults(max_size=2)
+        queued = Future()
+
+        pending.put(1, (queued, "method"))
+        pending.put(2, future_with(2))
+        pending.put(3, {0: future_with(3)})
+
+        # the oldest is dropped and its work cancelled
+        assert 1 not in pending
+        assert queued.cancelled()
+        assert len(pending) == 2
+        assert pending.pop(2).result() == 2
+        assert pending.pop(2) is None
+
+    def test_ttl(self):
+        pending = PendingResults(ttl=0.1)
+        queued = Future()
+
+        pending.put(1, queued)
+        pending.put(2, future_with(2))
+        time.sleep(0.15)
+        pending.put(3, future_with(3))
+
+        # the results older than the ttl are dropped and their work cancelled
+        assert pending.pop(1) is None
+        assert queued.cancelled()
+        assert 2 not in pending
+        assert pending.pop(3).result() == 3
+
+        # replacing a result renews it
+        pending.put(4, future_with(4))
+        time.sleep(0.06)
+        pending.put(4, future_with(5))
+        time.sleep(0.06)
+
+        assert pending.pop(4).result() == 5
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import pytest
+from utilities.checkpoints import Checkpoint, resume_iteration
+from utilities.method_processes import call_method
+
+
+class GenerationCounter:
+    """Iterates in generations like the EAs of desdeo_emo, counting them."""
+
+    def __init__(self, n_gen_per_iter=5, crash_at=None):
+        self.n_gen_per_iter = n_gen_per_iter
+        self.crash_at = crash_at
+        self._gen_count_in_curr_iteration = 0
+        self._current_gen_count = 0
+        self._function_evaluation_count = 0
+        self._iteration_counter = 0
+
+    def continue_iteration(self):
+        return self._gen_count_in_curr_iteration < self.n_gen_per_iter
+
+    def iterate(self, preference=None):
+        self._gen_count_in_curr_iteration = 0
+        while self.continue_iteration():
+            self._next_gen()
+        self._iteration_counter += 1
+        self.post_iteration()
+        return self.requests()
+
+    def _next_gen(self):
+        if self._current_gen_count == self.crash_at:
+            raise RuntimeError("The process died.")
+        self._current_gen_count += 1
+        self._gen_count_in_curr_iteration += 1
+        self._function_evaluation_count += 10
+
+    def post_iteration(self):
+        pass
+
+    def requests(self):
+        return (self._current_gen_count,)
+
+
+@pytest.mark.method
+class TestCheckpoints(unittest.TestCase):
+    def test_resume(self):
+        path = os.path.join(tempfile.mkdtemp(), "method_1.checkpoint")
+        checkpoint = Checkpoint(path, 0, {"method_id": 1, "version": 1})
+
+        # the iteration is interrupted before its fourth generation
+        method = GenerationCounter(crash_at=3)
+
+        with pytest.raises(RuntimeError):
+            call_method(method, "iterate", None, checkpoint=checkpoint)
+
+        resumed, progress = checkpoint.read()
+
+        assert progress["generation"] == 3
+        assert resumed._current_gen_count == 3
+        assert "continue_iteration" not in resumed.__dict__
+
+        # the iteration continues from the checkpoint, as if it was never interrupted
+        resumed.crash_at = None
+
+        assert call_method(resumed, resume_iteration) == (5,)
+        assert resumed._iteration_counter == 1
+        assert resumed._function_evaluation_count == 50
+
+        # a checkpoint is not resumed by another iteration, and is removed
+        assert Checkpoint(path, 0, {"method_id": 1, "version": 2}).read() is None
+        assert not os.path.exists(path)
@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+import pytest
+from desdeo_tools.scalarization import DiscreteScalarizer
+from desdeo_tools.scalarization.ASF import PointMethodASF, ReferencePointASF, SimpleASF
+from desdeo_tools.solver import DiscreteMinimizer
+from desdeo_tools.solver.ScalarSolver import ScalarSolverException
+from utilities.discrete_solver import chunked_discrete_minimizations
+
+
+@pytest.mark.method
+class TestChunkedDiscreteMinimizations(unittest.TestCase):
+    def test_chunked_minimizations(self):
+        rng = np.random.default_rng(1)
+        objectives = rng.random((10_001, 3))
+        # ties are broken by the first row, as in DiscreteMinimizer
+        objectives[5000:5010] = objectives[3]
+        ideal, nadir = objectives.min(axis=0), objectives.max(axis=0)
+
+        def adheres(vectors):
+            return vectors[:, 0] > 0.5
+
+        asfs = [PointMethodASF(nadir, ideal), ReferencePointASF(np.array([1, 2, 0.5]), nadir, ideal), SimpleASF(1)]
+
+        for asf in asfs:
+            scalarizer = DiscreteScalarizer(asf, {"reference_point": rng.random(3)})
+
+            for constraint_evaluator in [None, adheres]:
+                expected = DiscreteMinimizer(scalarizer, constraint_evaluator).minimize(objectives)
+
+                for workers in [1, 2]:
+                    with chunked_discrete_minimizations(1000, workers):
+                        result = DiscreteMinimizer(scalarizer, constraint_evaluator).minimize(objectives)
+
+                    assert result["x"] == expected["x"]
+                    assert result["fun"] == expected["fun"]
+
+        with chunked_discrete_minimizations(1000), pytest.raises(ScalarSolverException):
+            DiscreteMinimizer(scalarizer, lambda vectors: np.zeros(len(vectors), dtype=bool)).minimize(objectives)
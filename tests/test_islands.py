@@ -0,0 +1,130 @@
+import unittest
+
+import dill
+import numpy as np
+import pytest
+from desdeo_tools.utilities import non_dominated
+from utilities.islands import IslandModel
+from utilities.iteration_hooks import observe_generations
+
+from tests.test_checkpoints import GenerationCounter
+
+
+class LineProblem:
+    """Two objectives conflicting along a line, x and 1 - x."""
+
+    def __init__(self):
+        self._max_multiplier = np.ones(2)
+        self.ideal_targets = np.full(2, np.inf)
+        self.ideal = self.ideal_targets
+
+    def evaluate(self, individuals):
+        objectives = np.hstack((individuals, 1 - individuals + individuals**2))
+        self.update_ideal(objectives, objectives)
+        return objectives
+
+    def update_ideal(self, objective_vectors, targets):
+        self.ideal_targets = np.amin(np.vstack((self.ideal_targets, targets)), axis=0)
+        self.ideal = self.ideal_targets * self._max_multiplier
+
+
+class LinePopulation:
+    def __init__(self, problem, size=10):
+        self.problem = problem
+        self.size = size
+        self.individuals = np.random.uniform(0, 1, (size, 1))
+        self.objectives = problem.evaluate(self.individuals)
+
+    def add(self, individuals):
+        self.individuals = np.vstack((self.individuals, individuals))
+        self.objectives = np.vstack((self.objectives, self.problem.evaluate(individuals)))
+
+    def keep(self, indices):
+        self.individuals = self.individuals[indices]
+        self.objectives = self.objectives[indices]
+
+    def non_dominated_objectives(self):
+        return non_dominated(self.objectives * self.problem._max_multiplier)
+
+
+class LineEA(GenerationCounter):
+    """Evolves a population in generations like the EAs of desdeo_emo."""
+
+    def __init__(self, problem, n_gen_per_iter=5):
+        super().__init__(n_gen_per_iter)
+        self.population = LinePopulation(problem)
+        self.preferences = []
+
+    def set_interaction_type(self, interaction_type):
+        return interaction_type
+
+    def start(self):
+        return self.requests()
+
+    def manage_preferences(self, preference=None):
+        self.preferences.append(preference)
+
+    def pre_iteration(self):
+        pass
+
+    def _next_gen(self):
+        individuals = self.population.individuals
+        self.population.add(np.clip(individuals + np.random.normal(0, 0.1, individuals.shape), 0, 1))
+        # the non-dominated individuals first
+        order = np.argsort(~self.population.non_dominated_objectives(), kind="stable")
+        self.population.keep(order[: self.population.size])
+        super()._next_gen()
+
+
+@pytest.mark.method
+class TestIslandModel(unittest.TestCase):
+    def test_island_model(self):
+        for processes in [1, 2]:
+            problem = LineProblem()
+            model = IslandModel(
+                [LineEA(problem, n_gen_per_iter=10) for _ in range(3)],
+                processes=processes,
+                migration_interval=4,
+                n_migrants=2,
+            )
+            model.set_interaction_type("Reference point")
+            model.start()
+
+            progress = []
+
+            def observer(generation):
+                progress.append(generation["generation"])
+
+            with observe_generations(model, observer):
+                model.iterate("preference")
+
+            # the islands iterate in steps of migration_interval generations, migrating in between
+            assert progress == [0, 4, 8]
+            assert model._iteration_counter == 1
+            assert model._gen_count_in_curr_iteration == 10
+            assert model._current_gen_count == 10
+
+            for island in model.islands:
+                assert island._iteration_counter == 1
+                assert island._current_gen_count == 10
+                assert island.preferences == ["preference"]
+                # two migrations of two migrants, evaluated on top of the generations
+                assert island._function_evaluation_count == 10 * 10 + 2 * 2
+                # the migrants compete with the rest of the population
+                assert len(island.population.individuals) == island.population.size
+
+            # the fronts of the islands are merged into one
+            assert model._function_evaluation_count == sum(
+                island._function_evaluation_count for island in model.islands
+            )
+            assert len(model.population.individuals) == len(model.population.objectives) > 0
+            assert np.all(non_dominated(model.population.objectives))
+            assert model.population.problem is model.islands[0].population.problem
+            assert model._runner is None
+
+            # pickled as a whole
+            model = dill.loads(dill.dumps(model))
+            model.iterate("preference")
+
+            assert model._current_gen_count == 20
+            assert all(island.preferences == ["preference"] * 2 for island in model.islands)
@@ -1,4 +1,12 @@
+import asyncio
+import datetime
 import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import ExitStack
+from copy import deepcopy
+from types import SimpleNamespace
 
 import numpy as np
 import numpy.testing as npt
@@ -6,11 +14,41 @@ import pytest
 import simplejson as json
 from app import app
 from database import db
+from desdeo_mcdm.interactive.NIMBUS import NIMBUS
 from desdeo_mcdm.interactive.ReferencePointMethod import ReferencePointMethod
+from desdeo_tools.scalarization.ASF import ReferencePointASF
 from flask_testing import TestCase
-from models.method_models import Method
+from models.job_models import Job
+from models.method_models import Method, NavigatorState
 from models.problem_models import Problem
 from models.user_models import UserModel
+from sqlalchemy import text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from resources.method_resources import (
+    iteration_budget,
+    method_objective_index,
+    objective_indexes,
+    pending_starts,
+    run_iteration_job,
+    speculative_iterations,
+)
+from utilities.admission import AdmissionLimits, scheduler
+from utilities.asgi import AsgiApp
+from utilities.budgets import IterationBudget
+from utilities.cancellation import CancelToken, IterationCancelled
+from utilities.jobs import JobHeartbeat, create_job, lease_job, run_next_job
+from utilities.method_processes import call_method, get_method_pool, shutdown_method_pool
+from utilities.method_templates import method_templates
+from utilities.objective_index import ObjectiveIndex
+from utilities.parallel_scalarization import parallel_scalarizations, shutdown_scalarization_pool
+from utilities.progress_streams import progress_streams
+from utilities.session_locks import get_session_lock
+from utilities.snapshots import write_snapshot
+from utilities.speculation import _iterate_copy, enautilus_choice
+
+from tests.test_checkpoints import GenerationCounter
+from tests.test_islands import LinePopulation, LineProblem
 
 
 @pytest.mark.method
@@ -36,13 +74,11 @@ class TestMethod(TestCase):
         )
         db.session.commit()
 
-        payload = json.dumps({"username": "test_user", "password": "pass"})
-        response = self.app.post(
-            "/login", headers={"Content-Type": "application/json"}, data=payload
-        )
-        data = json.loads(response.data)
-
-        access_token = data["access_token"]
+        self.access_token = self.login()
+        self.headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.access_token}",
+        }
 
         problem_def = {
             "problem_type": "Analytical",
@@ -62,10 +98,7 @@ class TestMethod(TestCase):
         payload = json.dumps(problem_def)
         response = self.app.post(
             "/problem/create",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
+            headers=self.headers,
             data=payload,
         )
 
@@ -73,10 +106,7 @@ class TestMethod(TestCase):
         payload = json.dumps(problem_def)
         response = self.app.post(
             "/problem/create",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
+            headers=self.headers,
             data=payload,
         )
 
@@ -84,10 +114,7 @@ class TestMethod(TestCase):
         payload = json.dumps(problem_def)
         response = self.app.post(
             "/problem/create",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
+            headers=self.headers,
             data=payload,
         )
 
@@ -97,6 +124,18 @@ class TestMethod(TestCase):
         db.session.remove()
         db.drop_all()
 
+    def login(self, uname="test_user", pword="pass"):
+        # login and get access token for test user
+        payload = json.dumps({"username": uname, "password": pword})
+        response = self.app.post(
+            "/login", headers={"Content-Type": "application/json"}, data=payload
+        )
+        data = json.loads(response.data)
+
+        access_token = data["access_token"]
+
+        return access_token
+
     def testCreateModelManually(self):
         # fetch problem
         problem_pickle = Problem.query.filter_by(name="setup_test_problem_1").first()
@@ -189,14 +228,22 @@ class TestMethod(TestCase):
 
         # created
         assert response.status_code == 201
+        assert json.loads(response.data)["method_id"] == 2
 
-        # one method should still only exist
-        assert len(Method.query.filter_by(user_id=1).all()) == 1
-        assert (
-            Method.query.filter_by(user_id=1).first().name
-            == "reference_point_method_alt"
+        # the first method is kept as a separate session
+        assert len(Method.query.filter_by(user_id=1).all()) == 2
+        assert Method.query.filter_by(id=1).first().name == "reference_point_method"
+        assert Method.query.filter_by(id=2).first().name == "reference_point_method_alt"
+
+        response = self.app.get(
+            "/method/create",
+            headers={"Authorization": f"Bearer {access_token}"},
         )
 
+        # newest first
+        assert response.status_code == 200
+        assert [m["method_id"] for m in json.loads(response.data)["methods"]] == [2, 1]
+
     def testMethodControlGet(self):
         payload = json.dumps({"username": "test_user", "password": "pass"})
         response = self.app.post(
@@ -320,125 +367,1130 @@ class TestMethod(TestCase):
             data=payload,
         )
 
-        assert response.status_code == 200
+        assert response.status_code == 200
+
+        response = {"response": {"indices": [], "number_of_desired_solutions": 0}}
+        payload = json.dumps(response)
+
+        response = self.app.post(
+            "/method/control",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {access_token}",
+            },
+            data=payload,
+        )
+
+        assert response.status_code == 200
+
+        response = {"response": {"index": 0, "continue": True}}
+        payload = json.dumps(response)
+
+        response = self.app.post(
+            "/method/control",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {access_token}",
+            },
+            data=payload,
+        )
+
+        assert response.status_code == 200
+
+        response = {
+            "response": {
+                "classifications": ["<", "0", ">="],
+                "levels": [-35.0, 8.0, -30.0],
+                "number_of_solutions": 4,
+            }
+        }
+        payload = json.dumps(response)
+
+        response = self.app.post(
+            "/method/control",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {access_token}",
+            },
+            data=payload,
+        )
+
+        assert response.status_code == 200
+
+        response = {"response": {"indices": [0, 1, 2, 3]}}
+        payload = json.dumps(response)
+
+        response = self.app.post(
+            "/method/control",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {access_token}",
+            },
+            data=payload,
+        )
+
+        assert response.status_code == 200
+
+        response = {"response": {"indices": [0, 3], "number_of_desired_solutions": 5}}
+        payload = json.dumps(response)
+
+        response = self.app.post(
+            "/method/control",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {access_token}",
+            },
+            data=payload,
+        )
+
+        assert response.status_code == 200
+
+        response = {"response": {"indices": []}}
+        payload = json.dumps(response)
+
+        response = self.app.post(
+            "/method/control",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {access_token}",
+            },
+            data=payload,
+        )
+
+        assert response.status_code == 200
+
+        response = {"response": {"indices": [], "number_of_desired_solutions": 0}}
+        payload = json.dumps(response)
+
+        response = self.app.post(
+            "/method/control",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {access_token}",
+            },
+            data=payload,
+        )
+
+        response = {"response": {"index": 0, "continue": False}}
+        payload = json.dumps(response)
+
+        response = self.app.post(
+            "/method/control",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {access_token}",
+            },
+            data=payload,
+        )
+
+        assert response.status_code == 200
+
+        print(json.loads(response.data))
+
+    def testMultipleSessions(self):
+        # create two sessions side by side
+        method_ids = {}
+        for method_name in ["synchronous_nimbus", "reference_point_method"]:
+            payload = json.dumps({"problem_id": 1, "method": method_name})
+            response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+            assert response.status_code == 201
+            method_ids[method_name] = json.loads(response.data)["method_id"]
+
+        # start both sessions by their ids
+        for method_id in method_ids.values():
+            response = self.app.get(
+                f"/method/control?method_id={method_id}",
+                headers={"Authorization": f"Bearer {self.access_token}"},
+            )
+
+            assert response.status_code == 200
+
+        # iterate NIMBUS, even if it is not the latest session
+        payload = json.dumps(
+            {
+                "response": {
+                    "classifications": ["=", "0", "<"],
+                    "levels": [0, 0, 0],
+                    "number_of_solutions": 1,
+                },
+                "method_id": method_ids["synchronous_nimbus"],
+            }
+        )
+        response = self.app.post("/method/control", headers=self.headers, data=payload)
+
+        assert response.status_code == 200
+
+        # both sessions are kept and have their own state
+        nimbus_query = Method.query.filter_by(id=method_ids["synchronous_nimbus"]).first()
+        rpm_query = Method.query.filter_by(id=method_ids["reference_point_method"]).first()
+
+        assert nimbus_query.status == "ITERATING"
+        assert rpm_query.status == "ITERATING"
+        assert type(nimbus_query.last_request).__name__ != type(rpm_query.last_request).__name__
+
+        # sessions of other users are not found
+        sad_token = self.login("sad_user")
+
+        response = self.app.get(
+            f"/method/control?method_id={method_ids['synchronous_nimbus']}",
+            headers={"Authorization": f"Bearer {sad_token}"},
+        )
+
+        assert response.status_code == 404
+
+    def testSessionLimit(self):
+        app.config["METHOD_SESSION_LIMIT"] = 2
+
+        try:
+            method_ids = []
+            for _ in range(3):
+                payload = json.dumps({"problem_id": 1, "method": "reference_point_method"})
+                response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+                assert response.status_code == 201
+                method_ids.append(json.loads(response.data)["method_id"])
+
+            # the oldest session is deleted when the third one is created
+            assert Method.query.filter_by(id=method_ids[0]).first() is None
+            assert Method.query.filter_by(id=method_ids[1]).first() is not None
+
+            # the history and the finished jobs of a session are deleted with it, a session with a queued job is kept
+            db.session.add(NavigatorState(method_id=method_ids[1], step_number=1, state={}))
+            finished = create_job(method_ids[1], {})
+            finished.status = "FINISHED"
+            queued = create_job(method_ids[2], {})
+            db.session.commit()
+            finished_id, queued_id = finished.id, queued.id
+
+            for _ in range(2):
+                payload = json.dumps({"problem_id": 1, "method": "reference_point_method"})
+                response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+                assert response.status_code == 201
+
+            assert Method.query.filter_by(id=method_ids[1]).first() is None
+            assert NavigatorState.query.filter_by(method_id=method_ids[1]).first() is None
+            assert db.session.get(Job, finished_id) is None
+            assert Method.query.filter_by(id=method_ids[2]).first() is not None
+            assert db.session.get(Job, queued_id) is not None
+
+            # the session is deleted once its job has finished
+            db.session.get(Job, queued_id).status = "FINISHED"
+            db.session.commit()
+            payload = json.dumps({"problem_id": 1, "method": "reference_point_method"})
+            response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+            assert response.status_code == 201
+            assert Method.query.filter_by(id=method_ids[2]).first() is None
+            assert Method.query.filter_by(user_id=1).count() == 2
+        finally:
+            app.config["METHOD_SESSION_LIMIT"] = 16
+
+    def testVersionConflict(self):
+        payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus"})
+        response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+        assert response.status_code == 201
+
+        response = self.app.get(
+            "/method/control",
+            headers={"Authorization": f"Bearer {self.access_token}"},
+        )
+
+        assert response.status_code == 200
+
+        version = json.loads(response.data)["version"]
+        preferences = {
+            "classifications": ["=", "0", "<"],
+            "levels": [0, 0, 0],
+            "number_of_solutions": 1,
+        }
+        payload = json.dumps({"response": preferences, "version": version})
+
+        response = self.app.post("/method/control", headers=self.headers, data=payload)
+
+        assert response.status_code == 200
+        assert json.loads(response.data)["version"] == version + 1
+
+        # the same response sent again, e.g., a double-click, is rejected
+        response = self.app.post("/method/control", headers=self.headers, data=payload)
+
+        assert response.status_code == 409
+        assert json.loads(response.data)["version"] == version + 1
+        assert Method.query.filter_by(id=1).first().version == version + 1
+
+    def testMethodTemplateCache(self):
+        method_templates.clear()
+
+        payload = json.dumps({"problem_id": 1, "method": "reference_point_method"})
+        for _ in range(2):
+            response = self.app.post("/method/create", headers=self.headers, data=payload)
+            assert response.status_code == 201
+
+        # the second method is a copy of the first one
+        assert method_templates.misses == 1
+        assert method_templates.hits == 1
+
+        # a different method for the same problem is initialized
+        payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus"})
+        response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+        assert response.status_code == 201
+        assert method_templates.misses == 2
+
+        # the copies are independent sessions
+        response = self.app.get("/method/control?method_id=1", headers=self.headers)
+
+        assert response.status_code == 200
+        assert Method.query.filter_by(id=1).first().status == "ITERATING"
+        assert Method.query.filter_by(id=2).first().status == "NOT STARTED"
+
+        response = self.app.get("/method/control?method_id=2", headers=self.headers)
+
+        assert response.status_code == 200
+
+        # the templates initialized with other settings of the app are not used
+        app.config["RVEA_ISLANDS"] = 2
+        try:
+            payload = json.dumps({"problem_id": 1, "method": "reference_point_method"})
+            response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+            assert response.status_code == 201
+            assert method_templates.misses == 3
+        finally:
+            app.config["RVEA_ISLANDS"] = 4
+
+    def testPrecomputedStart(self):
+        app.config["PRECOMPUTE_METHOD_START"] = True
+        try:
+            payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus"})
+            response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+            assert response.status_code == 201
+
+            method_id = json.loads(response.data)["method_id"]
+
+            # the method is started in the background
+            assert method_id in pending_starts
+
+            pending = pending_starts.pop(method_id)
+            started_message, _ = pending[0].result(timeout=60)
+            pending_starts.put(method_id, pending)
+
+            response = self.app.get(f"/method/control?method_id={method_id}", headers=self.headers)
+
+            # the precomputed start is used
+            assert response.status_code == 200
+            assert method_id not in pending_starts
+            assert json.loads(response.data)["response"] == started_message[0]["response"]
+
+            method_query = Method.query.filter_by(id=method_id).first()
+
+            assert method_query.status == "ITERATING"
+            assert method_query.last_request is not None
+
+            # the precomputed start can be iterated like any other
+            payload = json.dumps(
+                {
+                    "response": {
+                        "classifications": ["=", "0", "<"],
+                        "levels": [0, 0, 0],
+                        "number_of_solutions": 1,
+                    },
+                    "method_id": method_id,
+                }
+            )
+            response = self.app.post("/method/control", headers=self.headers, data=payload)
+
+            assert response.status_code == 200
+
+            # a start precomputed for another state of the session is cancelled
+            payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus"})
+            response = self.app.post("/method/create", headers=self.headers, data=payload)
+            method_id = json.loads(response.data)["method_id"]
+
+            future, method, (name, problem_id, version) = pending_starts.pop(method_id)
+            future.result(timeout=60)
+            unstarted = Future()
+            pending_starts.put(method_id, (unstarted, method, (name, problem_id, version + 1)))
+
+            response = self.app.get(f"/method/control?method_id={method_id}", headers=self.headers)
+
+            assert response.status_code == 200
+            assert unstarted.cancelled()
+        finally:
+            app.config["PRECOMPUTE_METHOD_START"] = False
+
+    def testCompareAndSwap(self):
+        problem_query = Problem.query.filter_by(id=1).first()
+        problem = problem_query.problem_pickle
+        db.session.add(
+            Method(
+                name="reference_point_method",
+                method_pickle=ReferencePointMethod(problem, problem.ideal, problem.nadir),
+                user_id=1,
+                minimize=problem_query.minimize,
+                status="NOT STARTED",
+            )
+        )
+        db.session.commit()
+
+        method_query = Method.query.filter_by(user_id=1).first()
+
+        assert method_query.version == 1
+
+        # another worker updates the method after it has been read
+        with db.engine.begin() as connection:
+            connection.execute(text("UPDATE method SET status = 'ITERATING', version = 2 WHERE id = 1"))
+
+        method_query.status = "FINISHED"
+
+        with pytest.raises(StaleDataError):
+            db.session.commit()
+
+        db.session.rollback()
+
+        # the update of the other worker is kept
+        method_query = Method.query.filter_by(user_id=1).first()
+
+        assert method_query.status == "ITERATING"
+        assert method_query.version == 2
+
+    def testAsynchronousIteration(self):
+        payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus"})
+        response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+        assert response.status_code == 201
+
+        response = self.app.get("/method/control", headers=self.headers)
+
+        assert response.status_code == 200
+
+        version = json.loads(response.data)["version"]
+        preferences = {
+            "classifications": ["=", "0", "<"],
+            "levels": [0, 0, 0],
+            "number_of_solutions": 1,
+        }
+        payload = json.dumps({"response": preferences, "version": version, "asynchronous": True})
+        response = self.app.post("/method/control", headers=self.headers, data=payload)
+
+        # the job id is returned right away
+        assert response.status_code == 202
+
+        job_id = json.loads(response.data)["job_id"]
+
+        response = self.app.get(f"/method/job?job_id={job_id}", headers=self.headers)
+
+        assert response.status_code == 200
+        assert json.loads(response.data)["status"] in ["QUEUED", "RUNNING", "FINISHED"]
+
+        for _ in range(600):
+            response = self.app.get(f"/method/job/result?job_id={job_id}", headers=self.headers)
+            if response.status_code != 202:
+                break
+            time.sleep(0.1)
+
+        # the result is the response of a synchronous iteration
+        assert response.status_code == 200
+
+        data = json.loads(response.data)
+
+        assert data["job_id"] == job_id
+        assert data["version"] == version + 1
+        assert "response" in data
+
+        response = self.app.get(f"/method/job?job_id={job_id}", headers=self.headers)
+
+        assert json.loads(response.data)["status"] == "FINISHED"
+        assert json.loads(response.data)["finished"] is not None
+
+        # the jobs of other users are not found
+        sad_token = self.login("sad_user")
+        response = self.app.get(
+            f"/method/job/result?job_id={job_id}", headers={"Authorization": f"Bearer {sad_token}"}
+        )
+
+        assert response.status_code == 404
+
+        # a failing iteration is stored as the result of the job
+        payload = json.dumps({"response": preferences, "version": version, "asynchronous": True})
+        response = self.app.post("/method/control", headers=self.headers, data=payload)
+
+        assert response.status_code == 202
+
+        job_id = json.loads(response.data)["job_id"]
+
+        for _ in range(600):
+            response = self.app.get(f"/method/job/result?job_id={job_id}", headers=self.headers)
+            if response.status_code != 202:
+                break
+            time.sleep(0.1)
+
+        assert response.status_code == 409
+
+        response = self.app.get(f"/method/job?job_id={job_id}", headers=self.headers)
+
+        assert json.loads(response.data)["status"] == "FAILED"
+
+    def testIterationDeadline(self):
+        preferences = {
+            "classifications": ["=", "0", "<"],
+            "levels": [0, 0, 0],
+            "number_of_solutions": 1,
+        }
+
+        payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus"})
+        response = self.app.post("/method/create", headers=self.headers, data=payload)
+        response = self.app.get("/method/control", headers=self.headers)
+        version = json.loads(response.data)["version"]
+
+        # past the deadline before the iteration is run
+        payload = json.dumps({"response": preferences, "timeout": 0})
+        response = self.app.post("/method/control", headers=self.headers, data=payload)
+
+        assert response.status_code == 408
+
+        data = json.loads(response.data)
+
+        assert data["reason"] == "deadline"
+        assert data["version"] == version
+
+        method_query = Method.query.filter_by(id=1).first()
+
+        assert method_query.status == "ITERATING"
+        assert type(method_query.last_request).__name__ == "NimbusClassificationRequest"
+
+        method = method_query.method_pickle
+        request = method_query.last_request
+        request.response = preferences
+
+        # the session can be iterated as if nothing happened
+        payload = json.dumps({"response": preferences, "timeout": 600, "version": version})
+        response = self.app.post("/method/control", headers=self.headers, data=payload)
+
+        assert response.status_code == 200
+
+        # the solver is interrupted at the next evaluation of the problem, in the process or in a worker process
+        for processes in [0, 1]:
+            app.config["METHOD_PROCESSES"] = processes
+            try:
+                with pytest.raises(IterationCancelled):
+                    call_method(method, "iterate", request, token=CancelToken(deadline=time.time()))
+            finally:
+                shutdown_method_pool()
+                app.config["METHOD_PROCESSES"] = 0
+
+            assert "evaluate" not in method._problem.__dict__
+
+    def testIterationBudget(self):
+        for budget in [{"population_size": 1}, {"max_evaluations": 0}, {"generations": 5}]:
+            payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus", "budget": budget})
+            response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+            assert response.status_code == 400
+
+        payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus", "budget": {"max_evaluations": 100}})
+        response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+        assert response.status_code == 201
+
+        method_id = json.loads(response.data)["method_id"]
+        response = self.app.get("/method/control", headers=self.headers)
+        payload = json.dumps({"response": {}, "budget": {"max_time_ms": "soon"}})
+        response = self.app.post("/method/control", headers=self.headers, data=payload)
+
+        assert response.status_code == 400
+
+        # the budget of the request overrides the budget of the session, which overrides the budget of the config
+        method_query = db.session.get(Method, method_id)
+
+        assert method_query.budget == {"max_evaluations": 100}
+
+        app.config["ITERATION_BUDGET"] = {"max_generations": 2, "max_time_ms": 60000}
+        try:
+            budget = iteration_budget(method_query, {"max_generations": 4})
+        finally:
+            app.config["ITERATION_BUDGET"] = None
+
+        assert budget.to_dict() == {"max_generations": 4, "max_evaluations": 100, "max_time_ms": 60000}
+
+        # the iterations stop between generations once over the budget, in the process or in a worker process
+        for processes in [0, 1]:
+            app.config["METHOD_PROCESSES"] = processes
+            try:
+                method = GenerationCounter(n_gen_per_iter=20)
+                call_method(method, "iterate", budget=IterationBudget(max_generations=3))
+
+                assert method._current_gen_count == 3
+
+                # 10 evaluations per generation, a third generation would take 30
+                call_method(method, "iterate", budget=IterationBudget(max_evaluations=25))
+
+                assert method._current_gen_count == 5
+
+                # the population does not change at all
+                method.population = LinePopulation(LineProblem())
+                call_method(method, "iterate", budget=IterationBudget(stagnation_generations=3))
+
+                assert method._current_gen_count == 8
+
+                call_method(method, "iterate", budget=IterationBudget(max_time_ms=60000))
+
+                assert method._current_gen_count == 28
+                assert "continue_iteration" not in method.__dict__
+            finally:
+                shutdown_method_pool()
+                app.config["METHOD_PROCESSES"] = 0
+
+    def testCancelJob(self):
+        payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus"})
+        response = self.app.post("/method/create", headers=self.headers, data=payload)
+        response = self.app.get("/method/control", headers=self.headers)
+        version = json.loads(response.data)["version"]
+
+        # nothing to cancel
+        response = self.app.post("/method/cancel", headers=self.headers, data=json.dumps({}))
+
+        assert response.status_code == 404
+
+        payload = json.dumps(
+            {
+                "response": {
+                    "classifications": ["=", "0", "<"],
+                    "levels": [0, 0, 0],
+                    "number_of_solutions": 1,
+                },
+                "version": version,
+                "asynchronous": True,
+            }
+        )
+
+        # while the session is busy, the jobs wait, each occupying a worker, and the rest stay queued
+        job_ids = []
+        with get_session_lock(1):
+            for _ in range(app.config["JOB_WORKERS"] + 1):
+                response = self.app.post("/method/control", headers=self.headers, data=payload)
+                job_ids.append(json.loads(response.data)["job_id"])
+
+            response = self.app.post("/method/cancel", headers=self.headers, data=json.dumps({"job_id": job_ids[-1]}))
+
+            assert response.status_code == 200
+            assert json.loads(response.data)["cancelled_jobs"] == [job_ids[-1]]
+
+        results = {}
+        for job_id in job_ids:
+            for _ in range(600):
+                response = self.app.get(f"/method/job/result?job_id={job_id}", headers=self.headers)
+                if response.status_code != 202:
+                    break
+                time.sleep(0.1)
+            results[job_id] = response.status_code
+
+        # the first job iterates, the others were given the same version and are rejected, except the cancelled one
+        assert sorted(results.values()) == [200] + [409] * app.config["JOB_WORKERS"]
+
+        response = self.app.get(f"/method/job?job_id={job_ids[-1]}", headers=self.headers)
+
+        assert json.loads(response.data)["status"] == "CANCELLED"
+        assert json.loads(response.data)["started"] is None
+        assert Method.query.filter_by(id=1).first().version == version + 1
+
+
+    def testExternalJobWorkers(self):
+        payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus"})
+        response = self.app.post("/method/create", headers=self.headers, data=payload)
+        response = self.app.get("/method/control", headers=self.headers)
+        version = json.loads(response.data)["version"]
+
+        payload = json.dumps(
+            {
+                "response": {
+                    "classifications": ["=", "0", "<"],
+                    "levels": [0, 0, 0],
+                    "number_of_solutions": 1,
+                },
+                "version": version,
+                "asynchronous": True,
+            }
+        )
+
+        app.config["EXTERNAL_JOB_WORKERS"] = True
+        try:
+            response = self.app.post("/method/control", headers=self.headers, data=payload)
+        finally:
+            app.config["EXTERNAL_JOB_WORKERS"] = False
+
+        assert response.status_code == 202
+
+        job_id = json.loads(response.data)["job_id"]
+
+        # left in the queue for the workers
+        time.sleep(0.5)
+        assert db.session.get(Job, job_id).status == "QUEUED"
+
+        # a worker leases the job and dies
+        job = lease_job(worker="dead_worker", lease=60)
+
+        assert job.id == job_id
+        assert job.status == "RUNNING"
+        assert job.attempts == 1
+
+        # the lease has not expired, so the job is not run again
+        assert not run_next_job(run_iteration_job, "live_worker")
+
+        db.session.execute(
+            update(Job).where(Job.id == job_id).values(lease_expires=datetime.datetime.now() - datetime.timedelta(1))
+        )
+        db.session.commit()
+
+        # once expired, the job is leased again by another worker
+        assert run_next_job(run_iteration_job, "live_worker")
+
+        job = db.session.get(Job, job_id)
+
+        assert job.status == "FINISHED"
+        assert job.worker == "live_worker"
+        assert job.attempts == 2
+        assert job.result[1] == 200
+        assert Method.query.filter_by(id=1).first().version == version + 1
+
+        response = self.app.get(f"/method/job/result?job_id={job_id}", headers=self.headers)
+
+        assert response.status_code == 200
+        assert json.loads(response.data)["version"] == version + 1
+
+        # a job abandoned after its last attempt fails
+        job = create_job(1, {})
+        db.session.commit()
+        job_id = job.id
+        db.session.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(
+                status="RUNNING",
+                attempts=app.config["JOB_MAX_ATTEMPTS"],
+                lease_expires=datetime.datetime.now() - datetime.timedelta(1),
+            )
+        )
+        db.session.commit()
+
+        assert not run_next_job(run_iteration_job, "live_worker")
+
+        job = db.session.get(Job, job_id)
+
+        assert job.status == "FAILED"
+        assert job.result[1] == 500
+
+    def testJobHeartbeat(self):
+        payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus"})
+        response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+        job = create_job(1, {})
+        db.session.commit()
+        job = lease_job(job.id, worker="worker", lease=1)
+        lease_expires = job.lease_expires
+
+        # the cancellation is requested by another process, and passed on by the heartbeat
+        response = self.app.post("/method/cancel", headers=self.headers, data=json.dumps({"job_id": job.id}))
+
+        assert response.status_code == 200
+        assert json.loads(response.data)["running_cancelled"]
+
+        cancelled = []
+        heartbeat = JobHeartbeat(job.id, "worker", on_cancel=lambda: cancelled.append(True), lease=60)
+
+        assert heartbeat.beat()
+        assert cancelled == [True]
+
+        db.session.expire_all()
+        assert db.session.get(Job, job.id).lease_expires > lease_expires
+
+        # the lease is lost once another worker holds it
+        assert not JobHeartbeat(job.id, "other_worker").beat()
+
+    def testAdmission(self):
+        payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus"})
+        response = self.app.post("/method/create", headers=self.headers, data=payload)
+
+        assert response.status_code == 201
+
+        limits = AdmissionLimits.from_config(app.config)
+        user_limit = app.config["ADMISSION_USER_LIMITS"]["user"]
+        app.config["ADMISSION_USER_QUEUE_SIZE"] = 0
+        try:
+            # the requests in flight of the user take all of its slots, and none may wait
+            with ExitStack() as stack:
+                for _ in range(user_limit):
+                    stack.enter_context(scheduler.admit(("user", "test_user"), "user", limits))
+
+                start = time.monotonic()
+                response = self.app.post("/method/control", headers=self.headers, data=json.dumps({"response": {}}))
+
+                assert response.status_code == 429
+                assert response.headers["Retry-After"] == str(app.config["ADMISSION_RETRY_AFTER"])
+                assert time.monotonic() - start < 1
+
+                # starting a method as well
+                response = self.app.get("/method/control", headers=self.headers)
+
+                assert response.status_code == 429
+
+            # once the slots are free, the requests are admitted again
+            response = self.app.get("/method/control", headers=self.headers)
+
+            assert response.status_code == 200
+
+            response = self.app.post("/method/control", headers=self.headers, data=json.dumps({"response": {}}))
+
+            assert response.status_code != 429
+            assert scheduler.in_flight() == 0
+        finally:
+            app.config["ADMISSION_USER_QUEUE_SIZE"] = limits.user_queue_size
+
+    def testParallelScalarizations(self):
+        problem = Problem.query.filter_by(name="setup_test_problem_1").first().problem_pickle
+        # a deterministic solver, to get the same solutions in every process
+        method = NIMBUS(problem, scalar_method="scipy_minimize")
+        request = method.start()[0]
+        request.response = {
+            "classifications": ["<", ">=", "0"],
+            "levels": [0, 10, 0],
+            "number_of_solutions": 4,
+        }
+
+        parallel_method, parallel_request = deepcopy(method), deepcopy(request)
+        serial_method, serial_request = deepcopy(method), deepcopy(request)
+        expected = method.iterate(request)[0].content
+
+        try:
+            with parallel_scalarizations(parallel_method, 2) as solved:
+                # the four scalarizations are solved in two processes
+                result = solved.iterate(parallel_request)[0].content
+        finally:
+            shutdown_scalarization_pool()
+
+        # the same solutions in the same order
+        npt.assert_allclose(result["solutions"], expected["solutions"], atol=1e-6)
+        npt.assert_allclose(result["objectives"], expected["objectives"], atol=1e-6)
+        assert len(result["objectives"]) == 4
+
+        # and as usual outside the context
+        serial = serial_method.iterate(serial_request)[0].content
+        npt.assert_allclose(serial["objectives"], expected["objectives"])
+
+    def testMultistartScalarizations(self):
+        problem = Problem.query.filter_by(name="setup_test_problem_1").first().problem_pickle
+        method = ReferencePointMethod(problem, problem.ideal, problem.nadir)
+        request = method.start()
+        request.response = {"reference_point": np.array([-5.0, 0.0, 5.0])}
+
+        methods = {name: deepcopy(method) for name in ["de", "inline", "parallel"]}
+        requests = {name: deepcopy(request) for name in methods}
+
+        methods["de"].iterate(requests["de"])
+        with parallel_scalarizations(methods["inline"], 0, starts=4) as solved:
+            solved.iterate(requests["inline"])
+        try:
+            with parallel_scalarizations(methods["parallel"], 2, starts=4) as solved:
+                solved.iterate(requests["parallel"])
+        finally:
+            shutdown_scalarization_pool()
+
+        def asf_values(rpm):
+            asf = ReferencePointASF(rpm._w, rpm._nadir, rpm._utopian, rho=1e-4)
+            values = [asf(rpm._fs[rpm._h], rpm._q)]
+            return np.array(values + [asf(f, q) for f, q in zip(rpm._afs[rpm._h], rpm._pqs[rpm._h])])
+
+        inline, de = asf_values(methods["inline"]), asf_values(methods["de"])
+        # the solution is at least as good as the one found by differential evolution
+        assert inline[0] <= de[0] + 1e-6
+        # the reference points of the other solutions are perturbed around the solutions, which differ slightly
+        npt.assert_allclose(inline[1:], de[1:], atol=1e-4)
+
+        # and the same whether the local minimizations are solved in the pool or not
+        npt.assert_allclose(methods["parallel"]._fs[1], methods["inline"]._fs[1])
+        npt.assert_allclose(methods["parallel"]._afs[1], methods["inline"]._afs[1])
+
+    def testProgressStream(self):
+        payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus"})
+        response = self.app.post("/method/create", headers=self.headers, data=payload)
+        method_id = json.loads(response.data)["method_id"]
+
+        response = self.app.get("/method/control", headers=self.headers)
+
+        assert response.status_code == 200
+
+        # nothing is published while nobody listens
+        progress_streams.publish(method_id, "generation", {"generation": 1, "evaluations": 50})
+
+        stream = self.app.get(f"/method/progress?method_id={method_id}&front_size=2", headers=self.headers, buffered=False)
+
+        assert stream.status_code == 200
+        assert stream.mimetype == "text/event-stream"
+
+        # NIMBUS has no generations, publish one as an EA would
+        front = [[0, 0, 0], [1, 1, 1], [2, 2, 2], [3, 3, 3]]
+        progress_streams.publish(method_id, "generation", {"generation": 2, "evaluations": 100, "front": front})
+
+        payload = json.dumps(
+            {
+                "response": {
+                    "classifications": ["=", "0", "<"],
+                    "levels": [0, 0, 0],
+                    "number_of_solutions": 1,
+                },
+            }
+        )
+        response = self.app.post("/method/control", headers=self.headers, data=payload)
+
+        assert response.status_code == 200
+
+        # the stream ends with the iteration, the comments keeping it alive are skipped
+        events = [
+            dict(line.split(": ", 1) for line in event.split("\n"))
+            for event in stream.get_data(as_text=True).strip().split("\n\n")
+            if not event.startswith(":")
+        ]
+        stream.close()
+
+        assert [event["event"] for event in events] == ["generation", "iteration"]
+
+        generation = json.loads(events[0]["data"])
+
+        assert generation["generation"] == 2
+        assert generation["front"] == [[0, 0, 0], [3, 3, 3]]
+
+        iteration = json.loads(events[1]["data"])
+
+        assert iteration["status_code"] == 200
+        assert iteration["version"] == json.loads(response.data)["version"]
+
+        # the listener is removed when the stream is closed
+        assert progress_streams.front_size(method_id) == 0
+        assert method_id not in progress_streams._listeners
+
+    def testAsgiServing(self):
+        application = AsgiApp(app, workers=2, body_buffer=16)
+
+        async def call(
+            method, path, query=b"", headers=(), body=b"", disconnect=None, sent=None, chunk_size=None, complete=True
+        ):
+            scope = {
+                "type": "http",
+                "http_version": "1.1",
+                "method": method,
+                "scheme": "http",
+                "path": path,
+                "query_string": query,
+                "headers": [(b"host", b"localhost"), (b"content-type", b"application/json"), *headers],
+            }
+            chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)] if chunk_size else [body]
+            messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+            messages[-1]["more_body"] = not complete
+            sent = [] if sent is None else sent
+
+            async def receive():
+                if messages:
+                    return messages.pop(0)
+                await (disconnect or asyncio.Event()).wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                sent.append(message)
+
+            await application(scope, receive, send)
+
+            if not sent:
+                return None, None
+            return sent[0]["status"], b"".join(message.get("body", b"") for message in sent[1:])
+
+        async def serve():
+            status, body = await call(
+                "POST", "/login", body=json.dumps({"username": "test_user", "password": "pass"}).encode()
+            )
+
+            assert status == 200
+
+            authorization = (b"authorization", f"Bearer {json.loads(body)['access_token']}".encode())
+
+            status, body = await call(
+                "POST",
+                "/method/create",
+                headers=[authorization],
+                body=json.dumps({"problem_id": 1, "method": "synchronous_nimbus"}).encode(),
+            )
+
+            assert status == 201
+
+            method_id = json.loads(body)["method_id"]
+            status, body = await call("GET", "/method/control", headers=[authorization])
+
+            assert status == 200
+            assert "response" in json.loads(body)
+
+            # the progress stream waits in the event loop until the iteration ends
+            sent = []
+            query = f"method_id={method_id}".encode()
+            stream = asyncio.ensure_future(
+                call("GET", "/method/progress", query=query, headers=[authorization], sent=sent)
+            )
+
+            while len(sent) < 2:
+                await asyncio.sleep(0.01)
+
+            assert sent[0]["status"] == 200
+            assert sent[1]["body"] == b": listening\n\n"
+
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, progress_streams.publish, method_id, "generation", {"generation": 1})
+            await loop.run_in_executor(None, progress_streams.publish, method_id, "iteration", {"status_code": 200})
+            status, body = await asyncio.wait_for(stream, 10)
+
+            events = [event for event in body.decode().strip().split("\n\n") if not event.startswith(":")]
+
+            assert [event.split("\n")[0] for event in events] == ["event: generation", "event: iteration"]
+            assert method_id not in progress_streams._listeners
+
+            # a client gone closes the stream
+            disconnect = asyncio.Event()
+            sent = []
+            stream = asyncio.ensure_future(
+                call("GET", "/method/progress", headers=[authorization], disconnect=disconnect, sent=sent)
+            )
+
+            while len(sent) < 2:
+                await asyncio.sleep(0.01)
+
+            assert method_id in progress_streams._listeners
+
+            disconnect.set()
+            await asyncio.wait_for(stream, 10)
+
+            assert method_id not in progress_streams._listeners
+
+            # a body longer than the buffer is streamed to the app as it is read
+            status, body = await call(
+                "POST",
+                "/method/create",
+                headers=[authorization],
+                body=json.dumps({"problem_id": 1, "method": "synchronous_nimbus"}).encode(),
+                chunk_size=5,
+            )
+
+            assert status == 201
+            assert Method.query.filter_by(id=json.loads(body)["method_id"]).first().name == "synchronous_nimbus"
+
+            # a client gone while sending the body is not responded to
+            gone = asyncio.Event()
+            gone.set()
+            status, body = await call(
+                "POST",
+                "/method/create",
+                headers=[authorization],
+                body=b'{"problem_id": 1, "method": ',
+                disconnect=gone,
+                chunk_size=5,
+                complete=False,
+            )
+
+            assert status is None
 
-        response = {"response": {"indices": [], "number_of_desired_solutions": 0}}
-        payload = json.dumps(response)
+            # websockets are refused, with 404 if the server lets the app respond
+            for extensions, refusal in [({}, "websocket.close"), ({"websocket.http.response": {}}, 404)]:
+                messages = [{"type": "websocket.connect"}]
+                sent = []
 
-        response = self.app.post(
-            "/method/control",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
-            data=payload,
-        )
+                async def receive():
+                    return messages.pop(0)
 
-        assert response.status_code == 200
+                async def send(message):
+                    sent.append(message)
 
-        response = {"response": {"index": 0, "continue": True}}
-        payload = json.dumps(response)
+                await application({"type": "websocket", "path": "/", "extensions": extensions}, receive, send)
 
-        response = self.app.post(
-            "/method/control",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
-            data=payload,
-        )
+                assert sent[0].get("status", sent[0]["type"]) == refusal
 
-        assert response.status_code == 200
+        try:
+            asyncio.run(serve())
+        finally:
+            application.close()
 
-        response = {
-            "response": {
-                "classifications": ["<", "0", ">="],
-                "levels": [-35.0, 8.0, -30.0],
-                "number_of_solutions": 4,
-            }
+    def testMethodProcesses(self):
+        preferences = {
+            "classifications": ["=", "0", "<"],
+            "levels": [0, 0, 0],
+            "number_of_solutions": 1,
         }
-        payload = json.dumps(response)
 
-        response = self.app.post(
-            "/method/control",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
-            data=payload,
-        )
+        app.config["METHOD_PROCESSES"] = 1
+        try:
+            payload = json.dumps({"problem_id": 1, "method": "synchronous_nimbus"})
+            response = self.app.post("/method/create", headers=self.headers, data=payload)
 
-        assert response.status_code == 200
+            assert response.status_code == 201
 
-        response = {"response": {"indices": [0, 1, 2, 3]}}
-        payload = json.dumps(response)
+            # started in the worker process
+            response = self.app.get("/method/control", headers=self.headers)
 
-        response = self.app.post(
-            "/method/control",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
-            data=payload,
-        )
+            assert response.status_code == 200
 
-        assert response.status_code == 200
+            # a call exceeding the memory limit of the worker fails without affecting the serving process
+            shutdown_method_pool()
+            app.config["METHOD_PROCESS_MEMORY_LIMIT"] = 64 * 1024 * 1024
 
-        response = {"response": {"indices": [0, 3], "number_of_desired_solutions": 5}}
-        payload = json.dumps(response)
+            payload = json.dumps({"response": preferences})
+            response = self.app.post("/method/control", headers=self.headers, data=payload)
 
-        response = self.app.post(
-            "/method/control",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
-            data=payload,
-        )
+            assert response.status_code == 400
+            assert Method.query.filter_by(id=1).first().version == 2
 
-        assert response.status_code == 200
+            shutdown_method_pool()
+            app.config["METHOD_PROCESS_MEMORY_LIMIT"] = None
 
-        response = {"response": {"indices": []}}
-        payload = json.dumps(response)
+            # iterated in the worker process
+            response = self.app.post("/method/control", headers=self.headers, data=payload)
 
-        response = self.app.post(
-            "/method/control",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
-            data=payload,
-        )
+            assert response.status_code == 200
+            assert len(json.loads(response.data)["response"]["objectives"]) == 1
 
-        assert response.status_code == 200
+            # the state of the method after the iteration is stored
+            method_query = Method.query.filter_by(id=1).first()
 
-        response = {"response": {"indices": [], "number_of_desired_solutions": 0}}
-        payload = json.dumps(response)
+            assert type(method_query.method_pickle).__name__ == "NIMBUS"
+            assert type(method_query.last_request).__name__ == "NimbusSaveRequest"
 
-        response = self.app.post(
-            "/method/control",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
-            data=payload,
-        )
+            # the pool is replaced after a call per process
+            shutdown_method_pool()
+            app.config["METHOD_PROCESS_MAX_TASKS"] = 1
 
-        response = {"response": {"index": 0, "continue": False}}
-        payload = json.dumps(response)
+            pool = get_method_pool()
+            assert call_method(SimpleNamespace(), "__repr__") == "namespace()"
+            assert get_method_pool() is not pool
 
-        response = self.app.post(
-            "/method/control",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
-            data=payload,
-        )
+            # and the calls made concurrently are given to the pools being replaced without failing
+            results = []
+
+            def call_repeatedly():
+                with app.app_context():
+                    for _ in range(2):
+                        results.append(call_method(SimpleNamespace(), "__repr__"))
+
+            threads = [threading.Thread(target=call_repeatedly) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert results == ["namespace()"] * 8
+        finally:
+            shutdown_method_pool()
+            app.config["METHOD_PROCESSES"] = 0
+            app.config["METHOD_PROCESS_MEMORY_LIMIT"] = None
+            app.config["METHOD_PROCESS_MAX_TASKS"] = None
 
-        assert response.status_code == 200
 
-        print(json.loads(response.data))
 
 
 @pytest.mark.nautilusnav
@@ -707,6 +1759,374 @@ class TestNautilusNavigator(TestCase):
         assert content["step_number"] == 19
         assert content["steps_remaining"] == 22
 
+    def test_go_to_previous_by_step_number(self):
+        uname = "test_user"
+        atoken = self.login(uname=uname)
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {atoken}",
+        }
+
+        self.test_create_method()
+
+        # start method
+        response = self.app.get("/method/control", headers=headers)
+
+        assert response.status_code == 200
+
+        content = json.loads(response.data)["response"]
+        lower_b = content["reachable_lb"]
+        upper_b = content["reachable_ub"]
+        ref_p = [(upper_b[i] + lower_b[i]) / 2.0 for i in range(len(upper_b))]
+
+        payload = json.dumps(
+            {
+                "response": {
+                    "reference_point": ref_p,
+                    "speed": 1,
+                    "go_to_previous": False,
+                    "stop": False,
+                    "user_bounds": [None, None, None],
+                }
+            },
+            ignore_nan=True,
+        )
+
+        # steps 2 to 10
+        contents = {1: content}
+        for _ in range(9):
+            response = self.app.post("/method/control", headers=headers, data=payload)
+
+            assert response.status_code == 200
+
+            content = json.loads(response.data)["response"]
+            contents[content["step_number"]] = content
+
+        assert content["step_number"] == 10
+        assert NavigatorState.query.count() == 10
+
+        # go back by giving the step number only
+        back_payload = json.dumps({"response": {"go_to_previous": True, "step_number": 5}})
+        response = self.app.post("/method/control", headers=headers, data=back_payload)
+
+        assert response.status_code == 200
+
+        content = json.loads(response.data)["response"]
+
+        # the original state of the step is restored
+        for key in ["step_number", "steps_remaining", "distance", "reachable_idx"]:
+            assert content[key] == contents[5][key]
+        npt.assert_almost_equal(content["navigation_point"], contents[5]["navigation_point"])
+        npt.assert_almost_equal(content["reachable_lb"], contents[5]["reachable_lb"])
+        npt.assert_almost_equal(content["reachable_ub"], contents[5]["reachable_ub"])
+
+        # the steps after the one gone back to are discarded
+        assert NavigatorState.query.count() == 5
+
+        # the navigation continues from the restored step
+        response = self.app.post("/method/control", headers=headers, data=payload)
+
+        assert response.status_code == 200
+        assert json.loads(response.data)["response"]["step_number"] == 6
+        assert NavigatorState.query.count() == 6
+
+        # a step not in the history can't be gone back to without its whole state
+        back_payload = json.dumps({"response": {"go_to_previous": True, "step_number": 20}})
+        response = self.app.post("/method/control", headers=headers, data=back_payload)
+
+        assert response.status_code == 400
+
+    def test_navigate_steps(self):
+        atoken = self.login()
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {atoken}",
+        }
+
+        # two sessions, navigated step by step and several steps at a time
+        method_ids = []
+        for _ in range(2):
+            payload = json.dumps({"problem_id": 1, "method": "nautilus_navigator"})
+            response = self.app.post("/method/create", headers=headers, data=payload)
+            method_ids.append(json.loads(response.data)["method_id"])
+
+            response = self.app.get(f"/method/control?method_id={method_ids[-1]}", headers=headers)
+
+            assert response.status_code == 200
+
+        content = json.loads(response.data)["response"]
+        lower_b = content["reachable_lb"]
+        upper_b = content["reachable_ub"]
+        ref_p = [(upper_b[i] + lower_b[i]) / 2.0 for i in range(len(upper_b))]
+        navigator_response = {
+            "reference_point": ref_p,
+            "speed": 1,
+            "go_to_previous": False,
+            "stop": False,
+            "user_bounds": [None, None, None],
+        }
+
+        single_steps = []
+        for _ in range(5):
+            payload = json.dumps({"response": navigator_response, "method_id": method_ids[0]}, ignore_nan=True)
+            response = self.app.post("/method/control", headers=headers, data=payload)
+            single_steps.append(json.loads(response.data)["response"])
+
+        payload = json.dumps({"response": navigator_response, "method_id": method_ids[1], "steps": 5}, ignore_nan=True)
+        response = self.app.post("/method/control", headers=headers, data=payload)
+
+        assert response.status_code == 200
+
+        data = json.loads(response.data)
+
+        # the same steps as navigated one at a time
+        assert data["response"]["step_number"] == 6
+        assert [step["step_number"] for step in data["steps"]] == [2, 3, 4, 5, 6]
+        assert "reachable_idx" not in data["steps"][0]
+        for step, single_step in zip(data["steps"], single_steps):
+            npt.assert_almost_equal(step["navigation_point"], single_step["navigation_point"])
+            npt.assert_almost_equal(step["reachable_lb"], single_step["reachable_lb"])
+        assert data["response"]["reachable_idx"] == single_steps[-1]["reachable_idx"]
+        assert NavigatorState.query.filter_by(method_id=method_ids[1]).count() == 6
+
+        # to the Pareto front
+        payload = json.dumps({"response": navigator_response, "method_id": method_ids[1], "steps": 0}, ignore_nan=True)
+        response = self.app.post("/method/control", headers=headers, data=payload)
+
+        assert response.status_code == 200
+
+        data = json.loads(response.data)
+
+        assert data["response"]["step_number"] == 40
+        assert data["response"]["steps_remaining"] == 1
+        assert data["steps"][0]["step_number"] == 7
+        assert NavigatorState.query.filter_by(method_id=method_ids[1]).count() == 40
+
+        # the steps navigated can be gone back to
+        back_payload = json.dumps(
+            {"response": {"go_to_previous": True, "step_number": 20}, "method_id": method_ids[1]}
+        )
+        response = self.app.post("/method/control", headers=headers, data=back_payload)
+
+        assert response.status_code == 200
+        npt.assert_almost_equal(
+            json.loads(response.data)["response"]["navigation_point"], data["steps"][13]["navigation_point"]
+        )
+
+        # only NAUTILUS Navigator navigates in steps
+        payload = json.dumps({"response": navigator_response, "method_id": method_ids[1], "steps": -1}, ignore_nan=True)
+        response = self.app.post("/method/control", headers=headers, data=payload)
+
+        assert response.status_code == 400
+
+    def test_objective_index(self):
+        atoken = self.login()
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {atoken}",
+        }
+
+        objectives = Problem.query.filter_by(id=1).first().problem_pickle.objectives
+        index = ObjectiveIndex(objectives)
+        lower, upper = np.quantile(objectives, 0.2, axis=0), np.quantile(objectives, 0.7, axis=0)
+
+        # the same rows as found by a scan
+        npt.assert_array_equal(
+            index.box(objectives, lower, upper),
+            np.flatnonzero(np.all(objectives >= lower, axis=1) & np.all(objectives <= upper, axis=1)),
+        )
+        # bounds on the rows are included
+        assert 5 in index.box(objectives, objectives[5], objectives[5])
+        assert index.box(objectives, upper, lower).size == 0
+
+        # navigated with the index, built when first needed, and without
+        steps = {}
+        try:
+            for min_points in [1, None]:
+                objective_indexes.clear()
+                app.config["OBJECTIVE_INDEX_MIN_POINTS"] = min_points
+
+                payload = json.dumps({"problem_id": 1, "method": "nautilus_navigator"})
+                response = self.app.post("/method/create", headers=headers, data=payload)
+                method_id = json.loads(response.data)["method_id"]
+                response = self.app.get(f"/method/control?method_id={method_id}", headers=headers)
+                content = json.loads(response.data)["response"]
+
+                navigator_response = {
+                    "reference_point": list(np.mean([content["reachable_lb"], content["reachable_ub"]], axis=0)),
+                    "speed": 1,
+                    "go_to_previous": False,
+                    "stop": False,
+                    "user_bounds": [None, None, None],
+                }
+                payload = json.dumps(
+                    {"response": navigator_response, "method_id": method_id, "steps": 10}, ignore_nan=True
+                )
+                response = self.app.post("/method/control", headers=headers, data=payload)
+
+                assert response.status_code == 200
+
+                steps[min_points] = json.loads(response.data)["response"]
+                assert (objective_indexes.get(("Problem", 1, 1), lambda: None) is not None) == (min_points is not None)
+
+                # the index is not stored with the method
+                method = Method.query.filter_by(id=method_id).first().method_pickle
+                assert "calculate_reachable_point_indices" not in method.__dict__
+
+            # nor found for a session of another user referring to the problem
+            app.config["OBJECTIVE_INDEX_MIN_POINTS"] = 1
+            other_session = Method(name="nautilus_navigator", user_id=2, problem_id=1, minimize="[1, 1, 1]")
+            assert method_objective_index(other_session) is None
+        finally:
+            objective_indexes.clear()
+            app.config["OBJECTIVE_INDEX_MIN_POINTS"] = 10000
+
+        assert steps[1]["reachable_idx"] == steps[None]["reachable_idx"]
+        npt.assert_almost_equal(steps[1]["reachable_lb"], steps[None]["reachable_lb"])
+
+    def test_export_import(self):
+        uname = "test_user"
+        atoken = self.login(uname=uname)
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {atoken}",
+        }
+
+        self.test_create_method()
+
+        response = self.app.get("/method/control", headers=headers)
+        content = json.loads(response.data)["response"]
+        lower_b = content["reachable_lb"]
+        upper_b = content["reachable_ub"]
+        ref_p = [(upper_b[i] + lower_b[i]) / 2.0 for i in range(len(upper_b))]
+
+        payload = json.dumps(
+            {
+                "response": {
+                    "reference_point": ref_p,
+                    "speed": 1,
+                    "go_to_previous": False,
+                    "stop": False,
+                    "user_bounds": [None, None, None],
+                }
+            },
+            ignore_nan=True,
+        )
+
+        # steps 2 to 5
+        for _ in range(4):
+            response = self.app.post("/method/control", headers=headers, data=payload)
+            assert response.status_code == 200
+
+        exported_content = json.loads(response.data)["response"]
+
+        # disabled without a key signing the snapshots
+        self.addCleanup(app.config.__setitem__, "SNAPSHOT_KEY", app.config["SNAPSHOT_KEY"])
+        app.config["SNAPSHOT_KEY"] = None
+
+        response = self.app.get("/method/export?method_id=1", headers={"Authorization": f"Bearer {atoken}"})
+
+        assert response.status_code == 503
+
+        response = self.app.post(
+            "/method/import",
+            headers={"Content-Type": "application/octet-stream", "Authorization": f"Bearer {atoken}"},
+            data=b"".join(write_snapshot({"name": "nautilus_navigator"}, None, None, [], app.config["SECRET_KEY"])),
+        )
+
+        assert response.status_code == 503
+
+        app.config["SNAPSHOT_KEY"] = "snapshot-key"
+
+        response = self.app.get("/method/export?method_id=1", headers={"Authorization": f"Bearer {atoken}"})
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/octet-stream"
+
+        snapshot = response.data
+
+        # import as a new session
+        response = self.app.post(
+            "/method/import",
+            headers={"Content-Type": "application/octet-stream", "Authorization": f"Bearer {atoken}"},
+            data=snapshot,
+        )
+
+        assert response.status_code == 201
+
+        data = json.loads(response.data)
+
+        assert data["method"] == "nautilus_navigator"
+        assert data["status"] == "ITERATING"
+
+        imported_query = Method.query.filter_by(id=data["method_id"]).first()
+
+        assert imported_query.problem_id == 1
+        assert NavigatorState.query.filter_by(method_id=data["method_id"]).count() == 5
+
+        # the imported session continues from where it was exported
+        response = self.app.post(
+            "/method/control",
+            headers=headers,
+            data=json.dumps({**json.loads(payload), "method_id": data["method_id"]}),
+        )
+
+        assert response.status_code == 200
+        assert json.loads(response.data)["response"]["step_number"] == exported_content["step_number"] + 1
+
+        # and its history is kept
+        back_payload = json.dumps(
+            {"response": {"go_to_previous": True, "step_number": 3}, "method_id": data["method_id"]}
+        )
+        response = self.app.post("/method/control", headers=headers, data=back_payload)
+
+        assert response.status_code == 200
+        assert json.loads(response.data)["response"]["step_number"] == 3
+
+        # the original session is untouched
+        assert NavigatorState.query.filter_by(method_id=1).count() == 5
+
+        # a single state is stored per step
+        db.session.add(NavigatorState(method_id=1, step_number=3, state={}))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+        # not a snapshot
+        response = self.app.post(
+            "/method/import",
+            headers={"Content-Type": "application/octet-stream", "Authorization": f"Bearer {atoken}"},
+            data=b"not a snapshot",
+        )
+
+        assert response.status_code == 400
+
+        # modified after it was exported
+        modified = bytearray(snapshot)
+        modified[len(modified) // 2] ^= 0xFF
+        response = self.app.post(
+            "/method/import",
+            headers={"Content-Type": "application/octet-stream", "Authorization": f"Bearer {atoken}"},
+            data=bytes(modified),
+        )
+
+        assert response.status_code == 400
+
+        # signed, but of a method or status not known
+        for header in [
+            {"name": "unknown_method", "status": "ITERATING"},
+            {"name": "nautilus_navigator", "status": "UNKNOWN"},
+        ]:
+            response = self.app.post(
+                "/method/import",
+                headers={"Content-Type": "application/octet-stream", "Authorization": f"Bearer {atoken}"},
+                data=b"".join(write_snapshot(header, None, None, [], app.config["SNAPSHOT_KEY"])),
+            )
+
+            assert response.status_code == 400
+
+        assert Method.query.count() == 2
+
     def test_stop_method(self):
         uname = "test_user"
         atoken = self.login(uname=uname)
@@ -1120,6 +2540,70 @@ class TestENautilus(TestCase):
         assert "solution" in data["response"]
         assert "objective" in data["response"]
 
+    def test_speculation(self):
+        atoken = self.login()
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {atoken}",
+        }
+
+        self.create_method()
+        method_id = Method.query.first().id
+
+        app.config["SPECULATE_ENAUTILUS"] = True
+        try:
+            response = self.app.get("/method/control", headers=headers)
+
+            payload = json.dumps({"response": {"n_iterations": 4, "n_points": 3}})
+            response = self.app.post("/method/control", headers=headers, data=payload)
+
+            assert response.status_code == 200
+
+            # the next iteration is computed for each of the points while the decision maker is choosing
+            futures, tokens, version = speculative_iterations._pending._results[method_id]
+
+            assert sorted(futures) == [0, 1, 2]
+            assert version == json.loads(response.data)["version"]
+
+            _, speculated_request = futures[1].result()
+            choice = {"preferred_point_index": 1, "step_back": False, "change_remaining": False}
+            payload = json.dumps({"response": choice})
+            response = self.app.post("/method/control", headers=headers, data=payload)
+
+            assert response.status_code == 200
+
+            # the speculated iteration is served, the representative points are sampled, so no other iteration would
+            # give the same points
+            data = json.loads(response.data)
+
+            npt.assert_almost_equal(data["response"]["points"], speculated_request.content["points"])
+            assert data["response"]["n_iterations_left"] == 3
+            assert speculative_iterations._pending._results[method_id][2] == data["version"]
+
+            # the iterations of the choices not made are cancelled
+            assert tokens[0].cancelled and tokens[2].cancelled
+            assert not tokens[1].cancelled
+
+            # a speculative iteration is skipped when no slot of the admission control is free
+            app.config["ADMISSION_CAPACITY"] = 0
+            try:
+                method = Method.query.filter_by(id=method_id).first()
+                speculated = _iterate_copy(
+                    method_id, method.method_pickle, method.last_request, choice, CancelToken(), None, None
+                )
+            finally:
+                app.config["ADMISSION_CAPACITY"] = 8
+
+            assert speculated is None
+
+            # other responses are iterated as usual
+            assert enautilus_choice({**choice, "step_back": True}) is None
+            assert enautilus_choice({**choice, "change_remaining": True, "iterations_left": 5}) is None
+            assert enautilus_choice(choice) == 1
+        finally:
+            app.config["SPECULATE_ENAUTILUS"] = False
+            speculative_iterations.take(method_id, None, None)
+
     def test_go_back(self):
         uname = "test_user"
         atoken = self.login(uname=uname)
@@ -0,0 +1,82 @@
+import unittest
+from copy import deepcopy
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+from desdeo_mcdm.interactive import NautilusNavigator
+from utilities.navigation import STEP_KEYS, navigate, step_summary
+
+
+def navigator(steps: int = 10) -> NautilusNavigator:
+    # a front of points on the positive octant of the unit sphere
+    points = np.random.default_rng(1).random((50, 3))
+    front = points / np.linalg.norm(points, axis=1, keepdims=True)
+    method = NautilusNavigator(front, front.min(axis=0), front.max(axis=0))
+    method._steps_remaining = steps
+
+    return method
+
+
+def respond(method, request):
+    content = request.content
+    request.response = {
+        "reference_point": (content["reachable_lb"] + content["reachable_ub"]) / 2,
+        "speed": 1,
+        "go_to_previous": False,
+        "stop": False,
+        "user_bounds": [None, None, None],
+    }
+
+    return request
+
+
+@pytest.mark.nautilusnav
+class TestNavigate(unittest.TestCase):
+    def test_steps(self):
+        method = navigator()
+        request = respond(method, method.start())
+
+        # the same steps as navigated one at a time
+        single_method, single_request = deepcopy(method), deepcopy(request)
+        single_steps = []
+        for _ in range(3):
+            single_request = single_method.iterate(single_request)
+            single_steps.append(single_request)
+            single_request.response = request.response
+
+        requests = navigate(method, request, 3)
+
+        assert [request.content["step_number"] for request in requests] == [2, 3, 4]
+        for request, single_request in zip(requests, single_steps):
+            npt.assert_almost_equal(request.content["navigation_point"], single_request.content["navigation_point"])
+            npt.assert_almost_equal(request.content["reachable_ub"], single_request.content["reachable_ub"])
+
+        # to the Pareto front
+        requests = navigate(method, respond(method, requests[-1]))
+
+        assert requests[0].content["step_number"] == 5
+        assert requests[-1].content["step_number"] == 10
+        assert requests[-1].content["steps_remaining"] == 1
+
+    def test_go_to_previous(self):
+        method = navigator()
+        navigated = navigate(method, respond(method, method.start()), 4)
+
+        # the first step goes back to the state in the contents of the request, the rest continue from there
+        request = respond(method, deepcopy(navigated[1]))
+        request.response["go_to_previous"] = True
+        requests = navigate(method, request, 2)
+
+        assert [request.content["step_number"] for request in requests] == [3, 4]
+        npt.assert_almost_equal(requests[0].content["navigation_point"], navigated[1].content["navigation_point"])
+        npt.assert_almost_equal(requests[1].content["navigation_point"], navigated[2].content["navigation_point"])
+
+    def test_step_summary(self):
+        method = navigator()
+        request = method.start()
+
+        summary = step_summary(request)
+
+        assert tuple(summary) == STEP_KEYS
+        assert "reachable_idx" not in summary
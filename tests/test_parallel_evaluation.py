@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+from desdeo_problem import MOProblem, Variable, _ScalarObjective
+from utilities.expression_parser import numpify_expressions
+from utilities import parallel_evaluation
+from utilities.parallel_evaluation import _evaluate_block, parallel_evaluations, shutdown_evaluation_pool
+
+
+def analytical_problem() -> MOProblem:
+    evaluators = numpify_expressions(["x + 3*y - z", "y - 3*x + z", "3*z - y + x"], ["x", "y", "z"])
+    objectives = [_ScalarObjective(f"f{i + 1}", evaluator) for i, evaluator in enumerate(evaluators)]
+    variables = [Variable(name, 0, -10, 10) for name in ["x", "y", "z"]]
+
+    return MOProblem(objectives, variables, ideal=np.array([-10, -20, -30]), nadir=np.array([10, 20, 30]))
+
+
+@pytest.mark.method
+class TestParallelEvaluations(unittest.TestCase):
+    def tearDown(self):
+        shutdown_evaluation_pool()
+
+    def test_parallel_evaluations(self):
+        problem = analytical_problem()
+        decision_vectors = np.random.default_rng(1).uniform(-10, 10, (50, 3))
+
+        expected = problem.evaluate(decision_vectors)
+
+        with parallel_evaluations([problem], 2, min_block_size=10):
+            # split into two blocks evaluated in two processes
+            result = problem.evaluate(decision_vectors)
+            # too small to be split
+            single = problem.evaluate(decision_vectors[:1])
+
+        npt.assert_allclose(result.objectives, expected.objectives)
+        npt.assert_allclose(result.targets, expected.targets)
+        npt.assert_allclose(single.objectives, expected.objectives[:1])
+
+        # the problem is left as it was
+        assert "evaluate_objectives" not in problem.__dict__
+
+    def test_pool_reused(self):
+        decision_vectors = np.random.default_rng(2).uniform(-10, 10, (40, 3))
+        pools = []
+
+        # the problem of each call is sent to the processes kept from the earlier calls
+        for _ in range(2):
+            problem = analytical_problem()
+            expected = problem.evaluate(decision_vectors)
+
+            with parallel_evaluations([problem], 2, min_block_size=10):
+                first = problem.evaluate(decision_vectors)
+                second = problem.evaluate(decision_vectors)
+                pools.append(parallel_evaluation._pool)
+
+            npt.assert_allclose(first.objectives, expected.objectives)
+            npt.assert_allclose(second.objectives, expected.objectives)
+
+        assert pools[0] is not None
+        assert pools[0] is pools[1]
+
+    def test_problem_not_kept(self):
+        # a process not having the problem asks for it
+        assert _evaluate_block(b"unknown", None, np.zeros((1, 3)), False) is None
@@ -0,0 +1,193 @@
+import os
+import shutil
+import tempfile
+
+import dill
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+import pytest
+from app import app
+from database import db
+from desdeo_problem import DiscreteDataProblem
+from flask_testing import TestCase
+from models.problem_models import Problem
+from models.user_models import UserModel
+from sqlalchemy import text
+from collect_pickle_buffers import collect_referenced_buffers
+from utilities.serialization import (
+    BUFFERS_MAGIC,
+    MAGIC,
+    BufferStore,
+    available_codecs,
+    compress,
+    compressed_dill,
+    decompress,
+    referenced_buffers,
+)
+
+
+@pytest.mark.serialization
+class TestCompression(TestCase):
+    SQLALCHEMY_DATABASE_URI = "sqlite:///test.db"
+    TESTING = True
+
+    def create_app(self):
+        app.config["SQLALCHEMY_DATABASE_URI"] = self.SQLALCHEMY_DATABASE_URI
+        app.config["TESTING"] = self.TESTING
+        return app
+
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+
+        db.session.add(UserModel(username="test_user", password=UserModel.generate_hash("pass")))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    def get_problem(self, path=os.path.dirname(os.path.abspath(__file__)), fname="data/testPF_3f_11x_max.csv"):
+        pf = np.loadtxt(f"{path}/{fname}", delimiter=",")
+        objective_names = ["f1", "f2", "f3"]
+        variable_names = [f"x{i+1}" for i in range(pf.shape[1] - 3)]
+        df = pd.DataFrame(-pf, columns=objective_names + variable_names)
+        fs = df[objective_names].values
+
+        return DiscreteDataProblem(df, variable_names, objective_names, np.min(fs, axis=0), np.max(fs, axis=0))
+
+    def test_codecs(self):
+        data = dill.dumps(self.get_problem())
+
+        for codec in available_codecs:
+            compressed = compress(data, codec=codec, level=1)
+
+            if codec == "none":
+                assert compressed == data
+            else:
+                assert compressed.startswith(MAGIC)
+                assert len(compressed) < len(data)
+
+            assert decompress(compressed) == data
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            compress(b"data", codec="not a codec")
+
+    def test_compressed_column(self):
+        problem = self.get_problem()
+
+        db.session.add(Problem(name="discrete", problem_type="Discrete", problem_pickle=problem, user_id=1, minimize="[1, 1, 1]"))
+        db.session.commit()
+
+        raw = db.session.execute(text("SELECT problem_pickle FROM problem WHERE id = 1")).scalar()
+
+        # stored compressed
+        assert raw.startswith(MAGIC)
+        assert compressed_dill.loads(raw).objective_names == problem.objective_names
+
+        db.session.expunge_all()
+        stored = Problem.query.filter_by(id=1).first().problem_pickle
+
+        npt.assert_almost_equal(stored.objectives, problem.objectives)
+
+    def test_legacy_rows(self):
+        problem = self.get_problem()
+
+        # rows written before compression contain plain dill pickles
+        db.session.execute(
+            text(
+                "INSERT INTO problem (name, problem_type, problem_pickle, user_id, minimize) "
+                "VALUES ('legacy', 'Discrete', :pickle, 1, '[1, 1, 1]')"
+            ),
+            {"pickle": dill.dumps(problem)},
+        )
+        db.session.commit()
+
+        stored = Problem.query.filter_by(name="legacy").first().problem_pickle
+
+        npt.assert_almost_equal(stored.objectives, problem.objectives)
+        npt.assert_almost_equal(stored.decision_variables, problem.decision_variables)
+
+
+@pytest.mark.serialization
+class TestOutOfBandBuffers(TestCase):
+    SQLALCHEMY_DATABASE_URI = "sqlite:///test.db"
+    TESTING = True
+
+    def create_app(self):
+        app.config["SQLALCHEMY_DATABASE_URI"] = self.SQLALCHEMY_DATABASE_URI
+        app.config["TESTING"] = self.TESTING
+        return app
+
+    def setUp(self):
+        self.buffer_dir = tempfile.mkdtemp()
+        self.old_buffer_config = (app.config["PICKLE_BUFFER_DIR"], app.config["PICKLE_BUFFER_THRESHOLD"])
+        app.config["PICKLE_BUFFER_DIR"] = self.buffer_dir
+        app.config["PICKLE_BUFFER_THRESHOLD"] = 1024
+
+        db.drop_all()
+        db.create_all()
+
+        db.session.add(UserModel(username="test_user", password=UserModel.generate_hash("pass")))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+        app.config["PICKLE_BUFFER_DIR"], app.config["PICKLE_BUFFER_THRESHOLD"] = self.old_buffer_config
+        shutil.rmtree(self.buffer_dir)
+
+    def add_problem(self, name="discrete", n=2000, seed=1):
+        rng = np.random.default_rng(seed)
+        objective_names = ["f1", "f2", "f3"]
+        variable_names = ["x1", "x2"]
+        df = pd.DataFrame(rng.random((n, 5)), columns=objective_names + variable_names)
+        fs = df[objective_names].values
+        problem = DiscreteDataProblem(df, variable_names, objective_names, np.min(fs, axis=0), np.max(fs, axis=0))
+
+        db.session.add(Problem(name=name, problem_type="Discrete", problem_pickle=problem, user_id=1, minimize="[1, 1, 1]"))
+        db.session.commit()
+
+        return problem
+
+    def test_store_and_load(self):
+        problem = self.add_problem()
+
+        raw = db.session.execute(text("SELECT problem_pickle FROM problem WHERE name = 'discrete'")).scalar()
+        digests = referenced_buffers(raw)
+
+        # the arrays of the problem are stored in the buffer directory, not in the row
+        assert raw.startswith(BUFFERS_MAGIC)
+        assert len(digests) > 0
+        assert all(os.path.exists(BufferStore(self.buffer_dir).path(digest)) for digest in digests)
+        assert len(raw) < problem.objectives.nbytes
+
+        db.session.expunge_all()
+        stored = Problem.query.filter_by(name="discrete").first().problem_pickle
+
+        npt.assert_almost_equal(stored.objectives, problem.objectives)
+        npt.assert_almost_equal(stored.decision_variables, problem.decision_variables)
+
+        # the loaded arrays can be modified without touching the stored buffers
+        stored.objectives[0, 0] = 100.0
+        db.session.expunge_all()
+        npt.assert_almost_equal(Problem.query.filter_by(name="discrete").first().problem_pickle.objectives, problem.objectives)
+
+    def test_remove_unreferenced(self):
+        self.add_problem(name="kept", seed=1)
+        self.add_problem(name="deleted", seed=2)
+
+        store = BufferStore(self.buffer_dir)
+        n_buffers = len(os.listdir(self.buffer_dir))
+
+        Problem.query.filter_by(name="deleted").delete()
+        db.session.commit()
+
+        n_removed = store.remove_unreferenced(collect_referenced_buffers(), min_age=0)
+
+        assert 0 < n_removed < n_buffers
+
+        npt.assert_equal(Problem.query.filter_by(name="kept").first().problem_pickle.ideal.shape, (3,))
@@ -0,0 +1,73 @@
+import io
+
+import dill
+import numpy as np
+import numpy.testing as npt
+import pytest
+from app import app
+from flask_testing import TestCase
+from utilities.snapshots import DIGEST_SIZE, SnapshotError, read_snapshot, write_snapshot
+
+KEY = "snapshot-key"
+
+
+class Unpicklable:
+    """Raises an exception other than an UnpicklingError when unpickled."""
+
+    def __reduce__(self):
+        return (getattr, (object, "missing_attribute"))
+
+
+def snapshot_bytes(key=KEY, **kwargs) -> bytes:
+    kwargs = {"header": {"name": "enautilus"}, "method": np.arange(5), "last_request": None, "history": [], **kwargs}
+    return b"".join(write_snapshot(key=key, **kwargs))
+
+
+@pytest.mark.serialization
+class TestSnapshots(TestCase):
+    def create_app(self):
+        app.config["TESTING"] = True
+        return app
+
+    def test_round_trip(self):
+        history = [{"step_number": 1, "state": {"a": 1}}, {"step_number": 2, "state": {"a": 2}}]
+        snapshot = snapshot_bytes(history=history)
+
+        header, method, last_request, read_history = read_snapshot(io.BytesIO(snapshot), KEY)
+
+        assert header == {"name": "enautilus"}
+        npt.assert_array_equal(method, np.arange(5))
+        assert last_request is None
+        assert read_history == history
+
+    def test_unsigned_or_modified(self):
+        snapshot = snapshot_bytes()
+
+        # signed with another key
+        with pytest.raises(SnapshotError):
+            read_snapshot(io.BytesIO(snapshot), "another-key")
+
+        # without the signature
+        with pytest.raises(SnapshotError):
+            read_snapshot(io.BytesIO(snapshot[:-DIGEST_SIZE]), KEY)
+
+        # modified
+        modified = bytearray(snapshot)
+        modified[len(modified) // 2] ^= 0xFF
+        with pytest.raises(SnapshotError):
+            read_snapshot(io.BytesIO(bytes(modified)), KEY)
+
+        # a pickle is never loaded from an unsigned snapshot
+        with pytest.raises(SnapshotError):
+            read_snapshot(io.BytesIO(dill.dumps(Unpicklable())), KEY)
+
+        # too short to be signed
+        with pytest.raises(SnapshotError):
+            read_snapshot(io.BytesIO(b"short"), KEY)
+
+    def test_corrupted_payload(self):
+        # signed, but raising an AttributeError when unpickled
+        snapshot = snapshot_bytes(method=Unpicklable())
+
+        with pytest.raises(SnapshotError):
+            read_snapshot(io.BytesIO(snapshot), KEY)
@@ -0,0 +1,222 @@
+"""Admission control of the CPU-heavy endpoints, such as creating problems and methods, and starting and iterating
+methods.
+
+At most 'ADMISSION_CAPACITY' requests to the endpoints decorated with `admission_required` are served at a time by the
+process. Each user may have at most as many of them in flight as 'ADMISSION_USER_LIMITS' allows for the role of the
+user, and all the users of a role together at most as many as 'ADMISSION_ROLE_LIMITS' allows, so that, e.g., a class of
+guests cannot crowd out the registered users. The other requests wait in a queue of their user, and the free slots are
+given to the users in turns, so that a user sending many requests does not delay the requests of the other users by more
+than one request each.
+
+A request is rejected with 429 right away if its user already has 'ADMISSION_USER_QUEUE_SIZE' requests waiting, or if
+'ADMISSION_QUEUE_SIZE' requests wait in total, and after waiting for 'ADMISSION_TIMEOUT' seconds. The limits are kept
+in the memory of the process, so they apply per process serving the app.
+"""
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from models.user_models import GUEST_ROLE, USER_ROLE
+
+DEFAULT_CAPACITY = 8
+DEFAULT_USER_LIMITS = {USER_ROLE: 2, GUEST_ROLE: 1}
+DEFAULT_USER_QUEUE_SIZE = 4
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_TIMEOUT = 30.0
+
+
+class AdmissionRejected(Exception):
+    """A request was not admitted.
+
+    Args:
+        reason (str): Explains why.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionLimits:
+    """The limits of the admission, see the module docstring.
+
+    Args:
+        capacity (int, optional): The number of requests in flight in total, None for no limit.
+        user_limits (dict, optional): The number of requests in flight per user, by role. A role missing has no limit.
+        role_limits (dict, optional): The number of requests in flight per role. A role missing has no limit.
+        user_queue_size (int, optional): The number of requests waiting per user.
+        queue_size (int, optional): The number of requests waiting in total.
+        timeout (float, optional): The number of seconds a request may wait, None for no limit.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        user_limits: dict = None,
+        role_limits: dict = None,
+        user_queue_size: int = DEFAULT_USER_QUEUE_SIZE,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.capacity = capacity
+        self.user_limits = DEFAULT_USER_LIMITS if user_limits is None else user_limits
+        self.role_limits = {} if role_limits is None else role_limits
+        self.user_queue_size = user_queue_size
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, config) -> "AdmissionLimits":
+        return cls(
+            capacity=config.get("ADMISSION_CAPACITY", DEFAULT_CAPACITY),
+            user_limits=config.get("ADMISSION_USER_LIMITS"),
+            role_limits=config.get("ADMISSION_ROLE_LIMITS"),
+            user_queue_size=config.get("ADMISSION_USER_QUEUE_SIZE", DEFAULT_USER_QUEUE_SIZE),
+            queue_size=config.get("ADMISSION_QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
+            timeout=config.get("ADMISSION_TIMEOUT", DEFAULT_TIMEOUT),
+        )
+
+
+def _below(count: int, limit) -> bool:
+    return limit is None or count < limit
+
+
+class FairScheduler:
+    """Admits requests within the limits, giving the free slots to the waiting users in turns."""
+
+    def __init__(self):
+        self._ready = threading.Condition()
+        self._in_flight = 0
+        self._user_in_flight = {}
+        self._role_in_flight = {}
+        # the tickets of the waiting requests by user, in the order the users get their turns
+        self._waiting = OrderedDict()
+        self._n_waiting = 0
+
+    def _can_run(self, user, role, limits: AdmissionLimits) -> bool:
+        return (
+            _below(self._in_flight, limits.capacity)
+            and _below(self._user_in_flight.get(user, 0), limits.user_limits.get(role))
+            and _below(self._role_in_flight.get(role, 0), limits.role_limits.get(role))
+        )
+
+    def _start(self, user, role):
+        self._in_flight += 1
+        self._user_in_flight[user] = self._user_in_flight.get(user, 0) + 1
+        self._role_in_flight[role] = self._role_in_flight.get(role, 0) + 1
+
+    def _finish(self, user, role):
+        self._in_flight -= 1
+        self._user_in_flight[user] -= 1
+        if not self._user_in_flight[user]:
+            del self._user_in_flight[user]
+        self._role_in_flight[role] -= 1
+
+    def _dispatch(self, limits: AdmissionLimits):
+        """Give the free slots to the first waiting requests of the users in turns."""
+        dispatched = False
+
+        while True:
+            dispatched_in_turn = False
+
+            for user in list(self._waiting):
+                tickets = self._waiting[user]
+                ticket = tickets[0]
+
+                if not self._can_run(user, ticket["role"], limits):
+                    continue
+
+                tickets.popleft()
+                self._n_waiting -= 1
+                ticket["admitted"] = True
+                self._start(user, ticket["role"])
+                dispatched_in_turn = True
+
+                # the user goes to the end of the line
+                del self._waiting[user]
+                if tickets:
+                    self._waiting[user] = tickets
+
+            if not dispatched_in_turn:
+                break
+            dispatched = True
+
+        if dispatched:
+            self._ready.notify_all()
+
+    @contextmanager
+    def admit(self, user, role: str, limits: AdmissionLimits):
+        """Hold a slot for the duration of the context, waiting for one if needed.
+
+        Args:
+            user: Identifies the user, e.g., the role and the identity of the JWT.
+            role (str): The role of the user.
+            limits (AdmissionLimits): The limits.
+
+        Raises:
+            AdmissionRejected: The request was not admitted.
+        """
+        with self._ready:
+            if not self._waiting and self._can_run(user, role, limits):
+                self._start(user, role)
+            else:
+                tickets = self._waiting.get(user, ())
+                if not _below(len(tickets), limits.user_queue_size):
+                    raise AdmissionRejected("Too many of your requests are waiting to be served.")
+                if not _below(self._n_waiting, limits.queue_size):
+                    raise AdmissionRejected("Too many requests are waiting to be served.")
+
+                ticket = {"role": role, "admitted": False}
+                self._waiting.setdefault(user, deque()).append(ticket)
+                self._n_waiting += 1
+                self._dispatch(limits)
+
+                if not self._ready.wait_for(lambda: ticket["admitted"], timeout=limits.timeout):
+                    # gave up waiting
+                    tickets = self._waiting[user]
+                    tickets.remove(ticket)
+                    self._n_waiting -= 1
+                    if not tickets:
+                        del self._waiting[user]
+                    raise AdmissionRejected("The request waited too long to be served.")
+
+        try:
+            yield
+        finally:
+            with self._ready:
+                self._finish(user, role)
+                self._dispatch(limits)
+
+    def in_flight(self, user=None) -> int:
+        """The number of requests in flight, of a user or in total."""
+        with self._ready:
+            return self._in_flight if user is None else self._user_in_flight.get(user, 0)
+
+
+scheduler = FairScheduler()
+
+
+def admission_required(func):
+    """Admit the requests to a resource within the limits of the config of the app, responding with 429 otherwise.
+
+    To be applied after `jwt_required` and `role_required`, since the limits depend on the user and the role.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        role = get_jwt().get("role")
+        limits = AdmissionLimits.from_config(current_app.config)
+
+        try:
+            with scheduler.admit((role, get_jwt_identity()), role, limits):
+                return func(*args, **kwargs)
+        except AdmissionRejected as e:
+            print(f"DEBUG: {e}")
+            # too many requests
+            retry_after = current_app.config.get("ADMISSION_RETRY_AFTER", 1)
+            return {"message": e.reason}, 429, {"Retry-After": str(retry_after)}
+
+    return wrapper
@@ -0,0 +1,317 @@
+"""Serving the app with an ASGI server, e.g., `uvicorn asgi:application`, see asgi.py.
+
+The resources of the app stay as they are: each request is dispatched to the app in a pool of 'ASGI_WORKERS' threads,
+in which the database queries and the calls of the methods are made as when the app is served by a WSGI server. The
+connections are held by the event loop instead of the threads, so that a client costs a thread only while its request
+is being dispatched, not while it waits for the response to be streamed to it.
+
+The first 'ASGI_BODY_BUFFER' bytes of the body of a request are read by the event loop before the request is
+dispatched. A longer body, e.g., of a snapshot imported by /method/import, is streamed to the app as the app reads it,
+instead of being held in memory as a whole.
+
+The response iterables with `__aiter__`, e.g., the progress streams of `utilities.progress_streams.EventStream`, are
+iterated in the event loop, so that a client waiting for the progress of an iteration costs a coroutine. The other
+response iterables are iterated in the pool.
+
+Limits:
+    - A request holds a thread of the pool for as long as the app serves it, e.g., a long iteration of a method, and
+      while the rest of a body longer than 'ASGI_BODY_BUFFER' is being received from a slow client. When all the
+      threads are taken, the next requests wait for a free thread. The requests starting and iterating methods are
+      admitted at most 'ADMISSION_CAPACITY' at a time, see `utilities.admission`, which should be less than
+      'ASGI_WORKERS' to keep threads free for the other requests.
+    - The body of a request can be read only while the request is being dispatched, not while its response iterable
+      is iterated.
+    - Websockets are not used by the resources, and websocket connections are refused.
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 32
+DEFAULT_BODY_BUFFER = 64 * 1024
+
+
+def _latin1(value: str) -> str:
+    # WSGI passes the text of the request as bytes decoded with latin-1
+    return value.encode("utf-8").decode("latin-1")
+
+
+class RequestBody(io.RawIOBase):
+    """The body of a request streamed to the WSGI application, received from the event loop as it is read.
+
+    Args:
+        chunks (list): The chunks of the body already received.
+        receive (Callable): The ASGI receive callable of the request.
+        loop (asyncio.AbstractEventLoop): The event loop serving the request.
+    """
+
+    def __init__(self, chunks: list, receive, loop: asyncio.AbstractEventLoop):
+        self._buffer = bytearray(b"".join(chunks))
+        self._more = True
+        self._receive = receive
+        self._loop = loop
+        self._dispatched = True
+        self.disconnected = False
+
+    def readable(self) -> bool:
+        return True
+
+    def finish_dispatch(self):
+        """Stop receiving the body, called once the request has been dispatched."""
+        self._dispatched = False
+
+    def _receive_chunk(self) -> bool:
+        # called in a thread of the pool, False at the end of the body
+        if not self._more:
+            return False
+        if not self._dispatched:
+            raise OSError("The body of a request cannot be read after the request has been dispatched.")
+
+        message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+
+        if message["type"] == "http.disconnect":
+            self._more = False
+            self.disconnected = True
+            raise OSError("The client disconnected while sending the request.")
+
+        self._buffer += message.get("body", b"")
+        self._more = message.get("more_body", False)
+
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer and self._receive_chunk():
+            pass
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        del self._buffer[:size]
+
+        return size
+
+
+def build_environ(scope: dict, body) -> dict:
+    """Build the WSGI environ of an ASGI HTTP request.
+
+    Args:
+        scope (dict): The scope of the request.
+        body (bytes or RequestBody): The body of the request, received as a whole or streamed.
+
+    Returns:
+        dict: The environ.
+    """
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client")
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": _latin1(scope.get("root_path", "")),
+        "PATH_INFO": _latin1(scope["path"]),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0] if client else "",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        "asgi.scope": scope,
+    }
+
+    for name, value in scope.get("headers", ()):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+
+        if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = name
+        else:
+            key = f"HTTP_{name}"
+
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+    if isinstance(body, bytes):
+        environ["wsgi.input"] = io.BytesIO(body)
+        # the whole body has been read, e.g., of a request with chunked transfer encoding
+        environ.setdefault("CONTENT_LENGTH", str(len(body)))
+    else:
+        environ["wsgi.input"] = io.BufferedReader(body)
+        # the end of the body is given by the server, e.g., of a request with chunked transfer encoding
+        environ["wsgi.input_terminated"] = True
+
+    return environ
+
+
+class AsgiApp:
+    """An ASGI application serving a WSGI application, see the module docstring.
+
+    Args:
+        wsgi_app (Callable): The WSGI application, e.g., the Flask app.
+        workers (int, optional): The number of threads dispatching the requests to the WSGI application. Defaults to
+            DEFAULT_WORKERS.
+        body_buffer (int, optional): The number of bytes of the body of a request read before the request is
+            dispatched, the rest is streamed to the WSGI application. Defaults to DEFAULT_BODY_BUFFER.
+    """
+
+    def __init__(self, wsgi_app, workers: int = DEFAULT_WORKERS, body_buffer: int = DEFAULT_BODY_BUFFER):
+        self.wsgi_app = wsgi_app
+        self.workers = workers
+        self.body_buffer = body_buffer
+        self._executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="asgi_workers")
+        return self._executor
+
+    def close(self):
+        """Shut down the threads, waiting for the requests being dispatched."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def __call__(self, scope: dict, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._refuse_websocket(scope, receive, send)
+        else:
+            # the ASGI specification asks for an exception on the scopes not known
+            raise NotImplementedError(f"ASGI connections of type '{scope['type']}' are not supported.")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.get_running_loop().run_in_executor(None, self.close)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _refuse_websocket(scope: dict, receive, send):
+        # none of the resources uses websockets
+        if (await receive())["type"] != "websocket.connect":
+            return
+
+        if "websocket.http.response" in scope.get("extensions", {}):
+            await send(
+                {
+                    "type": "websocket.http.response.start",
+                    "status": 404,
+                    "headers": [(b"content-type", b"text/plain")],
+                }
+            )
+            await send({"type": "websocket.http.response.body", "body": b"Not Found"})
+        else:
+            # refused by the server with 403
+            await send({"type": "websocket.close", "code": 1008})
+
+    async def _http(self, scope: dict, receive, send):
+        chunks = []
+        received = 0
+        more_body = True
+
+        while more_body and received < self.body_buffer:
+            message = await receive()
+
+            if message["type"] == "http.disconnect":
+                return
+
+            chunks.append(message.get("body", b""))
+            received += len(chunks[-1])
+            more_body = message.get("more_body", False)
+
+        loop = asyncio.get_running_loop()
+        body = RequestBody(chunks, receive, loop) if more_body else b"".join(chunks)
+        started = {}
+
+        def start_response(status: str, headers: list, exc_info=None):
+            if exc_info is not None and started:
+                raise exc_info[1].with_traceback(exc_info[2])
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+        streamed = isinstance(body, RequestBody)
+
+        try:
+            app_iter = await loop.run_in_executor(
+                self.executor, self.wsgi_app, build_environ(scope, body), start_response
+            )
+        except Exception:
+            # e.g., the error of the body not received in full propagated by the app, there is nobody to respond to
+            if streamed and body.disconnected:
+                return
+            raise
+        finally:
+            if streamed:
+                body.finish_dispatch()
+
+        if streamed and body.disconnected:
+            # nobody to respond to
+            close = getattr(app_iter, "close", None)
+            if close is not None:
+                await loop.run_in_executor(self.executor, close)
+            return
+
+        body = asyncio.ensure_future(self._send_body(app_iter, started, send))
+        disconnect = asyncio.ensure_future(self._wait_disconnect(receive))
+
+        try:
+            await asyncio.wait({body, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # a client gone stops the streaming of the body, e.g., of a progress stream waiting for events
+            for task in (body, disconnect):
+                task.cancel()
+            await asyncio.gather(body, disconnect, return_exceptions=True)
+
+            close = getattr(app_iter, "close", None)
+            if close is not None:
+                await loop.run_in_executor(self.executor, close)
+
+        if not body.cancelled() and body.exception() is not None:
+            raise body.exception()
+
+    async def _send_body(self, app_iter, started: dict, send):
+        loop = asyncio.get_running_loop()
+
+        async def send_start():
+            if "sent" not in started:
+                started["sent"] = True
+                await send({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+
+        if hasattr(app_iter, "__aiter__"):
+            async for chunk in app_iter:
+                await send_start()
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        elif isinstance(app_iter, (list, tuple)):
+            await send_start()
+            for chunk in app_iter:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        else:
+            iterator = iter(app_iter)
+            finished = object()
+
+            while True:
+                chunk = await loop.run_in_executor(self.executor, next, iterator, finished)
+                if chunk is finished:
+                    break
+                await send_start()
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+        # start_response may be called as late as the first chunk
+        await send_start()
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while (await receive())["type"] != "http.disconnect":
+            pass
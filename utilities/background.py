@@ -0,0 +1,160 @@
+"""Background execution of work done ahead of the requests needing its results.
+
+The work runs on thread pools of the process, sized by config keys of the app, e.g., 'BACKGROUND_WORKERS', when a pool
+is first used. The results are kept in the memory of the process that computed them, so a request served by another
+process does not find them and must do the work itself.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+
+DEFAULT_WORKERS = 4
+
+# the pools of the process keyed by the config key of their size
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def get_executor(config_key: str = "BACKGROUND_WORKERS", default_workers: int = DEFAULT_WORKERS) -> ThreadPoolExecutor:
+    """Return a thread pool of the process, creating it on first use.
+
+    Args:
+        config_key (str, optional): The config key of the number of threads in the pool, also identifying the pool.
+            Defaults to 'BACKGROUND_WORKERS'.
+        default_workers (int, optional): The number of threads if not configured. Defaults to DEFAULT_WORKERS.
+
+    Returns:
+        ThreadPoolExecutor: The pool.
+    """
+    with _executor_lock:
+        executor = _executors.get(config_key)
+        if executor is None:
+            workers = current_app.config.get(config_key, default_workers) if has_app_context() else None
+            executor = ThreadPoolExecutor(
+                max_workers=workers or default_workers, thread_name_prefix=config_key.lower()
+            )
+            _executors[config_key] = executor
+
+        return executor
+
+
+def submit_to(executor: ThreadPoolExecutor, fn, *args, **kwargs) -> Future:
+    """Run a function in a pool, within the app context of the caller if any.
+
+    Args:
+        executor (ThreadPoolExecutor): The pool, see `get_executor`.
+        fn: The function.
+        args: Positional arguments of the function.
+        kwargs: Keyword arguments of the function.
+
+    Returns:
+        Future: The future result of the function.
+    """
+    app = current_app._get_current_object() if has_app_context() else None
+
+    def run():
+        if app is None:
+            return fn(*args, **kwargs)
+        with app.app_context():
+            return fn(*args, **kwargs)
+
+    return executor.submit(run)
+
+
+def submit(fn, *args, **kwargs) -> Future:
+    """Run a function in the background, within the app context of the caller if any.
+
+    Args:
+        fn: The function.
+        args: Positional arguments of the function.
+        kwargs: Keyword arguments of the function.
+
+    Returns:
+        Future: The future result of the function.
+    """
+    return submit_to(get_executor(), fn, *args, **kwargs)
+
+
+def _cancel(result):
+    """Cancel the work of a pending result, see `PendingResults.put`, if it has not started."""
+    result = result[0] if isinstance(result, tuple) else result
+    for future in result.values() if isinstance(result, dict) else (result,):
+        future.cancel()
+
+
+class PendingResults:
+    """Results of background work waiting to be picked up, keyed by, e.g., the id of a method session.
+
+    Args:
+        max_size (int, optional): The maximum number of results kept. When exceeded, the oldest result is dropped and
+            its work cancelled if it has not started. Defaults to 256.
+        ttl (float, optional): How long a result is kept in seconds, after which it is dropped as when the maximum
+            size is exceeded. Defaults to None, for no limit.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        # oldest first
+        self._results = OrderedDict()
+        # the times the results were added
+        self._added = {}
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        """Drop the results older than the ttl. The lock must be held."""
+        if self.ttl is None:
+            return
+
+        now = time.monotonic()
+        while self._results:
+            key = next(iter(self._results))
+            if now - self._added[key] < self.ttl:
+                break
+            del self._added[key]
+            _cancel(self._results.pop(key))
+
+    def put(self, key, result):
+        """Add a pending result.
+
+        Args:
+            key: The key of the result.
+            result: The pending result, a `Future` or a dict of futures, or a tuple starting with either.
+        """
+        with self._lock:
+            self._expire()
+            # replaced results are moved to the end, keeping the results in the order they were added
+            self._results.pop(key, None)
+            self._results[key] = result
+            self._added[key] = time.monotonic()
+            while len(self._results) > self.max_size:
+                dropped_key, dropped = self._results.popitem(last=False)
+                del self._added[dropped_key]
+                _cancel(dropped)
+
+    def pop(self, key):
+        """Remove and return a pending result.
+
+        Args:
+            key: The key of the result.
+
+        Returns:
+            The pending result, or None if there is none, e.g., it was dropped.
+        """
+        with self._lock:
+            self._expire()
+            self._added.pop(key, None)
+            return self._results.pop(key, None)
+
+    def __contains__(self, key):
+        with self._lock:
+            self._expire()
+            return key in self._results
+
+    def __len__(self):
+        with self._lock:
+            self._expire()
+            return len(self._results)
@@ -0,0 +1,227 @@
+"""Compute budgets of the iterations of EAs.
+
+An iteration of an EA runs as many generations as the method was created with (`n_gen_per_iter`, 100 by default in
+desdeo_emo), however long they take. A budget limits an iteration by the number of generations, the number of function
+evaluations, or the wall-clock time, and may stop it early once its population stagnates, so that the response time of
+an iteration can be traded against the quality of its solutions. The iteration stops between two generations, as if it
+was finished, so the generations run so far are kept and the method can be iterated again as usual.
+
+The budget is checked before each generation, see `utilities.iteration_hooks.observe_generations`. A generation is not
+started if the evaluations or the time of the previous generation would take the iteration over the budget. The
+budget is given as a dict with the keys:
+
+    max_generations (int): The number of generations, at most the generations per iteration the method was created
+        with. When given to /method/create, the method is created with this many generations per iteration.
+    max_evaluations (int): The number of function evaluations.
+    max_time_ms (float): The number of milliseconds.
+    stagnation_generations (int): Stop after this many consecutive generations in which the ideal and nadir points and
+        the mean of the objective vectors of the population changed by less than 'stagnation_tolerance', relative to
+        the extent of the population.
+    stagnation_tolerance (float): See above. Defaults to DEFAULT_STAGNATION_TOLERANCE.
+
+The iterations of methods without generations, e.g., NIMBUS, are not limited by budgets.
+"""
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from utilities.iteration_hooks import has_generations, observe_generations
+
+DEFAULT_STAGNATION_TOLERANCE = 1e-4
+
+# the number of points of the population compared when checking for stagnation
+STAGNATION_FRONT_SIZE = 100
+
+BUDGET_KEYS = (
+    "max_generations",
+    "max_evaluations",
+    "max_time_ms",
+    "stagnation_generations",
+    "stagnation_tolerance",
+)
+
+
+def _check_number(data: dict, key: str, integer: bool, minimum: float):
+    value = data.get(key)
+
+    if value is None:
+        return None
+
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or (integer and value != int(value)):
+        raise ValueError(f"The budget '{key}' must be {'an integer' if integer else 'a number'}.")
+    if value < minimum:
+        raise ValueError(f"The budget '{key}' must be at least {minimum}.")
+
+    return int(value) if integer else float(value)
+
+
+class IterationBudget:
+    """The compute budget of an iteration, see the module docstring.
+
+    Args:
+        max_generations (int, optional): The number of generations. Defaults to None, in which case not limited.
+        max_evaluations (int, optional): The number of function evaluations. Defaults to None.
+        max_time_ms (float, optional): The number of milliseconds. Defaults to None.
+        stagnation_generations (int, optional): The number of stagnating generations. Defaults to None, in which case
+            the iteration is not stopped early.
+        stagnation_tolerance (float, optional): The relative change below which a generation stagnates. Defaults to
+            DEFAULT_STAGNATION_TOLERANCE.
+    """
+
+    def __init__(
+        self,
+        max_generations: int = None,
+        max_evaluations: int = None,
+        max_time_ms: float = None,
+        stagnation_generations: int = None,
+        stagnation_tolerance: float = DEFAULT_STAGNATION_TOLERANCE,
+    ):
+        self.max_generations = max_generations
+        self.max_evaluations = max_evaluations
+        self.max_time_ms = max_time_ms
+        self.stagnation_generations = stagnation_generations
+        self.stagnation_tolerance = stagnation_tolerance
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IterationBudget":
+        """Read a budget as given in a request.
+
+        Args:
+            data (dict): The budget, see the module docstring. None for no budget.
+
+        Raises:
+            ValueError: The budget is not valid, the message explains why.
+
+        Returns:
+            IterationBudget: The budget.
+        """
+        if data is None:
+            return cls()
+        if not isinstance(data, dict):
+            raise ValueError("The budget must be an object.")
+
+        unknown = [key for key in data if key not in BUDGET_KEYS]
+        if unknown:
+            raise ValueError(f"Unknown budget keys {unknown}. The budget keys are {list(BUDGET_KEYS)}.")
+
+        tolerance = _check_number(data, "stagnation_tolerance", integer=False, minimum=0)
+
+        return cls(
+            max_generations=_check_number(data, "max_generations", integer=True, minimum=0),
+            max_evaluations=_check_number(data, "max_evaluations", integer=True, minimum=1),
+            max_time_ms=_check_number(data, "max_time_ms", integer=False, minimum=0),
+            stagnation_generations=_check_number(data, "stagnation_generations", integer=True, minimum=1),
+            stagnation_tolerance=DEFAULT_STAGNATION_TOLERANCE if tolerance is None else tolerance,
+        )
+
+    def to_dict(self) -> dict:
+        """The budget as a dict of the keys set, to be read by `from_dict`."""
+        budget = {key: getattr(self, key) for key in BUDGET_KEYS if getattr(self, key) is not None}
+
+        if self.stagnation_generations is None or self.stagnation_tolerance == DEFAULT_STAGNATION_TOLERANCE:
+            budget.pop("stagnation_tolerance", None)
+
+        return budget
+
+    def override(self, other: "IterationBudget") -> "IterationBudget":
+        """Override the limits of the budget with the limits set in another budget.
+
+        Args:
+            other (IterationBudget): The other budget, e.g., of a request overriding the budget of its method session.
+
+        Returns:
+            IterationBudget: A new budget.
+        """
+        return IterationBudget.from_dict({**self.to_dict(), **other.to_dict()})
+
+    @property
+    def limited(self) -> bool:
+        return any(
+            limit is not None
+            for limit in (self.max_generations, self.max_evaluations, self.max_time_ms, self.stagnation_generations)
+        )
+
+    @property
+    def front_size(self) -> int:
+        """The number of points of the population needed in the progress to check for stagnation."""
+        return STAGNATION_FRONT_SIZE if self.stagnation_generations is not None else 0
+
+    def observer(self):
+        """An observer of the generations of an iteration stopping it once over the budget, see
+        `utilities.iteration_hooks.observe_generations`. The time of the iteration is counted from this call.
+
+        Returns:
+            Callable: The observer.
+        """
+        started = time.monotonic()
+        first_evaluations = None
+        previous_evaluations, previous_time, previous_summary = None, started, None
+        stagnating = 0
+
+        def within_budget(progress) -> bool:
+            nonlocal first_evaluations, previous_evaluations, previous_time, previous_summary, stagnating
+
+            now = time.monotonic()
+            evaluations = progress["evaluations"]
+
+            # the cost of the next generation is estimated by the cost of the previous one
+            if previous_evaluations is None:
+                first_evaluations = evaluations
+                last_evaluations, last_time = 0, 0.0
+            else:
+                last_evaluations, last_time = evaluations - previous_evaluations, now - previous_time
+            previous_evaluations, previous_time = evaluations, now
+
+            if self.max_generations is not None and progress["generation"] >= self.max_generations:
+                return False
+
+            if (
+                self.max_evaluations is not None
+                and evaluations - first_evaluations + last_evaluations > self.max_evaluations
+            ):
+                return False
+
+            if self.max_time_ms is not None and (now - started + last_time) * 1000 > self.max_time_ms:
+                return False
+
+            if self.stagnation_generations is not None and progress.get("front") is not None:
+                summary = _population_summary(progress["front"])
+
+                if previous_summary is not None and summary.shape == previous_summary.shape:
+                    scale = np.maximum(summary[1] - summary[0], np.finfo(float).eps)
+                    change = np.max(np.abs(summary - previous_summary) / scale)
+                    stagnating = stagnating + 1 if change < self.stagnation_tolerance else 0
+                previous_summary = summary
+
+                if stagnating >= self.stagnation_generations:
+                    return False
+
+            return True
+
+        return within_budget
+
+
+def _population_summary(front) -> np.ndarray:
+    """The ideal point, the nadir point, and the mean of the objective vectors of a population, one per row."""
+    front = np.atleast_2d(np.asarray(front, dtype=float))
+    return np.vstack((front.min(axis=0), front.max(axis=0), front.mean(axis=0)))
+
+
+@contextmanager
+def within_budget(method, budget: IterationBudget):
+    """Limit the iterations of an EA run within the context by a budget.
+
+    Args:
+        method: The method. Nothing is limited if the method does not iterate in generations.
+        budget (IterationBudget): The budget, None for no budget.
+
+    Yields:
+        The method.
+    """
+    if budget is None or not budget.limited or not has_generations(method):
+        yield method
+        return
+
+    with observe_generations(method, budget.observer(), budget.front_size):
+        yield method
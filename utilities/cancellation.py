@@ -0,0 +1,143 @@
+"""Cancellation and deadlines of method iterations.
+
+An iteration cannot be interrupted at any point, but it is checked for cancellation at the boundaries of its steps:
+before each generation of EAs and before each evaluation of the problem, e.g., in each step of the solver of NIMBUS, see
+`utilities.iteration_hooks.interruptible`. A cancelled iteration raises `IterationCancelled` at the next check, and
+the method session is left as it was before the iteration, since nothing is committed.
+
+The iterations running in the process are registered in `running_iterations`, so that they can be cancelled by another
+request.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class IterationCancelled(Exception):
+    """An iteration was cancelled or ran past its deadline.
+
+    Args:
+        reason (str): Either 'cancelled' or 'deadline'.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def deadline_after(timeout: float = None, max_timeout: float = None) -> float:
+    """Compute the deadline of an iteration.
+
+    Args:
+        timeout (float, optional): The number of seconds the iteration may take, as requested. Defaults to None.
+        max_timeout (float, optional): The maximum number of seconds any iteration may take. Defaults to None.
+
+    Returns:
+        float: The deadline as seconds since the epoch, or None if the iteration may take any time.
+    """
+    timeouts = [t for t in (timeout, max_timeout) if t is not None]
+
+    if not timeouts:
+        return None
+
+    return time.time() + min(timeouts)
+
+
+class CancelToken:
+    """Checked by an iteration to find out whether it should stop.
+
+    Args:
+        deadline (float, optional): The deadline of the iteration as seconds since the epoch. Defaults to None, in which
+            case the iteration has no deadline.
+    """
+
+    def __init__(self, deadline: float = None):
+        self.deadline = deadline
+        self._cancelled = threading.Event()
+        self._callbacks = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Cancel the iteration, it stops at its next check."""
+        self._cancelled.set()
+
+        for callback in list(self._callbacks):
+            callback()
+
+    def on_cancel(self, callback):
+        """Call a function when the token is cancelled, e.g., to pass the cancellation to a worker process.
+
+        Args:
+            callback (Callable[[], None]): The function.
+        """
+        self._callbacks.append(callback)
+
+        if self.cancelled:
+            callback()
+
+    def check(self):
+        """Stop the iteration if it has been cancelled or has run past its deadline.
+
+        Raises:
+            IterationCancelled: The iteration should stop.
+        """
+        if self._cancelled.is_set():
+            raise IterationCancelled("cancelled")
+        if self.deadline is not None and time.time() > self.deadline:
+            raise IterationCancelled("deadline")
+
+
+class RunningIterations:
+    """The tokens of the iterations running in the process, keyed by the id of the method session."""
+
+    def __init__(self):
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def register(self, method_id: int, token: CancelToken):
+        """Register the token of an iteration for the duration of the context.
+
+        Args:
+            method_id (int): The id of the method session being iterated.
+            token (CancelToken): The token of the iteration.
+
+        Yields:
+            CancelToken: The token.
+        """
+        with self._lock:
+            self._tokens[method_id] = token
+        try:
+            yield token
+        finally:
+            with self._lock:
+                if self._tokens.get(method_id) is token:
+                    del self._tokens[method_id]
+
+    def cancel(self, method_id: int) -> bool:
+        """Cancel the iteration of a method session running in the process.
+
+        Args:
+            method_id (int): The id of the method session.
+
+        Returns:
+            bool: True if an iteration was running.
+        """
+        with self._lock:
+            token = self._tokens.get(method_id)
+
+        if token is None:
+            return False
+
+        token.cancel()
+
+        return True
+
+    def __contains__(self, method_id):
+        return method_id in self._tokens
+
+
+running_iterations = RunningIterations()
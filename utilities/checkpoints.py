@@ -0,0 +1,169 @@
+"""Checkpoints of long iterations of EAs.
+
+An iteration of an EA may run for a long time, and everything computed during it is lost if the process running it
+dies, since the method is committed to the database only after the iteration. While an iteration runs, the state of the
+EA is therefore written to a file in local storage every 'CHECKPOINT_INTERVAL' seconds, between two generations. The
+file is removed once the iteration has finished, whether it succeeded or not, so a checkpoint left behind belongs to an
+iteration interrupted by the death of its process.
+
+When the same response is given again to the same version of the method session, e.g., the request is sent again or its
+job is run again, the iteration is resumed from the checkpoint by `resume_iteration` instead of starting over.
+"""
+import hashlib
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+import dill
+import simplejson as json
+
+from utilities.iteration_hooks import observe_generations, unhooked
+from utilities.serialization import compress, decompress
+
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+
+def checkpoint_path(directory: str, method_id: int) -> str:
+    """The path of the checkpoint of a method session.
+
+    Args:
+        directory (str): The directory of the checkpoints.
+        method_id (int): The id of the method session.
+
+    Returns:
+        str: The path.
+    """
+    return os.path.join(directory, f"method_{method_id}{CHECKPOINT_SUFFIX}")
+
+
+def response_digest(response) -> str:
+    """Digest a response of the decision maker as received, to tell whether an iteration is run for the same response.
+
+    Args:
+        response: The response, as parsed from JSON.
+
+    Returns:
+        str: The sha256 digest as hex.
+    """
+    return hashlib.sha256(json.dumps(response, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class Checkpoint:
+    """The checkpoint of an iteration of a method session.
+
+    Args:
+        path (str): The path of the file of the checkpoint, see `checkpoint_path`.
+        interval (float): The minimum number of seconds between writing the checkpoint.
+        header (dict): Identifies the iteration, e.g., the version of the method session and the digest of the
+            response. A checkpoint is resumed only by an iteration with the same header.
+    """
+
+    def __init__(self, path: str, interval: float, header: dict):
+        self.path = path
+        self.interval = interval
+        self.header = header
+
+    def write(self, method, progress: dict):
+        """Write the checkpoint, replacing the previous one atomically.
+
+        Args:
+            method: The EA between two generations.
+            progress (dict): The progress of the iteration.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # the hooks installed for the iteration are not a part of the state of the method
+        with unhooked(method):
+            data = compress(dill.dumps({"header": self.header, "progress": dict(progress), "method": method}))
+
+        temporary = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+
+    def read(self):
+        """Read the checkpoint if it belongs to the same iteration. A checkpoint of another iteration is removed.
+
+        Returns:
+            (tuple): tuple containing:
+                The EA between two generations.
+                (dict): The progress of the iteration when the checkpoint was written.
+            or None if there is no checkpoint of the iteration.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                checkpoint = dill.loads(decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"DEBUG: {e}")
+            # corrupted, e.g., written by an incompatible version
+            self.remove()
+            return None
+
+        if checkpoint["header"] != self.header:
+            # the method has been modified since, or the response is different
+            self.remove()
+            return None
+
+        return checkpoint["method"], checkpoint["progress"]
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def checkpoint_generations(method, checkpoint: Checkpoint):
+    """Write checkpoints of the iterations of an EA run within the context.
+
+    Args:
+        method: The method. Nothing is written if the method does not iterate in generations.
+        checkpoint (Checkpoint): The checkpoint, None to not write checkpoints.
+
+    Yields:
+        The method.
+    """
+    if checkpoint is None:
+        yield method
+        return
+
+    last_written = time.monotonic()
+
+    def write_checkpoint(progress):
+        nonlocal last_written
+
+        now = time.monotonic()
+        if now - last_written >= checkpoint.interval:
+            checkpoint.write(method, progress)
+            last_written = time.monotonic()
+
+        return True
+
+    with observe_generations(method, write_checkpoint):
+        yield method
+
+
+def resume_iteration(method):
+    """Continue an iteration of an EA from a checkpoint, as `desdeo_emo.EAs.BaseEA.iterate` would.
+
+    Args:
+        method: The EA, as read from the checkpoint.
+
+    Returns:
+        The requests of the EA after the iteration.
+    """
+    while method.continue_iteration():
+        method._next_gen()
+
+    method._iteration_counter += 1
+    method.post_iteration()
+
+    return method.requests()
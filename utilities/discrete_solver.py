@@ -0,0 +1,247 @@
+"""Chunked minimization of scalarized discrete problems, such as the ASF projections of discrete NIMBUS, the reference
+point method, and NAUTILUS Navigator.
+
+The discrete methods find the row of the objective matrix of a `DiscreteDataProblem` minimizing a scalarization, e.g.,
+an achievement scalarizing function (ASF), with `desdeo_tools.solver.DiscreteMinimizer`, which scalarizes the whole
+matrix at once: each arithmetic step of the ASF allocates a temporary matrix as large as the objective matrix, and the
+constraints copy it. Within `chunked_discrete_minimizations`, the matrix is scalarized instead in chunks of
+'DISCRETE_CHUNK_SIZE' rows, small enough for the temporaries to stay in the CPU caches, and only the minimum of each
+chunk is kept. With 'DISCRETE_SOLVER_WORKERS' > 1, the chunks are scalarized in a pool of that many threads, numpy
+releasing the GIL during the arithmetic.
+
+The ASFs used by the methods, `PointMethodASF` and `ReferencePointASF`, are computed by kernels writing into buffers
+allocated once per chunk size, the other scalarizations are called with each chunk. Either way, the values are computed
+with the same operations as by the scalarization itself, so the minimum found, and the first row attaining it, are the
+same as those found by `DiscreteMinimizer.minimize`.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+from desdeo_tools.solver import DiscreteMinimizer
+from desdeo_tools.solver.ScalarSolver import ScalarSolverException
+from flask import current_app, has_app_context
+
+# small enough for the temporaries of a chunk of a few objectives to stay in the CPU caches
+DEFAULT_CHUNK_SIZE = 16384
+
+_minimize = DiscreteMinimizer.minimize
+
+# the settings of the minimizations of the thread, set within `chunked_discrete_minimizations`
+_local = threading.local()
+
+_executor = None
+_executor_size = 0
+_executor_lock = threading.Lock()
+
+
+def discrete_solver_settings() -> tuple:
+    """Read the settings of the chunked minimizations from the config of the current app.
+
+    Returns:
+        (tuple): tuple containing:
+            (int): The number of rows in a chunk, 0 if the minimizations are made as usual.
+            (int): The number of threads scalarizing the chunks.
+    """
+    if not has_app_context():
+        return 0, 1
+
+    return (
+        current_app.config.get("DISCRETE_CHUNK_SIZE", 0) or 0,
+        current_app.config.get("DISCRETE_SOLVER_WORKERS", 1) or 1,
+    )
+
+
+def _get_executor(workers: int) -> ThreadPoolExecutor:
+    global _executor, _executor_size
+
+    with _executor_lock:
+        if _executor is None or _executor_size != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="discrete_solver")
+            _executor_size = workers
+
+        return _executor
+
+
+def _point_method_kernel(asf, reference_point):
+    """Compute `PointMethodASF` in buffers, with the same operations as `PointMethodASF.__call__`."""
+    scale = asf.nadir - (asf.ideal - asf.rho)
+
+    def kernel(f: np.ndarray, buffers: np.ndarray) -> np.ndarray:
+        buffer = buffers[0]
+
+        np.subtract(f, reference_point, out=buffer)
+        np.divide(buffer, scale, out=buffer)
+        max_term = np.max(buffer, axis=1)
+
+        np.divide(f, scale, out=buffer)
+        sum_term = asf.rho_sum * np.sum(buffer, axis=1)
+
+        return max_term + sum_term
+
+    return kernel
+
+
+def _reference_point_kernel(asf, reference_point):
+    """Compute `ReferencePointASF` in buffers, with the same operations as `ReferencePointASF.__call__`."""
+    scale = asf.nadir - asf.utopian_point
+
+    def kernel(f: np.ndarray, buffers: np.ndarray) -> np.ndarray:
+        difference, buffer = buffers
+
+        np.subtract(f, reference_point, out=difference)
+        np.multiply(asf.preferential_factors, difference, out=buffer)
+        max_term = np.max(buffer, axis=-1)
+
+        np.divide(difference, scale, out=buffer)
+        sum_term = asf.rho * np.sum(buffer, axis=-1)
+
+        return max_term + sum_term
+
+    return kernel
+
+
+_KERNELS = {"PointMethodASF": _point_method_kernel, "ReferencePointASF": _reference_point_kernel}
+
+
+def scalarizing_kernel(scalarizer):
+    """A function scalarizing a chunk of objective vectors using two buffers of the shape of the chunk.
+
+    Args:
+        scalarizer (DiscreteScalarizer): The scalarization.
+
+    Returns:
+        Callable: Called with the chunk and the buffers, stacked in an array, returning the scalar values of the chunk.
+    """
+    asf = getattr(scalarizer, "_scalarizer", None)
+    args = getattr(scalarizer, "_scalarizer_args", None) or {}
+    make_kernel = _KERNELS.get(type(asf).__name__)
+
+    if make_kernel is not None and set(args) == {"reference_point"}:
+        reference_point = np.asarray(args["reference_point"], dtype=float)
+        if not np.any(np.isnan(reference_point)):
+            return make_kernel(asf, reference_point)
+
+    return lambda f, buffers: scalarizer(f)
+
+
+def _chunk_minimum(kernel, vectors: np.ndarray, start: int, stop: int, constraint_evaluator, buffers: dict) -> tuple:
+    """The index of the first of the rows from start to stop attaining their minimum scalar value, or None if they
+    are all nan, the minimum, and whether any of the rows adheres to the constraints."""
+    chunk = vectors[start:stop]
+    chunk_buffers = buffers.get(len(chunk))
+    if chunk_buffers is None:
+        chunk_buffers = buffers[len(chunk)] = np.empty((2, *chunk.shape), dtype=float)
+
+    values = np.asarray(kernel(chunk, chunk_buffers), dtype=float)
+    feasible = True
+
+    if constraint_evaluator is not None:
+        # as the rows violating the constraints are set to nan by DiscreteMinimizer
+        adheres = constraint_evaluator(chunk)
+        feasible = bool(np.any(adheres))
+        values = np.where(adheres, values, np.nan)
+
+    if np.all(np.isnan(values)):
+        return None, np.nan, feasible
+
+    index = np.nanargmin(values)
+
+    return start + index, values[index], feasible
+
+
+def chunked_minimize(
+    scalarizer, vectors: np.ndarray, constraint_evaluator=None, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1
+) -> dict:
+    """Find the row of vectors minimizing a scalarization, in chunks, see the module docstring.
+
+    Args:
+        scalarizer (DiscreteScalarizer): The scalarization.
+        vectors (np.ndarray): The objective vectors, one per row.
+        constraint_evaluator (Callable, optional): Returns whether each row adheres to the constraints. Defaults to
+            None.
+        chunk_size (int, optional): The number of rows in a chunk. Defaults to DEFAULT_CHUNK_SIZE.
+        workers (int, optional): The number of threads scalarizing the chunks. Defaults to 1.
+
+    Raises:
+        ScalarSolverException: None of the rows adhere to the constraints.
+        ValueError: All the scalar values are nan.
+
+    Returns:
+        dict: The index of the row found ('x'), its scalar value ('fun'), and 'success', as returned by
+            `DiscreteMinimizer.minimize`.
+    """
+    vectors = np.ascontiguousarray(np.atleast_2d(vectors), dtype=float)
+    kernel = scalarizing_kernel(scalarizer)
+    bounds = [(start, min(start + chunk_size, len(vectors))) for start in range(0, len(vectors), chunk_size)]
+
+    if workers > 1 and len(bounds) > 1:
+        local = threading.local()
+
+        def minimum(start_stop):
+            if not hasattr(local, "buffers"):
+                local.buffers = {}
+            return _chunk_minimum(kernel, vectors, *start_stop, constraint_evaluator, local.buffers)
+
+        minima = list(_get_executor(workers).map(minimum, bounds))
+    else:
+        buffers = {}
+        minima = [_chunk_minimum(kernel, vectors, start, stop, constraint_evaluator, buffers) for start, stop in bounds]
+
+    if not any(feasible for _, _, feasible in minima):
+        raise ScalarSolverException("None of the supplied vectors adhere to the given constraint function.")
+
+    min_index, min_value = None, np.nan
+    for index, value, _ in minima:
+        # the first row attaining the minimum, as np.nanargmin
+        if index is not None and (min_index is None or value < min_value):
+            min_index, min_value = index, value
+
+    if min_index is None:
+        raise ValueError("All-NaN slice encountered")
+
+    return {"x": np.intp(min_index), "fun": min_value, "success": True}
+
+
+def _chunked_discrete_minimize(minimizer, vectors):
+    """Replaces `DiscreteMinimizer.minimize`, minimizing in chunks within `chunked_discrete_minimizations`."""
+    settings = getattr(_local, "settings", None)
+
+    if settings is None:
+        return _minimize(minimizer, vectors)
+
+    chunk_size, workers = settings
+
+    return chunked_minimize(minimizer._scalarizer, vectors, minimizer._constraint_evaluator, chunk_size, workers)
+
+
+@contextmanager
+def chunked_discrete_minimizations(chunk_size: int, workers: int = 1):
+    """Minimize the scalarized discrete problems in chunks within the context, see the module docstring.
+
+    Only the minimizations made by the thread entering the context are made in chunks.
+
+    Args:
+        chunk_size (int): The number of rows in a chunk, 0 to minimize as usual.
+        workers (int, optional): The number of threads scalarizing the chunks. Defaults to 1.
+
+    Yields:
+        tuple: The settings of the minimizations.
+    """
+    if not chunk_size:
+        yield chunk_size, workers
+        return
+
+    if DiscreteMinimizer.minimize is not _chunked_discrete_minimize:
+        DiscreteMinimizer.minimize = _chunked_discrete_minimize
+
+    enclosing = getattr(_local, "settings", None)
+    _local.settings = (chunk_size, workers)
+
+    try:
+        yield chunk_size, workers
+    finally:
+        _local.settings = enclosing
@@ -0,0 +1,415 @@
+"""An island model of EAs, running several populations of the same EA in parallel processes.
+
+A single population of an EA is evolved by one process, so it uses one core. `IslandModel` evolves several populations,
+the islands, at the same time, each in a process of its own while the method is iterated. Every `migration_interval`
+generations, the islands exchange their elites: each island sends `n_migrants` of its non-dominated individuals to the
+next island in a ring, where they compete with the other individuals in the next generation. The non-dominated
+individuals of all the islands are merged into one front, shown to the decision maker as the population of the method.
+
+Towards the rest of the app, the model behaves like the EA of its islands, e.g., RVEA: it is started and iterated the
+same way, the preferences of the decision maker are given to every island, and its iterations run in steps which can
+be observed, interrupted, and checkpointed like the generations of EAs, see `utilities.iteration_hooks`. One step of the
+model is `migration_interval` generations of each island followed by a migration.
+
+The processes of the islands are started on the first step of an iteration, and the islands are shipped back to the
+calling process when the iteration ends, so that the model is pickled as a whole. With `processes` set to 1 or less, the
+islands are evolved in turns by the calling process instead.
+"""
+import multiprocessing
+
+import dill
+import numpy as np
+from desdeo_tools.utilities import non_dominated
+
+from utilities.iteration_hooks import unhooked
+
+DEFAULT_ISLANDS = 4
+DEFAULT_MIGRATION_INTERVAL = 20
+DEFAULT_MIGRANTS = 4
+
+
+class MergedPopulation:
+    """The merged front of the islands, read as the population of the model.
+
+    Args:
+        problem: The problem of the first island, holding the ideal and nadir points shown.
+        individuals (np.ndarray): The decision vectors of the front.
+        objectives (np.ndarray): The objective vectors of the front.
+    """
+
+    def __init__(self, problem, individuals: np.ndarray, objectives: np.ndarray):
+        self.problem = problem
+        self.individuals = individuals
+        self.objectives = objectives
+
+    @classmethod
+    def merge(cls, problem, fronts: list) -> "MergedPopulation":
+        """Merge the fronts of the islands into one front without duplicates.
+
+        Args:
+            problem: The problem.
+            fronts (list): The decision and objective vectors of the fronts of the islands as tuples.
+
+        Returns:
+            MergedPopulation: The merged front.
+        """
+        individuals = np.vstack([front[0] for front in fronts])
+        objectives = np.vstack([front[1] for front in fronts])
+
+        _, unique = np.unique(individuals, axis=0, return_index=True)
+        unique = np.sort(unique)
+        individuals, objectives = individuals[unique], objectives[unique]
+
+        front = non_dominated(objectives * problem._max_multiplier)
+
+        return cls(problem, individuals[front], objectives[front])
+
+
+def island_front(island) -> tuple:
+    """The non-dominated individuals of an island.
+
+    Args:
+        island: The EA of the island.
+
+    Returns:
+        (tuple): The decision vectors and the objective vectors.
+    """
+    population = island.population
+    front = population.non_dominated_objectives()
+
+    return population.individuals[front], population.objectives[front]
+
+
+def evolve_island(island, generations: int, migrants: np.ndarray, n_migrants: int) -> dict:
+    """Take the migrants in and run generations of an island, as long as its iteration continues.
+
+    Args:
+        island: The EA of the island, modified in place.
+        generations (int): The maximum number of generations run.
+        migrants (np.ndarray): The decision vectors of the migrants, evaluated and added to the population, or None.
+        n_migrants (int): The number of elites sent to the next island.
+
+    Returns:
+        dict: The elites sent to the next island, the front of the island, the counters of the island, and whether its
+            iteration continues.
+    """
+    if migrants is not None and len(migrants) and island.continue_iteration():
+        # the migrants compete with the rest of the population in the next generation
+        island.population.add(migrants)
+        island._function_evaluation_count += len(migrants)
+
+    for _ in range(generations):
+        if not island.continue_iteration():
+            break
+        island._next_gen()
+
+    front = island_front(island)
+    chosen = np.random.choice(len(front[0]), size=min(n_migrants, len(front[0])), replace=False)
+
+    return {
+        "elites": front[0][chosen],
+        "front": front,
+        "generation": island._gen_count_in_curr_iteration,
+        "generations_total": island._current_gen_count,
+        "evaluations": island._function_evaluation_count,
+        "continues": island.continue_iteration(),
+    }
+
+
+def _dump_island(island) -> bytes:
+    # the hooks installed on the problem for the iteration stay in the calling process
+    with unhooked(island):
+        return dill.dumps(island)
+
+
+def _island_process(connection):
+    """Hold islands and evolve them on command, in a process of its own."""
+    # as in models.method_models, to be able to serialize lambdified expressions
+    dill.settings["recurse"] = True
+    islands = {}
+
+    while True:
+        command, argument = dill.loads(connection.recv_bytes())
+
+        try:
+            if command == "load":
+                islands.update({index: dill.loads(island) for index, island in argument.items()})
+                result = None
+            elif command == "evolve":
+                result = {index: evolve_island(islands[index], *arguments) for index, arguments in argument.items()}
+            elif command == "collect":
+                result = {index: dill.dumps(island) for index, island in islands.items()}
+            else:
+                return
+        except Exception as e:
+            result = e
+
+        connection.send_bytes(dill.dumps(result))
+
+
+class IslandProcesses:
+    """The processes evolving the islands during an iteration.
+
+    Args:
+        islands (list): The EAs of the islands.
+        processes (int): The number of processes. The islands are divided evenly between them.
+    """
+
+    def __init__(self, islands: list, processes: int):
+        context = multiprocessing.get_context("spawn")
+        processes = min(processes, len(islands))
+
+        self._connections = []
+        self._processes = []
+        # the index of the process holding each island
+        self._holders = [index % processes for index in range(len(islands))]
+
+        for _ in range(processes):
+            connection, child_connection = context.Pipe()
+            process = context.Process(target=_island_process, args=(child_connection,), daemon=True)
+            process.start()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+        self._command("load", {index: _dump_island(island) for index, island in enumerate(islands)})
+
+    def _command(self, command: str, arguments: dict) -> dict:
+        """Send a command with its argument per island to the processes holding the islands, and gather the results."""
+        per_process = [{} for _ in self._connections]
+        for index, argument in arguments.items():
+            per_process[self._holders[index]][index] = argument
+
+        for connection, argument in zip(self._connections, per_process):
+            connection.send_bytes(dill.dumps((command, argument)))
+
+        results = {}
+        for connection in self._connections:
+            result = dill.loads(connection.recv_bytes())
+            if isinstance(result, Exception):
+                raise result
+            if result is not None:
+                results.update(result)
+
+        return results
+
+    def evolve(self, arguments: dict) -> dict:
+        """Evolve islands, see `evolve_island`.
+
+        Args:
+            arguments (dict): The arguments of `evolve_island` after the island, keyed by the index of the island.
+
+        Returns:
+            dict: The results of `evolve_island` keyed by the index of the island.
+        """
+        return self._command("evolve", arguments)
+
+    def collect(self) -> dict:
+        """Ship the islands back from the processes.
+
+        Returns:
+            dict: The EAs of the islands keyed by their index.
+        """
+        return {index: dill.loads(island) for index, island in self._command("collect", {}).items()}
+
+    def stop(self):
+        for connection in self._connections:
+            try:
+                connection.send_bytes(dill.dumps(("stop", None)))
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+
+
+class IslandModel:
+    """Several islands of an EA evolved in parallel with migration, behaving like a single EA.
+
+    Args:
+        islands (list): The EAs of the islands, e.g., instances of RVEA solving the same problem.
+        processes (int, optional): The number of processes evolving the islands during the iterations. Defaults to None,
+            in which case each island has a process of its own.
+        migration_interval (int, optional): The number of generations between migrations. Defaults to
+            DEFAULT_MIGRATION_INTERVAL.
+        n_migrants (int, optional): The number of elites each island sends to the next island in a migration. Defaults
+            to DEFAULT_MIGRANTS.
+    """
+
+    def __init__(
+        self,
+        islands: list,
+        processes: int = None,
+        migration_interval: int = DEFAULT_MIGRATION_INTERVAL,
+        n_migrants: int = DEFAULT_MIGRANTS,
+    ):
+        self.islands = list(islands)
+        self.processes = len(self.islands) if processes is None else processes
+        self.migration_interval = migration_interval
+        self.n_migrants = n_migrants
+
+        self._gen_count_in_curr_iteration = 0
+        self._current_gen_count = 0
+        self._function_evaluation_count = sum(island._function_evaluation_count for island in self.islands)
+        self._iteration_counter = 0
+
+        # the migrants waiting to be taken in by each island, and whether the iteration of each island continues
+        self._migrants = [None] * len(self.islands)
+        self._continues = [False] * len(self.islands)
+        self._runner = None
+
+        self._read_islands()
+
+    @property
+    def n_gen_per_iter(self) -> int:
+        return self.islands[0].n_gen_per_iter
+
+    def _read_islands(self):
+        """Read the fronts and the counters of the islands held by the model, and merge the fronts."""
+        self._fronts = [island_front(island) for island in self.islands]
+        self._counters = [
+            (island._gen_count_in_curr_iteration, island._current_gen_count, island._function_evaluation_count)
+            for island in self.islands
+        ]
+        problem = self.islands[0].population.problem
+        for island in self.islands[1:]:
+            other = island.population.problem
+            if other is not problem:
+                # evolved in another process, the ideal point shown is the best found by any island
+                problem.update_ideal(None, other.ideal_targets)
+
+        self.population = MergedPopulation.merge(problem, self._fronts)
+
+    def set_interaction_type(self, interaction_type):
+        results = [island.set_interaction_type(interaction_type) for island in self.islands]
+
+        return results[0]
+
+    def start(self):
+        for island in self.islands:
+            island.start()
+
+        return self.requests()
+
+    def requests(self):
+        # the preferences given to the requests of the first island are given to every island
+        return self.islands[0].requests()
+
+    def manage_preferences(self, preference=None):
+        for island in self.islands:
+            island.manage_preferences(preference)
+
+    def pre_iteration(self):
+        for island in self.islands:
+            island.pre_iteration()
+            island._gen_count_in_curr_iteration = 0
+
+        self._continues = [island.continue_iteration() for island in self.islands]
+        self._read_islands()
+
+    def continue_iteration(self) -> bool:
+        return any(self._continues)
+
+    def _next_gen(self):
+        """Run `migration_interval` generations of each island still iterating, followed by a migration."""
+        arguments = {
+            index: (self.migration_interval, self._migrants[index], self.n_migrants)
+            for index, continues in enumerate(self._continues)
+            if continues
+        }
+
+        if self.processes > 1:
+            if self._runner is None:
+                self._runner = IslandProcesses(self.islands, self.processes)
+            results = self._runner.evolve(arguments)
+        else:
+            results = {index: evolve_island(self.islands[index], *argument) for index, argument in arguments.items()}
+
+        n_islands = len(self.islands)
+        for index, result in results.items():
+            # the elites of each island migrate to the next island in the ring
+            self._migrants[(index + 1) % n_islands] = result["elites"]
+            self._continues[index] = result["continues"]
+            self._fronts[index] = result["front"]
+            self._counters[index] = (result["generation"], result["generations_total"], result["evaluations"])
+
+        self._gen_count_in_curr_iteration = max(counters[0] for counters in self._counters)
+        self._current_gen_count = max(counters[1] for counters in self._counters)
+        self._function_evaluation_count = sum(counters[2] for counters in self._counters)
+        self.population = MergedPopulation.merge(self.islands[0].population.problem, self._fronts)
+
+    def _collect(self, stop: bool):
+        """Ship the islands back from their processes, if any."""
+        if self._runner is None:
+            return
+
+        try:
+            for index, island in self._runner.collect().items():
+                self.islands[index] = island
+        finally:
+            if stop:
+                self.close()
+
+    def close(self):
+        """Stop the processes of the islands, if any. The islands evolved by them since the last collect are lost."""
+        runner = getattr(self, "_runner", None)
+        if runner is not None:
+            self._runner = None
+            runner.stop()
+
+    def post_iteration(self):
+        self._collect(stop=True)
+
+        for island in self.islands:
+            island._iteration_counter += 1
+            island.post_iteration()
+
+        self._read_islands()
+
+    def iterate(self, preference=None):
+        """Run one iteration of every island, as `desdeo_emo.EAs.BaseEA.iterate` would for one EA.
+
+        Args:
+            preference: The preferences of the decision maker, given to every island.
+
+        Returns:
+            The requests of the model, see `requests`.
+        """
+        self.manage_preferences(preference)
+        self.pre_iteration()
+        self._gen_count_in_curr_iteration = 0
+
+        try:
+            while self.continue_iteration():
+                self._next_gen()
+        except BaseException:
+            # interrupted, e.g., cancelled, the islands evolved by the processes are dropped
+            self.close()
+            raise
+
+        self._iteration_counter += 1
+        self.post_iteration()
+
+        return self.requests()
+
+    def end(self):
+        """The merged front of the islands.
+
+        Returns:
+            tuple: The decision vectors and the objective vectors of the front.
+        """
+        return self.population.individuals, self.population.objectives
+
+    def __getstate__(self):
+        # e.g., a checkpoint written during an iteration, the islands are read from their processes without stopping
+        self._collect(stop=False)
+        state = self.__dict__.copy()
+        state["_runner"] = None
+
+        return state
+
+    def __del__(self):
+        # e.g., an iteration resumed from a checkpoint and interrupted
+        self.close()
@@ -0,0 +1,221 @@
+"""Hooks into the generation loop of the evolutionary methods.
+
+An iteration of an EA (see `desdeo_emo.EAs.BaseEA.iterate`) runs generations for as long as its `continue_iteration`
+returns True. While a hook is installed, the `continue_iteration` of the method instance is wrapped so that an observer
+is called before each generation with the progress of the iteration. The wrapper is an attribute of the instance only
+while the hook is installed, so the method is pickled as if it was never observed.
+
+Methods without a generation loop, such as NIMBUS, are iterated as usual and their observers are never called. The
+evaluations of the problem can be hooked in the same way, see `check_evaluations`, e.g., to interrupt the solvers of
+such methods.
+"""
+from contextlib import contextmanager
+
+from utilities.progress_streams import downsample_front
+
+
+class GenerationProgress(dict):
+    """The progress of an iteration of an EA, passed to the observers.
+
+    The keys are:
+        generation (int): The number of generations run in the current iteration.
+        generations_total (int): The number of generations run by the method in total.
+        evaluations (int): The number of function evaluations made by the method in total.
+        iteration (int): The number of iterations finished by the method.
+        front (list): Evenly spaced points of the objective vectors of the current population, if wanted.
+    """
+
+
+def generation_progress(method, front_size: int = 0) -> GenerationProgress:
+    """Read the progress of the current iteration of an EA.
+
+    Args:
+        method: The EA.
+        front_size (int, optional): The maximum number of points of the current front included. Defaults to 0.
+
+    Returns:
+        GenerationProgress: The progress.
+    """
+    progress = GenerationProgress(
+        generation=method._gen_count_in_curr_iteration,
+        generations_total=method._current_gen_count,
+        evaluations=method._function_evaluation_count,
+        iteration=method._iteration_counter,
+    )
+
+    if front_size:
+        progress["front"] = downsample_front(method.population.objectives, front_size)
+
+    return progress
+
+
+def combine_observers(*observers):
+    """Combine observers into one calling each of them.
+
+    Args:
+        observers: The observers, None for no observer.
+
+    Returns:
+        Callable: The combined observer returning False if any of the observers did, or None if there are no observers.
+    """
+    observers = [observer for observer in observers if observer is not None]
+
+    if not observers:
+        return None
+    if len(observers) == 1:
+        return observers[0]
+
+    def combined(progress):
+        # every observer is called, even if an earlier one wants to stop
+        return all([observer(progress) is not False for observer in observers])
+
+    return combined
+
+
+def has_generations(method) -> bool:
+    """Check whether a method iterates in generations which can be observed.
+
+    Args:
+        method: The method.
+
+    Returns:
+        bool: True if the method is an EA.
+    """
+    return callable(getattr(method, "continue_iteration", None)) and hasattr(method, "_gen_count_in_curr_iteration")
+
+
+@contextmanager
+def observe_generations(method, observer, front_size: int = 0):
+    """Call an observer before each generation of the iterations of an EA run within the context.
+
+    Args:
+        method: The method. Nothing is observed if the method does not iterate in generations.
+        observer (Callable[[GenerationProgress], bool]): Called with the progress before each generation. If it returns
+            False, the iteration stops after the generations run so far as if it was finished. If it raises, the
+            exception propagates out of the iteration.
+        front_size (int, optional): The maximum number of points of the current front included in the progress.
+            Defaults to 0.
+
+    Yields:
+        The method.
+    """
+    if observer is None or not has_generations(method):
+        yield method
+        return
+
+    # either the method of the class or the wrapper installed by an enclosing hook
+    continue_iteration = method.continue_iteration
+    enclosing = "continue_iteration" in method.__dict__
+
+    def observed_continue_iteration():
+        if not continue_iteration():
+            return False
+        return observer(generation_progress(method, front_size)) is not False
+
+    method.continue_iteration = observed_continue_iteration
+    try:
+        yield method
+    finally:
+        if enclosing:
+            method.continue_iteration = continue_iteration
+        else:
+            del method.continue_iteration
+
+
+def evaluated_problems(method) -> list:
+    """The problems evaluated by a method, e.g., `_problem` of NIMBUS and the problem of the population of EAs."""
+    population = getattr(method, "population", None)
+    problems = []
+
+    for problem in (getattr(method, "_problem", None), getattr(population, "problem", None)):
+        if callable(getattr(problem, "evaluate", None)) and all(problem is not other for other in problems):
+            problems.append(problem)
+
+    return problems
+
+
+@contextmanager
+def check_evaluations(method, check):
+    """Call a function before each evaluation of the problems of a method within the context.
+
+    Args:
+        method: The method.
+        check (Callable[[], None]): Called before each evaluation. If it raises, the exception propagates out of the
+            evaluation.
+
+    Yields:
+        The method.
+    """
+    wrapped = []
+
+    for problem in evaluated_problems(method):
+        evaluate = problem.evaluate
+        enclosing = "evaluate" in problem.__dict__
+
+        def checked_evaluate(*args, _evaluate=evaluate, **kwargs):
+            check()
+            return _evaluate(*args, **kwargs)
+
+        problem.evaluate = checked_evaluate
+        wrapped.append((problem, evaluate, enclosing))
+
+    try:
+        yield method
+    finally:
+        for problem, evaluate, enclosing in reversed(wrapped):
+            if enclosing:
+                problem.evaluate = evaluate
+            else:
+                del problem.evaluate
+
+
+@contextmanager
+def interruptible(method, check):
+    """Call a function at the boundaries of the steps of the iterations of a method run within the context: before
+    each generation of EAs and before each evaluation of the problem, e.g., in each step of a solver.
+
+    Args:
+        method: The method.
+        check (Callable[[], None]): Called at each boundary, raises to stop the iteration. None to not check.
+
+    Yields:
+        The method.
+    """
+    if check is None:
+        yield method
+        return
+
+    def check_generation(progress):
+        check()
+        return True
+
+    with observe_generations(method, check_generation), check_evaluations(method, check):
+        yield method
+
+
+@contextmanager
+def unhooked(method):
+    """Remove the hooks of a method within the context, e.g., to pickle the method during an iteration.
+
+    Args:
+        method: The method.
+
+    Yields:
+        The method.
+    """
+    removed = []
+
+    # see utilities.objective_index for the searches of the NAUTILUS methods
+    hooked = [(method, "continue_iteration"), (method, "calculate_reachable_point_indices")]
+    for problem in evaluated_problems(method):
+        hooked += [(problem, "evaluate"), (problem, "evaluate_objectives")]
+
+    for obj, name in hooked:
+        if name in obj.__dict__:
+            removed.append((obj, name, obj.__dict__.pop(name)))
+
+    try:
+        yield method
+    finally:
+        for obj, name, hook in removed:
+            setattr(obj, name, hook)
@@ -0,0 +1,417 @@
+"""Jobs running long method iterations in the background.
+
+A job is a row in `models.job_models.Job` holding the request it was created for, so the table is a durable queue of
+the jobs. By default, the jobs are run on a thread pool of the web process creating them, sized by the config key
+'JOB_WORKERS' of the app, separate from the pool of `utilities.background`, so that queued iterations do not delay the
+cheap background work. When 'EXTERNAL_JOB_WORKERS' is set, the jobs are instead left in the queue for the worker
+processes started with `job_worker.py`, which may run on other nodes sharing the database.
+
+Whoever runs a job first leases it for 'JOB_LEASE' seconds, and renews the lease by a heartbeat every
+'JOB_HEARTBEAT_INTERVAL' seconds while running it. A job whose lease has expired, e.g., because its worker died, is
+leased again by the next worker, at most 'JOB_MAX_ATTEMPTS' times in total. The heartbeat also passes the cancellation of
+a job requested by another process to the iteration, see `request_job_cancellation`. The leases are taken and renewed by
+conditional updates of the row, so no other locking is needed.
+
+The status, progress, and result of a job are kept in the database, so that they can be read by any process serving the
+app. The progress of EAs is recorded at most every 'JOB_PROGRESS_INTERVAL' seconds, on a connection of its own, so that
+the iteration itself is not slowed down by and does not commit with the updates.
+"""
+import datetime
+import os
+import socket
+import threading
+import time
+
+from database import db
+from flask import current_app, has_app_context
+from models.job_models import Job
+from sqlalchemy import and_, or_, update
+from utilities.background import get_executor, submit_to
+from utilities.cancellation import running_iterations
+
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_PROGRESS_INTERVAL = 1.0
+DEFAULT_LEASE = 60
+DEFAULT_HEARTBEAT_INTERVAL = 10
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def get_job_executor():
+    """Return the thread pool running the jobs of the process.
+
+    Returns:
+        ThreadPoolExecutor: The pool.
+    """
+    return get_executor("JOB_WORKERS", DEFAULT_JOB_WORKERS)
+
+
+def record_job_progress(job_id: int, **values):
+    """Update the columns of a job, committing right away on a connection of its own.
+
+    Args:
+        job_id (int): The id of the job.
+        values: The new values of the columns, e.g., generation=10.
+    """
+    with db.engine.begin() as connection:
+        connection.execute(update(Job).where(Job.id == job_id).values(**values))
+
+
+class ProgressRecorder:
+    """An observer of the generations of an iteration recording its progress in a job, see
+    `utilities.iteration_hooks.observe_generations`.
+
+    Args:
+        job_id (int): The id of the job.
+        interval (float, optional): The minimum number of seconds between the updates. Defaults to None, in which case
+            the interval is read from the config of the current app.
+    """
+
+    def __init__(self, job_id: int, interval: float = None):
+        if interval is None:
+            interval = (
+                current_app.config.get("JOB_PROGRESS_INTERVAL", DEFAULT_PROGRESS_INTERVAL)
+                if has_app_context()
+                else DEFAULT_PROGRESS_INTERVAL
+            )
+        self.job_id = job_id
+        self.interval = interval
+        self._last_update = None
+
+    def __call__(self, progress) -> bool:
+        now = time.monotonic()
+
+        if self._last_update is None or now - self._last_update >= self.interval:
+            self._last_update = now
+            record_job_progress(self.job_id, generation=progress["generation"], evaluations=progress["evaluations"])
+
+        return True
+
+
+def create_job(method_id: int, request: dict) -> Job:
+    """Add a queued job to the session. The session is not committed.
+
+    Args:
+        method_id (int): The id of the method session the job is for.
+        request (dict): The request the job is run for.
+
+    Returns:
+        Job: The job.
+    """
+    job = Job(method_id=method_id, status="QUEUED", request=request, created=datetime.datetime.now())
+    db.session.add(job)
+
+    return job
+
+
+def worker_name() -> str:
+    """Identify the current thread of the current process as the holder of job leases.
+
+    Returns:
+        str: The host name, process id, and thread name.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def _config(key: str, default):
+    return current_app.config.get(key, default) if has_app_context() else default
+
+
+def _leasable(now: datetime.datetime):
+    """The condition of the jobs which can be leased: queued, or running with an expired lease."""
+    return or_(Job.status == "QUEUED", and_(Job.status == "RUNNING", Job.lease_expires < now))
+
+
+def fail_abandoned_jobs() -> int:
+    """Fail the jobs whose lease has expired after their last allowed attempt.
+
+    Returns:
+        int: The number of failed jobs.
+    """
+    now = datetime.datetime.now()
+    failed = db.session.execute(
+        update(Job)
+        .where(
+            Job.status == "RUNNING",
+            Job.lease_expires < now,
+            Job.attempts >= _config("JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS),
+        )
+        .values(
+            status="FAILED",
+            result=({"message": "The job was abandoned by its workers too many times."}, 500),
+            finished=now,
+        )
+    ).rowcount
+    db.session.commit()
+
+    return failed
+
+
+def lease_job(job_id: int = None, worker: str = None, lease: float = None) -> Job:
+    """Lease a job to run it.
+
+    Args:
+        job_id (int, optional): The id of the job. Defaults to None, in which case the oldest job which can be leased
+            is leased.
+        worker (str, optional): The name of the worker leasing the job. Defaults to `worker_name()`.
+        lease (float, optional): The number of seconds the job is leased for. Defaults to the config 'JOB_LEASE'.
+
+    Returns:
+        Job: The leased job, or None if no job could be leased, e.g., it has been leased by another worker.
+    """
+    worker = worker_name() if worker is None else worker
+    lease = _config("JOB_LEASE", DEFAULT_LEASE) if lease is None else lease
+
+    fail_abandoned_jobs()
+
+    while True:
+        now = datetime.datetime.now()
+
+        if job_id is None:
+            candidate = db.session.query(Job.id).filter(_leasable(now)).order_by(Job.id).first()
+            if candidate is None:
+                return None
+            candidate_id = candidate.id
+        else:
+            candidate_id = job_id
+
+        # taken by the worker whose update goes through first
+        leased = db.session.execute(
+            update(Job)
+            .where(Job.id == candidate_id, _leasable(now))
+            .values(
+                status="RUNNING",
+                worker=worker,
+                lease_expires=now + datetime.timedelta(seconds=lease),
+                heartbeat=now,
+                attempts=Job.attempts + 1,
+                started=now,
+            )
+        ).rowcount
+        db.session.commit()
+
+        if leased:
+            return db.session.get(Job, candidate_id)
+        if job_id is not None:
+            return None
+        # leased by another worker in the meantime, try the next one
+
+
+class JobHeartbeat:
+    """Renew the lease of a job in a thread of its own while the job runs.
+
+    Args:
+        job_id (int): The id of the job.
+        worker (str): The name of the worker holding the lease.
+        on_cancel (Callable[[], None], optional): Called once when the cancellation of the job has been requested.
+            Defaults to None.
+        lease (float, optional): The number of seconds the lease is renewed for. Defaults to the config 'JOB_LEASE'.
+        interval (float, optional): The number of seconds between the heartbeats. Defaults to the config
+            'JOB_HEARTBEAT_INTERVAL'.
+    """
+
+    def __init__(self, job_id: int, worker: str, on_cancel=None, lease: float = None, interval: float = None):
+        self.job_id = job_id
+        self.worker = worker
+        self.on_cancel = on_cancel
+        self.lease = _config("JOB_LEASE", DEFAULT_LEASE) if lease is None else lease
+        self.interval = _config("JOB_HEARTBEAT_INTERVAL", DEFAULT_HEARTBEAT_INTERVAL) if interval is None else interval
+        # whether the lease has been lost, e.g., expired and taken by another worker
+        self.lost = False
+        self._stopped = threading.Event()
+        self._app = current_app._get_current_object() if has_app_context() else None
+        self._thread = threading.Thread(target=self._run, name=f"job_heartbeat_{job_id}", daemon=True)
+
+    def beat(self) -> bool:
+        """Renew the lease.
+
+        Returns:
+            bool: False if the lease has been lost.
+        """
+        now = datetime.datetime.now()
+
+        with db.engine.begin() as connection:
+            renewed = connection.execute(
+                update(Job)
+                .where(Job.id == self.job_id, Job.worker == self.worker, Job.status == "RUNNING")
+                .values(lease_expires=now + datetime.timedelta(seconds=self.lease), heartbeat=now)
+            ).rowcount
+            cancel_requested = connection.execute(
+                db.select(Job.cancel_requested).where(Job.id == self.job_id)
+            ).scalar()
+
+        if cancel_requested and self.on_cancel is not None:
+            on_cancel, self.on_cancel = self.on_cancel, None
+            on_cancel()
+
+        return bool(renewed)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                if self._app is None:
+                    alive = self.beat()
+                else:
+                    with self._app.app_context():
+                        alive = self.beat()
+            except Exception as e:
+                print(f"DEBUG: {e}")
+                continue
+
+            if not alive:
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+
+def run_leased_job(job: Job, work, worker: str):
+    """Run a leased job and store its result, unless the lease has been lost in the meantime.
+
+    Args:
+        job (Job): The job, leased by the worker.
+        work (Callable[[Job, ProgressRecorder], tuple]): Does the work of the job given the job and an observer of its
+            progress. Returns the response to the request of the job and its HTTP status code.
+        worker (str): The name of the worker holding the lease.
+    """
+    job_id = job.id
+    method_id = job.method_id
+
+    try:
+        # a cancellation requested by another process is passed on to the iteration by the heartbeat
+        with JobHeartbeat(job_id, worker, on_cancel=lambda: running_iterations.cancel(method_id)):
+            result = work(job, ProgressRecorder(job_id))
+        if result[1] < 400:
+            status = "FINISHED"
+        else:
+            status = "CANCELLED" if result[0].get("cancelled") else "FAILED"
+    except Exception as e:
+        print(f"DEBUG: {e}")
+        db.session.rollback()
+        result = {"message": f"The job failed: {e}"}, 500
+        status = "FAILED"
+
+    stored = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.worker == worker)
+        .values(status=status, result=result, finished=datetime.datetime.now(), lease_expires=None)
+    ).rowcount
+    db.session.commit()
+
+    if not stored:
+        print(f"DEBUG: the lease of job {job_id} was lost, its result is discarded")
+
+
+def run_job(job_id: int, work):
+    """Run a queued job and store its result, if the job can still be leased.
+
+    Args:
+        job_id (int): The id of the job.
+        work: The work of the job, see `run_leased_job`.
+    """
+    worker = worker_name()
+    job = lease_job(job_id, worker)
+
+    if job is None:
+        # cancelled, or leased by another worker
+        return
+
+    run_leased_job(job, work, worker)
+
+
+def run_next_job(work, worker: str = None) -> bool:
+    """Lease the oldest job which can be leased, run it, and store its result.
+
+    Args:
+        work: The work of the job, see `run_leased_job`.
+        worker (str, optional): The name of the worker. Defaults to `worker_name()`.
+
+    Returns:
+        bool: True if a job was run, False if there was none.
+    """
+    worker = worker_name() if worker is None else worker
+    job = lease_job(worker=worker)
+
+    if job is None:
+        return False
+
+    run_leased_job(job, work, worker)
+
+    return True
+
+
+def request_job_cancellation(method_id: int, job_id: int = None) -> list:
+    """Request the cancellation of the running jobs of a method session, passed to the iterations by the heartbeats.
+
+    Args:
+        method_id (int): The id of the method session.
+        job_id (int, optional): The id of the job. Defaults to None, in which case all the running jobs of the method
+            session are cancelled.
+
+    Returns:
+        list: The ids of the jobs whose cancellation was requested.
+    """
+    query = Job.query.filter_by(method_id=method_id, status="RUNNING")
+    if job_id is not None:
+        query = query.filter_by(id=job_id)
+
+    job_ids = [job.id for job in query.with_entities(Job.id)]
+
+    if job_ids:
+        db.session.execute(update(Job).where(Job.id.in_(job_ids)).values(cancel_requested=True))
+        db.session.commit()
+
+    return job_ids
+
+
+def cancel_queued_jobs(method_id: int, job_id: int = None) -> list:
+    """Cancel the jobs of a method session that have not started running.
+
+    Args:
+        method_id (int): The id of the method session.
+        job_id (int, optional): The id of the job to cancel. Defaults to None, in which case all the queued jobs of the
+            method session are cancelled.
+
+    Returns:
+        list: The ids of the cancelled jobs.
+    """
+    query = Job.query.filter_by(method_id=method_id, status="QUEUED")
+    if job_id is not None:
+        query = query.filter_by(id=job_id)
+
+    job_ids = [job.id for job in query.with_entities(Job.id)]
+
+    if not job_ids:
+        return []
+
+    # the jobs claimed by a worker in the meantime are left running
+    db.session.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids), Job.status == "QUEUED")
+        .values(
+            status="CANCELLED",
+            result=({"message": "The job was cancelled before it started.", "cancelled": True}, 409),
+            finished=datetime.datetime.now(),
+        )
+    )
+    db.session.commit()
+
+    return job_ids
+
+
+def submit_job(job_id: int, work):
+    """Run a committed job on the pool of the process, see `run_job`.
+
+    Args:
+        job_id (int): The id of the job.
+        work: The work of the job.
+
+    Returns:
+        Future: Done when the job has run.
+    """
+    return submit_to(get_job_executor(), run_job, job_id, work)
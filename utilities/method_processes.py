@@ -0,0 +1,374 @@
+"""Isolation of the CPU-bound calls of methods, such as `start` and `iterate`, in worker processes.
+
+While a method is iterated in the thread serving a request, it holds the GIL and stalls the other requests served by
+the same process. When the config key 'METHOD_PROCESSES' of the app is positive, the calls are made in a pool of that
+many worker processes instead. The method and the arguments are shipped to a worker as dill bytes, and the method is
+shipped back with the result of the call, its state replacing the state of the method in the calling process.
+
+Each worker is limited to 'METHOD_PROCESS_MEMORY_LIMIT' bytes of address space, so that a call exceeding it fails with
+a `MemoryError` instead of starving the other sessions. Since a worker makes one call at a time, the limit applies per
+call. To release the memory leaked or fragmented by the calls, the pool is replaced by a new one once it has been given
+'METHOD_PROCESS_MAX_TASKS' calls per worker, the calls already given to it being made before its workers exit. The
+pool is replaced as a whole, since `max_tasks_per_child` of `ProcessPoolExecutor` is only available from Python 3.11.
+The workers are started with 'spawn', so that they do not inherit the threads and database connections of the app.
+
+The iterations in the workers are interrupted at the same boundaries as in the calling process, see
+`utilities.cancellation`. A worker finds out about the cancellation of its call through an array of the ids of the
+cancelled calls shared by the pool, read at most every `CANCEL_CHECK_INTERVAL` seconds.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import count
+
+import dill
+from flask import current_app, has_app_context
+
+from utilities.budgets import IterationBudget, within_budget
+from utilities.cancellation import CancelToken
+from utilities.checkpoints import Checkpoint, checkpoint_generations
+from utilities.discrete_solver import chunked_discrete_minimizations, discrete_solver_settings
+from utilities.iteration_hooks import interruptible, observe_generations
+from utilities.objective_index import ObjectiveIndex, indexed_searches
+from utilities.parallel_evaluation import evaluation_settings, parallel_method_evaluations
+from utilities.parallel_scalarization import parallel_scalarizations, scalarization_settings
+
+try:
+    import resource
+except ImportError:  # not available on Windows, the memory is not limited there
+    resource = None
+
+
+class MethodProcessError(RuntimeError):
+    """A worker process died while calling a method, e.g., it was killed for using too much memory."""
+
+
+CANCEL_CHECK_INTERVAL = 0.05
+
+# the number of the latest cancelled calls the workers are told about
+CANCELLED_CALLS_SIZE = 256
+
+_pool = None
+# reentrant, since the pool is looked up or created while a call is given to it, see `_submit`
+_pool_lock = threading.RLock()
+# the number of calls given to the pool, and after how many it is replaced, None to keep it
+_pool_calls = 0
+_pool_max_calls = None
+
+# observers of the calls being made, keyed by the id of the call, see `call_method`
+_observers = {}
+_call_ids = count()
+_progress_queue = None
+_listener = None
+# the ids of the cancelled calls, written in turns
+_cancelled_calls = None
+_cancelled_count = count()
+
+# the queue of the progress of the calls and the ids of the cancelled calls, in a worker process
+_worker_progress = None
+_worker_cancelled = None
+
+
+def _initialize_worker(memory_limit, progress_queue, cancelled_calls):
+    """Initialize a worker process.
+
+    Args:
+        memory_limit (int): The limit of the address space of the process in bytes, or None for no limit.
+        progress_queue: The queue the progress of the calls is sent to.
+        cancelled_calls: The shared array of the ids of the cancelled calls.
+    """
+    global _worker_progress, _worker_cancelled
+
+    if memory_limit is not None and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    # as in models.method_models, to be able to serialize lambdified expressions
+    dill.settings["recurse"] = True
+    _worker_progress = progress_queue
+    _worker_cancelled = cancelled_calls
+
+
+def _call(payload: bytes) -> bytes:
+    """Call a method in a worker process.
+
+    Args:
+        payload (bytes): The id of the call, whether the call is observed, the size of the front included in the
+            progress, the deadline of the call or None, the checkpoint of the call or None, the settings of the parallel
+            evaluations, the budget of the call or None, the number of processes solving the minimizations of the
+            method, the settings of the discrete minimizations, the method, the called attribute or function, and the
+            positional arguments, pickled with dill.
+
+    Returns:
+        bytes: The method and the result of the call, pickled with dill.
+    """
+    (
+        call_id,
+        observed,
+        front_size,
+        deadline,
+        checkpoint,
+        evaluation,
+        budget,
+        scalarization,
+        discrete,
+        method,
+        name,
+        args,
+    ) = dill.loads(payload)
+
+    def observer(progress):
+        _worker_progress.put((call_id, dict(progress)))
+
+    token = CancelToken(deadline)
+    last_read = 0.0
+
+    def check():
+        nonlocal last_read
+
+        now = time.monotonic()
+        if now - last_read >= CANCEL_CHECK_INTERVAL:
+            last_read = now
+            if call_id in _worker_cancelled[:]:
+                token.cancel()
+
+        token.check()
+
+    with observe_generations(method, observer if observed else None, front_size), interruptible(
+        method, check
+    ), checkpoint_generations(method, checkpoint), parallel_method_evaluations(method, *evaluation), within_budget(
+        method, budget
+    ), parallel_scalarizations(method, *scalarization, check=check), chunked_discrete_minimizations(*discrete):
+        result = _callable(method, name)(*args)
+
+    return dill.dumps((method, result))
+
+
+def _callable(method, name):
+    """The attribute of a method with the given name, or a function to be called with the method."""
+    if isinstance(name, str):
+        return getattr(method, name)
+
+    return lambda *args: name(method, *args)
+
+
+def _listen(progress_queue):
+    """Pass the progress sent by the workers to the observers of the calls, in a thread of the calling process."""
+    while True:
+        call_id, progress = progress_queue.get()
+        observer = _observers.get(call_id)
+
+        if observer is None:
+            # the call has returned already
+            continue
+
+        try:
+            observer(progress)
+        except Exception as e:
+            print(f"DEBUG: {e}")
+
+
+def get_method_pool():
+    """Return the pool of worker processes, creating it on first use.
+
+    Returns:
+        ProcessPoolExecutor: The pool, or None if the methods are called in the calling thread.
+    """
+    global _pool, _pool_calls, _pool_max_calls, _progress_queue, _listener, _cancelled_calls
+
+    if not has_app_context():
+        return None
+
+    processes = current_app.config.get("METHOD_PROCESSES", 0)
+    if not processes:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context("spawn")
+
+            if _progress_queue is None:
+                _progress_queue = context.SimpleQueue()
+                _listener = threading.Thread(
+                    target=_listen, args=(_progress_queue,), name="method_progress", daemon=True
+                )
+                _listener.start()
+                _cancelled_calls = context.Array("q", [-1] * CANCELLED_CALLS_SIZE)
+
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=context,
+                initializer=_initialize_worker,
+                initargs=(current_app.config.get("METHOD_PROCESS_MEMORY_LIMIT"), _progress_queue, _cancelled_calls),
+            )
+
+            max_tasks = current_app.config.get("METHOD_PROCESS_MAX_TASKS")
+            _pool_calls = 0
+            _pool_max_calls = max_tasks * processes if max_tasks else None
+
+        return _pool
+
+
+def shutdown_method_pool():
+    """Shut down the pool of worker processes. A new pool is created, using the current config, when next needed."""
+    global _pool
+
+    with _pool_lock:
+        pool, _pool = _pool, None
+
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _submit(payload: bytes):
+    """Give a call to the pool, replacing the pool with a new one for the next calls if it has been given its share.
+
+    The pool is looked up, given the call, and counted at once, so that another call cannot replace the pool in between.
+
+    Returns:
+        (tuple): The pool given the call, and the future of its result.
+    """
+    global _pool, _pool_calls
+
+    with _pool_lock:
+        pool = get_method_pool()
+
+        try:
+            future = pool.submit(_call, payload)
+        except BrokenProcessPool:
+            # a worker died during an earlier call, start a new pool for the next calls
+            _pool = None
+            raise
+
+        _pool_calls += 1
+        retire = _pool_max_calls is not None and _pool_calls >= _pool_max_calls
+        if retire:
+            _pool = None
+
+    if retire:
+        # the calls already given to the pool are still made, then its workers exit
+        pool.shutdown(wait=False)
+
+    return pool, future
+
+
+def _cancel_call(call_id: int):
+    """Tell the workers that a call has been cancelled."""
+    _cancelled_calls[next(_cancelled_count) % CANCELLED_CALLS_SIZE] = call_id
+
+
+def call_method(
+    method,
+    name,
+    *args,
+    observer=None,
+    front_size: int = 0,
+    token: CancelToken = None,
+    checkpoint: Checkpoint = None,
+    budget: IterationBudget = None,
+    objective_index: ObjectiveIndex = None,
+):
+    """Call a method, in a worker process if configured.
+
+    Args:
+        method: The method. When called in a worker process, its state is replaced with the state of the method after
+            the call, as if the call was made in place.
+        name (str or Callable): The name of the attribute called, e.g., 'iterate', or a module level function called
+            with the method as its first argument, e.g., `utilities.checkpoints.resume_iteration`.
+        args: Positional arguments of the call.
+        observer (Callable, optional): Called with the progress of the generations of EAs, see
+            `utilities.iteration_hooks.observe_generations`. In a worker process, the observer is called in a thread of
+            the calling process and cannot stop the iteration. Defaults to None.
+        front_size (int, optional): The maximum number of points of the current front of EAs included in the progress.
+            Defaults to 0.
+        token (CancelToken, optional): Checked at the boundaries of the steps of the call, see
+            `utilities.iteration_hooks.interruptible`. Defaults to None.
+        checkpoint (Checkpoint, optional): Written periodically during the iterations of EAs, see
+            `utilities.checkpoints`. Defaults to None.
+        budget (IterationBudget, optional): Limits the iterations of EAs, see `utilities.budgets`. Defaults to None.
+        objective_index (ObjectiveIndex, optional): The index of the objective vectors of the discrete problem of the
+            method, see `utilities.objective_index`. Not sent to worker processes, in which the method searches the
+            objective vectors as usual. Defaults to None.
+
+    Raises:
+        MethodProcessError: The worker process died during the call.
+        IterationCancelled: The call was cancelled or ran past its deadline. The method may have been modified
+            partially, unless called in a worker process.
+
+    Returns:
+        The result of the call.
+    """
+    global _pool
+
+    pool = get_method_pool()
+    # the objectives of the populations of EAs are evaluated in parallel if configured
+    evaluation = evaluation_settings()
+    # and the scalarized subproblems of, e.g., NIMBUS solved in parallel, or from several starting points
+    scalarization = scalarization_settings()
+    # and the discrete problems minimized in chunks
+    discrete = discrete_solver_settings()
+
+    if pool is None:
+        check = token.check if token is not None else None
+        with observe_generations(method, observer, front_size), interruptible(
+            method, check
+        ), checkpoint_generations(method, checkpoint), parallel_method_evaluations(method, *evaluation), within_budget(
+            method, budget
+        ), parallel_scalarizations(method, *scalarization, check=check), chunked_discrete_minimizations(
+            *discrete
+        ), indexed_searches(method, objective_index):
+            return _callable(method, name)(*args)
+
+    call_id = next(_call_ids)
+    deadline = token.deadline if token is not None else None
+
+    if observer is not None:
+        app = current_app._get_current_object()
+
+        def observe_in_app_context(progress):
+            with app.app_context():
+                return observer(progress)
+
+        _observers[call_id] = observe_in_app_context
+
+    if token is not None:
+        token.on_cancel(lambda: _cancel_call(call_id))
+
+    pool = None
+
+    try:
+        payload = dill.dumps(
+            (
+                call_id,
+                observer is not None,
+                front_size,
+                deadline,
+                checkpoint,
+                evaluation,
+                budget,
+                scalarization,
+                discrete,
+                method,
+                name,
+                args,
+            )
+        )
+        pool, future = _submit(payload)
+        data = future.result()
+    except BrokenProcessPool as e:
+        # the pool cannot be used anymore, start a new one for the next calls
+        if pool is not None:
+            with _pool_lock:
+                if _pool is pool:
+                    _pool = None
+            pool.shutdown(wait=False)
+        raise MethodProcessError(f"A worker process died while calling '{getattr(name, '__name__', name)}'.") from e
+    finally:
+        _observers.pop(call_id, None)
+
+    called_method, result = dill.loads(data)
+    method.__dict__.clear()
+    method.__dict__.update(called_method.__dict__)
+
+    return result
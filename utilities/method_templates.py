@@ -0,0 +1,121 @@
+"""A cache of initialized methods used as templates for new method sessions.
+
+Initializing a method may be expensive, e.g., EAs create and evaluate their initial population, but the result depends
+only on the problem, the parameters of the method, and the settings of the app the initialization reads, e.g., the
+number of islands of the island model. Users solving the same problem with the same method, such as the
+participants of an experiment, can therefore start from a copy of the same initialized method.
+
+The templates are kept in memory of each process, the least recently used templates are dropped when the cache is full.
+The size of the cache is read from the config key 'METHOD_TEMPLATE_CACHE_SIZE' of the current app. A size of 0 disables
+the cache.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+
+from flask import current_app, has_app_context
+
+DEFAULT_CACHE_SIZE = 32
+
+
+def template_key(problem_digest: bytes, method_name: str, parameters: dict = None, settings: tuple = ()) -> tuple:
+    """Build the key of a method template.
+
+    Args:
+        problem_digest (bytes): A digest of the contents of the problem, see `content_digest`.
+        method_name (str): The name of the method.
+        parameters (dict, optional): The parameters the method is initialized with. Defaults to None.
+        settings (tuple, optional): The hashable settings of the app read while the method is initialized, so that a
+            template is not used once they have changed. Defaults to ().
+
+    Returns:
+        tuple: The key.
+    """
+    return problem_digest, method_name, tuple(sorted((parameters or {}).items())), settings
+
+
+def content_digest(data: bytes) -> bytes:
+    """Digest the stored contents of a problem.
+
+    Args:
+        data (bytes): The pickled problem as stored in the database.
+
+    Returns:
+        bytes: The sha256 digest.
+    """
+    return hashlib.sha256(data).digest()
+
+
+class TemplateCache:
+    """A thread-safe LRU cache of method templates.
+
+    Args:
+        max_size (int, optional): The maximum number of templates kept. Defaults to None, in which case the size is read
+            from the config of the current app.
+    """
+
+    def __init__(self, max_size: int = None):
+        self._max_size = max_size
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is not None:
+            return self._max_size
+        if has_app_context():
+            return current_app.config.get("METHOD_TEMPLATE_CACHE_SIZE", DEFAULT_CACHE_SIZE)
+        return DEFAULT_CACHE_SIZE
+
+    def get(self, key: tuple):
+        """Return a copy of a cached template.
+
+        Args:
+            key (tuple): The key of the template, see `template_key`.
+
+        Returns:
+            A copy of the template, independent of the template and other copies, or None if not cached.
+        """
+        with self._lock:
+            template = self._templates.get(key)
+            if template is None:
+                self.misses += 1
+                return None
+            self._templates.move_to_end(key)
+            self.hits += 1
+
+        return deepcopy(template)
+
+    def put(self, key: tuple, method):
+        """Cache a copy of an initialized method as a template.
+
+        Args:
+            key (tuple): The key of the template, see `template_key`.
+            method: The initialized method. The method may be modified afterwards, the cached copy is not.
+        """
+        max_size = self.max_size
+        if max_size <= 0:
+            return
+
+        template = deepcopy(method)
+
+        with self._lock:
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > max_size:
+                self._templates.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._templates)
+
+
+method_templates = TemplateCache()
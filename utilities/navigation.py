@@ -0,0 +1,52 @@
+"""Navigating several steps of NAUTILUS Navigator in one iteration.
+
+Each step of NAUTILUS Navigator is an iteration of its own, so a client navigating step by step makes a request per
+step, and the method is loaded and stored for each of them. `navigate` instead runs the steps one after another with the
+same reference point, bounds, and speed, and returns the request of each step, so that a client can animate the whole
+navigation from the response of one request.
+"""
+from desdeo_mcdm.interactive import NautilusNavigatorRequest
+
+# the contents of the requests describing a step of the navigation, see `step_summary`
+STEP_KEYS = ("step_number", "steps_remaining", "distance", "navigation_point", "reachable_lb", "reachable_ub")
+
+
+def navigate(method, request, steps: int = 0) -> list:
+    """Navigate with the response of a request for a number of steps.
+
+    The response is used for the first step as given, e.g., going to a previous step first, and for the rest of the
+    steps as if given again without going back. The navigation ends early if it reaches the Pareto front or is stopped.
+
+    Args:
+        method (NautilusNavigator): The method.
+        request (NautilusNavigatorRequest): The request with the response.
+        steps (int, optional): The number of steps, 0 to navigate to the Pareto front. Defaults to 0.
+
+    Returns:
+        list: The requests returned by the method, one per step, the last of which is the new request of the method.
+    """
+    requests = []
+    response = {**request.response, "go_to_previous": False}
+
+    while True:
+        # the last step computes the point on the Pareto front without advancing
+        final = not request.response["go_to_previous"] and request.content["steps_remaining"] <= 1
+        request = method.iterate(request)
+        requests.append(request)
+
+        if type(request).__name__ != NautilusNavigatorRequest.__name__ or final or len(requests) == steps:
+            return requests
+
+        request.response = response
+
+
+def step_summary(request) -> dict:
+    """The state of the navigation at a step, without the reachable solutions.
+
+    Args:
+        request (NautilusNavigatorRequest): The request of the step.
+
+    Returns:
+        dict: The contents of the request listed in STEP_KEYS.
+    """
+    return {key: request.content[key] for key in STEP_KEYS}
@@ -0,0 +1,215 @@
+"""A spatial index over the objective vectors of discrete problems.
+
+NAUTILUS Navigator and E-NAUTILUS look for the solutions of a discrete problem reachable from the current point at each
+step, i.e., the rows of the objective matrix within a box of lower and upper bounds, by scanning the whole matrix. An
+`ObjectiveIndex` is a k-d tree over the objective vectors normalized to the unit hypercube, in which the rows within a
+box are found by visiting only the nodes of the tree overlapping the box. The index is built when a discrete problem is
+created with at least 'OBJECTIVE_INDEX_MIN_POINTS' rows, and stored with the problem. The indexes of the problems are
+cached in the memory of each process, see `IndexCache`, and the indexes of problems created without one are built when
+first needed.
+
+While a method is iterated within `indexed_searches`, its searches over the objective vectors of the problem go through
+the index. The rows found are the same as those found by the scan: the index only selects the candidate rows, which are
+then compared with the bounds as by the method.
+"""
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+from flask import current_app, has_app_context
+from scipy.spatial import cKDTree
+
+DEFAULT_MIN_POINTS = 10_000
+DEFAULT_CACHE_SIZE = 16
+DEFAULT_LEAF_SIZE = 32
+
+# the number of rows compared to check that an index was built over a matrix, see `ObjectiveIndex.matches`
+FINGERPRINT_SIZE = 64
+
+# the names of the classes of the methods whose searches go through the index
+INDEXED_METHODS = ("NautilusNavigator", "ENautilus")
+
+
+class ObjectiveIndex:
+    """A k-d tree over objective vectors, see the module docstring.
+
+    Args:
+        objectives (np.ndarray): The objective vectors, one per row.
+        leaf_size (int, optional): The number of rows in a leaf of the tree. Defaults to DEFAULT_LEAF_SIZE.
+    """
+
+    def __init__(self, objectives: np.ndarray, leaf_size: int = DEFAULT_LEAF_SIZE):
+        objectives = np.atleast_2d(np.asarray(objectives, dtype=float))
+
+        self.shape = objectives.shape
+        self.low = objectives.min(axis=0)
+        self.scale = np.maximum(objectives.max(axis=0) - self.low, np.finfo(float).eps)
+        self.fingerprint = self._fingerprint(objectives)
+        self.tree = cKDTree(self.normalize(objectives), leafsize=leaf_size)
+
+    def normalize(self, points: np.ndarray) -> np.ndarray:
+        return (np.asarray(points, dtype=float) - self.low) / self.scale
+
+    def _fingerprint(self, objectives: np.ndarray) -> np.ndarray:
+        rows = np.linspace(0, len(objectives) - 1, min(FINGERPRINT_SIZE, len(objectives))).astype(int)
+        return objectives[rows]
+
+    def matches(self, objectives) -> bool:
+        """Whether the index was built over the objective vectors, judging by their shape and a sample of the rows."""
+        objectives = np.asarray(objectives)
+        return (
+            objectives.shape == self.shape
+            and objectives.dtype.kind == "f"
+            and np.array_equal(self._fingerprint(objectives), self.fingerprint)
+        )
+
+    def box(self, objectives: np.ndarray, lower_bounds: np.ndarray, upper_bounds: np.ndarray) -> np.ndarray:
+        """Find the rows within a box, bounds included.
+
+        Args:
+            objectives (np.ndarray): The objective vectors the index was built over.
+            lower_bounds (np.ndarray): The lower bounds of the box.
+            upper_bounds (np.ndarray): The upper bounds of the box.
+
+        Returns:
+            np.ndarray: The indices of the rows in ascending order, as `np.flatnonzero` of the rows within the box.
+        """
+        lower_bounds = np.asarray(lower_bounds, dtype=float)
+        upper_bounds = np.asarray(upper_bounds, dtype=float)
+
+        if not (np.all(np.isfinite(lower_bounds)) and np.all(np.isfinite(upper_bounds))):
+            # e.g., unbounded from one side, scan
+            candidates = np.arange(len(objectives))
+        elif np.any(lower_bounds > upper_bounds):
+            return np.array([], dtype=np.intp)
+        else:
+            lower, upper = self.normalize(lower_bounds), self.normalize(upper_bounds)
+            # the cube around the box, a little larger to include the rows on the bounds despite rounding
+            radius = np.max(upper - lower) / 2
+            radius += 1e-9 * max(radius, 1.0)
+            candidates = np.asarray(self.tree.query_ball_point((lower + upper) / 2, radius, p=np.inf), dtype=np.intp)
+            candidates.sort()
+
+        rows = objectives[candidates]
+        within = np.all(rows >= lower_bounds, axis=1) & np.all(rows <= upper_bounds, axis=1)
+
+        return candidates[within]
+
+
+def index_settings() -> int:
+    """Read the minimum number of rows of an indexed problem from the config of the current app.
+
+    Returns:
+        int: The number of rows, or None if the problems are not indexed.
+    """
+    if not has_app_context():
+        return DEFAULT_MIN_POINTS
+
+    return current_app.config.get("OBJECTIVE_INDEX_MIN_POINTS", DEFAULT_MIN_POINTS)
+
+
+def index_problem(problem, min_points: int = DEFAULT_MIN_POINTS):
+    """Build the index of a discrete problem and store it in the problem, as `problem.objective_index`.
+
+    Args:
+        problem (DiscreteDataProblem): The problem. Problems without objective vectors are not indexed.
+        min_points (int, optional): The minimum number of rows of an indexed problem, None to not index. Defaults to
+            DEFAULT_MIN_POINTS.
+
+    Returns:
+        ObjectiveIndex: The index, or None if the problem is not indexed.
+    """
+    objectives = getattr(problem, "objectives", None)
+
+    if min_points is None or not isinstance(objectives, np.ndarray) or len(objectives) < min_points:
+        return None
+
+    problem.objective_index = ObjectiveIndex(objectives)
+
+    return problem.objective_index
+
+
+class IndexCache:
+    """A thread-safe LRU cache of the indexes of problems, keyed by, e.g., the table and the id of the problem.
+
+    Args:
+        max_size (int, optional): The maximum number of indexes kept. Defaults to DEFAULT_CACHE_SIZE.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load_problem, min_points: int = DEFAULT_MIN_POINTS):
+        """Return the index of a problem, loading the problem if not cached.
+
+        Args:
+            key: The key of the problem.
+            load_problem (Callable): Returns the problem, or None if not found.
+            min_points (int, optional): See `index_problem`. Defaults to DEFAULT_MIN_POINTS.
+
+        Returns:
+            ObjectiveIndex: The index stored with the problem, or built from it, or None if the problem is not indexed.
+        """
+        with self._lock:
+            if key in self._indexes:
+                self._indexes.move_to_end(key)
+                return self._indexes[key]
+
+        problem = load_problem()
+        index = getattr(problem, "objective_index", None)
+        if index is None and problem is not None:
+            index = index_problem(problem, min_points)
+
+        with self._lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_size:
+                self._indexes.popitem(last=False)
+
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def __len__(self):
+        return len(self._indexes)
+
+
+@contextmanager
+def indexed_searches(method, index: ObjectiveIndex):
+    """Make the searches of a method over the objective vectors of its problem through an index within the context.
+
+    Args:
+        method: The method. Its searches are made as usual if it is not listed in INDEXED_METHODS.
+        index (ObjectiveIndex): The index, None to search as usual. Not used if built over other objective vectors
+            than those of the method.
+
+    Yields:
+        The method.
+    """
+    if (
+        index is None
+        or type(method).__name__ not in INDEXED_METHODS
+        or not index.matches(getattr(method, "_pareto_front", None))
+    ):
+        yield method
+        return
+
+    calculate_reachable_point_indices = method.calculate_reachable_point_indices
+
+    def indexed_reachable_point_indices(pareto_front, lower_bounds, upper_bounds):
+        if pareto_front is not method._pareto_front:
+            return calculate_reachable_point_indices(pareto_front, lower_bounds, upper_bounds)
+
+        # shaped as np.argwhere(...).squeeze() by the methods
+        return index.box(pareto_front, lower_bounds, upper_bounds)[:, None].squeeze()
+
+    method.calculate_reachable_point_indices = indexed_reachable_point_indices
+
+    try:
+        yield method
+    finally:
+        method.__dict__.pop("calculate_reachable_point_indices", None)
@@ -0,0 +1,236 @@
+"""Parallel evaluation of the objectives of analytical problems over the populations of EAs.
+
+The EAs evaluate the objectives of their whole population at once, one row after another. When the config key
+'EVALUATION_PROCESSES' of the app is positive, the objectives evaluated by a method while it is created, started, or
+iterated are evaluated in a pool of that many processes instead: the decision vectors are split into blocks of at least
+'EVALUATION_MIN_BLOCK_SIZE' rows, one per process at most, which are evaluated in parallel and stacked back in order.
+Smaller evaluations, e.g., the single points evaluated by the solvers of the scalarizing methods, are made as usual.
+
+The pool is started with 'spawn' on the first evaluation large enough to be split, and kept for the next calls of the
+methods. The problem, with its lambdified objective functions, is sent with the blocks of its first split evaluation
+within a call, and the processes keep the latest WORKER_PROBLEMS problems they have been sent, so that only the blocks
+are sent for the next evaluations. A process not having the problem of a block, e.g., one started after the first
+evaluation, is sent the block again with the problem. When the methods are called in worker processes, see
+`utilities.method_processes`, each worker keeps a pool of its own. Only the evaluation of the objectives is made in
+parallel, the rest of `desdeo_problem.problem.MOProblem.evaluate`, e.g., updating the ideal point, is made by the
+calling process as usual.
+"""
+import hashlib
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import dill
+import numpy as np
+from flask import current_app, has_app_context
+
+from utilities.iteration_hooks import evaluated_problems
+
+DEFAULT_MIN_BLOCK_SIZE = 16
+
+# the hooks of the problem, left out when the problem is sent to the processes
+HOOKED_ATTRIBUTES = ("evaluate", "evaluate_objectives")
+
+# the number of problems kept by a process of the pool
+WORKER_PROBLEMS = 8
+
+_pool = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+# the problems evaluated in a process of the pool, keyed by the digest of the pickled problem, oldest first
+_worker_problems = OrderedDict()
+
+
+def evaluation_settings() -> tuple:
+    """Read the settings of the parallel evaluations from the config of the current app.
+
+    Returns:
+        (tuple): tuple containing:
+            (int): The number of processes, 0 if the evaluations are not made in parallel.
+            (int): The minimum number of rows in a block.
+    """
+    if not has_app_context():
+        return 0, DEFAULT_MIN_BLOCK_SIZE
+
+    return (
+        current_app.config.get("EVALUATION_PROCESSES", 0) or 0,
+        current_app.config.get("EVALUATION_MIN_BLOCK_SIZE", DEFAULT_MIN_BLOCK_SIZE),
+    )
+
+
+def _initialize_worker():
+    # as in models.method_models, to be able to serialize lambdified expressions
+    dill.settings["recurse"] = True
+
+
+def _evaluate_block(key: bytes, problem: bytes, decision_vectors: np.ndarray, use_surrogate: bool):
+    """Evaluate a block in a process of the pool.
+
+    Args:
+        key (bytes): The digest of the pickled problem.
+        problem (bytes): The pickled problem, or None if the process is expected to have it already.
+        decision_vectors (np.ndarray): The block.
+        use_surrogate (bool): Passed to `evaluate_objectives` of the problem.
+
+    Returns:
+        tuple: The result of `evaluate_objectives`, or None if the problem is not given and not kept by the process.
+    """
+    if key in _worker_problems:
+        _worker_problems.move_to_end(key)
+    elif problem is None:
+        return None
+    else:
+        _worker_problems[key] = dill.loads(problem)
+        while len(_worker_problems) > WORKER_PROBLEMS:
+            _worker_problems.popitem(last=False)
+
+    return _worker_problems[key].evaluate_objectives(decision_vectors, use_surrogate)
+
+
+def _get_pool(processes: int) -> ProcessPoolExecutor:
+    global _pool, _pool_size
+
+    with _pool_lock:
+        if _pool is None or _pool_size != processes:
+            if _pool is not None:
+                # the blocks already sent to the old pool are still evaluated
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialize_worker,
+            )
+            _pool_size = processes
+
+        return _pool
+
+
+def _reset_pool(pool: ProcessPoolExecutor):
+    global _pool
+
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def shutdown_evaluation_pool():
+    """Shut down the pool of processes, e.g., when the app is torn down. A new one is started when needed."""
+    global _pool
+
+    with _pool_lock:
+        pool, _pool = _pool, None
+
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _dump_problem(problem) -> bytes:
+    """Pickle a problem without the hooks installed on it."""
+    removed = {name: problem.__dict__.pop(name) for name in HOOKED_ATTRIBUTES if name in problem.__dict__}
+
+    try:
+        return dill.dumps(problem)
+    finally:
+        problem.__dict__.update(removed)
+
+
+def _stack(blocks: list):
+    """Stack the results of `evaluate_objectives` of the blocks, each a tuple of arrays, or of arrays and None."""
+    return tuple(None if parts[0] is None else np.vstack(parts) for parts in zip(*blocks))
+
+
+@contextmanager
+def parallel_evaluations(problems: list, processes: int, min_block_size: int = DEFAULT_MIN_BLOCK_SIZE):
+    """Evaluate the objectives of problems in parallel within the context.
+
+    Args:
+        problems (list): The problems, e.g., `utilities.iteration_hooks.evaluated_problems` of a method. Problems
+            without `evaluate_objectives` are evaluated as usual.
+        processes (int): The number of processes, 0 to evaluate as usual.
+        min_block_size (int, optional): The minimum number of rows in a block. Defaults to DEFAULT_MIN_BLOCK_SIZE.
+
+    Yields:
+        list: The problems.
+    """
+    if not processes:
+        yield problems
+        return
+
+    wrapped = []
+
+    for problem in problems:
+        if not callable(getattr(problem, "evaluate_objectives", None)):
+            continue
+
+        evaluate_objectives = problem.evaluate_objectives
+        enclosing = "evaluate_objectives" in problem.__dict__
+        # the pickled problem and its digest, once the problem has been sent to the pool
+        dumped = []
+
+        def parallel_evaluate_objectives(
+            decision_vectors, use_surrogate=False, _problem=problem, _evaluate=evaluate_objectives, _dumped=dumped
+        ):
+            n_blocks = min(processes, len(decision_vectors) // min_block_size)
+
+            if n_blocks <= 1:
+                return _evaluate(decision_vectors, use_surrogate)
+
+            if _dumped:
+                data, key = None, _dumped[1]
+            else:
+                data = _dump_problem(_problem)
+                key = hashlib.sha256(data).digest()
+                _dumped.extend((data, key))
+
+            pool = _get_pool(processes)
+            blocks = np.array_split(np.asarray(decision_vectors), n_blocks)
+
+            try:
+                futures = [pool.submit(_evaluate_block, key, data, block, use_surrogate) for block in blocks]
+                results = [future.result() for future in futures]
+                # the blocks sent to processes not having the problem are sent again with it
+                resent = {
+                    i: pool.submit(_evaluate_block, key, _dumped[0], blocks[i], use_surrogate)
+                    for i, result in enumerate(results)
+                    if result is None
+                }
+                for i, future in resent.items():
+                    results[i] = future.result()
+            except BrokenProcessPool:
+                _reset_pool(pool)
+                raise
+
+            return _stack(results)
+
+        problem.evaluate_objectives = parallel_evaluate_objectives
+        wrapped.append((problem, evaluate_objectives, enclosing))
+
+    try:
+        yield problems
+    finally:
+        for problem, evaluate_objectives, enclosing in reversed(wrapped):
+            if enclosing:
+                problem.evaluate_objectives = evaluate_objectives
+            else:
+                del problem.evaluate_objectives
+
+
+@contextmanager
+def parallel_method_evaluations(method, processes: int, min_block_size: int = DEFAULT_MIN_BLOCK_SIZE):
+    """Evaluate the objectives of the problems of a method in parallel within the context, see `parallel_evaluations`.
+
+    Args:
+        method: The method.
+        processes (int): The number of processes, 0 to evaluate as usual.
+        min_block_size (int, optional): The minimum number of rows in a block. Defaults to DEFAULT_MIN_BLOCK_SIZE.
+
+    Yields:
+        The method.
+    """
+    with parallel_evaluations(evaluated_problems(method), processes, min_block_size):
+        yield method
@@ -0,0 +1,421 @@
+"""Parallel solving of the scalarized subproblems of the scalarizing methods, such as synchronous NIMBUS.
+
+An iteration of synchronous NIMBUS computes up to four solutions, each by minimizing a different scalarization of the
+problem, and the minimizations are independent of each other. When the config key 'SCALARIZATION_PROCESSES' of the app
+is positive, the minimizations made by the methods listed in SCALARIZED_METHODS while they are iterated are solved in a
+pool of that many processes instead of one after another: each minimization is sent to the pool as soon as the method
+asks for it, and its result is waited for only once the method reads it, so that the subproblems of an iteration are
+solved concurrently, and their solutions are merged into the response in the same order as usual.
+
+Processes are used instead of threads, since the scalarizations are evaluated in Python and would hold the GIL. The
+pool is started with 'spawn' on the first minimization and kept for the next iterations. The minimizer, with the
+scalarization and the problem it refers to, is sent to the pool pickled with dill, without the hooks of the method,
+see `utilities.iteration_hooks.unhooked`. The points evaluated by the minimizations in the pool therefore do not update
+the ideal point of the problem of the method, only the solutions evaluated by the method afterwards do. An iteration
+cancelled while waiting for its minimizations stops waiting, the minimizations already being solved run to completion.
+
+The reference point method solves each of its scalarized subproblems on analytical problems with a single run of
+differential evolution, which is slow. When the config key 'RPM_MULTISTART_STARTS' is greater than one, the methods
+listed in MULTISTART_METHODS solve each subproblem instead by that many short local minimizations, of at most
+'RPM_MULTISTART_MAXITER' iterations of SLSQP each, started from the initial guess of the method and from points
+spread over the bounds of the variables by Latin hypercube sampling. The best solution found is kept, see
+`BestMinimum`. The local minimizations are solved in the pool if 'SCALARIZATION_PROCESSES' is positive, and one after
+another in the calling process otherwise.
+"""
+import multiprocessing
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import dill
+import numpy as np
+from desdeo_tools.solver import ScalarMinimizer
+from flask import current_app, has_app_context
+from scipy.optimize import NonlinearConstraint, minimize
+from scipy.stats import qmc
+
+from utilities.iteration_hooks import unhooked
+
+# the names of the classes of the methods whose minimizations are solved in parallel
+SCALARIZED_METHODS = ("NIMBUS",)
+# the names of the classes of the methods whose minimizations are solved from several starting points
+MULTISTART_METHODS = ("ReferencePointMethod",)
+
+DEFAULT_MULTISTART_MAXITER = 100
+# the tolerance of the local minimizations, small enough to resolve the augmentation term of the ASFs (rho = 1e-4)
+MULTISTART_FTOL = 1e-12
+# the seed of the sampling of the starting points, the same points are used for the same bounds
+MULTISTART_SEED = 0
+
+# how often an iteration waiting for its minimizations checks whether it has been cancelled, in seconds
+CHECK_INTERVAL = 0.05
+
+_minimize = ScalarMinimizer.minimize
+
+# the minimizations of the thread are sent to the pool by `_local.submit` within `parallel_scalarizations`
+_local = threading.local()
+
+_pool = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def scalarization_settings() -> tuple:
+    """Read the settings of the minimizations from the config of the current app.
+
+    Returns:
+        (tuple): tuple containing:
+            (int): The number of processes, 0 if the minimizations are not solved in parallel.
+            (int): The number of starting points of the multi-start minimizations, 0 or 1 to minimize as usual.
+            (int): The maximum number of iterations of each local minimization of a multi-start minimization.
+    """
+    if not has_app_context():
+        return 0, 0, DEFAULT_MULTISTART_MAXITER
+
+    return (
+        current_app.config.get("SCALARIZATION_PROCESSES", 0) or 0,
+        current_app.config.get("RPM_MULTISTART_STARTS", 0) or 0,
+        current_app.config.get("RPM_MULTISTART_MAXITER", DEFAULT_MULTISTART_MAXITER),
+    )
+
+
+def _epigraph(scalarizer):
+    """The objectives, the ASF, and the reference point of a scalarization by `ReferencePointASF`, or None if the
+    scalarization is something else."""
+    asf = getattr(scalarizer, "_scalarizer", None)
+    args = getattr(scalarizer, "_scalarizer_args", None) or {}
+
+    if type(asf).__name__ != "ReferencePointASF" or set(args) != {"reference_point"}:
+        return None
+
+    if getattr(scalarizer, "_evaluator_args", None) is not None:
+        return None
+
+    return scalarizer._evaluator, asf, np.asarray(args["reference_point"], dtype=float)
+
+
+def local_minimize(minimizer, x0, maxiter: int = DEFAULT_MULTISTART_MAXITER) -> dict:
+    """Minimize the scalarization of a minimizer locally with SLSQP, within its bounds and constraints.
+
+    The maximum term of `ReferencePointASF` is not differentiable where the terms are equal, i.e., at its minima, and
+    SLSQP tends to stall there. The ASF is therefore minimized in its epigraph form instead: the variables are extended
+    by an upper bound t of the terms, and t plus the augmentation term is minimized subject to each term being at most
+    t. Other scalarizations are minimized as such.
+
+    Args:
+        minimizer (ScalarMinimizer): The minimizer.
+        x0 (np.ndarray): The starting point.
+        maxiter (int, optional): The maximum number of iterations. Defaults to DEFAULT_MULTISTART_MAXITER.
+
+    Returns:
+        dict: The solution found ('x'), its scalar value ('fun'), and whether it is a local minimum adhering to the
+            constraints ('success'), as returned by `ScalarMinimizer.minimize`.
+    """
+    x0 = np.atleast_1d(np.asarray(x0, dtype=float))
+    n = len(x0)
+    bounds = None if minimizer._bounds is None else np.asarray(minimizer._bounds, dtype=float)
+    constraints = []
+
+    if minimizer._constraint_evaluator is not None:
+        constraints.append(
+            NonlinearConstraint(lambda z: np.squeeze(minimizer._constraint_evaluator(z[:n])), 0, np.inf)
+        )
+
+    epigraph = _epigraph(minimizer._scalarizer)
+
+    if epigraph is None:
+        z0 = x0
+        z_bounds = bounds
+
+        def objective(z):
+            return float(np.squeeze(minimizer._scalarizer(z)))
+
+    else:
+        evaluator, asf, reference_point = epigraph
+        scale = asf.nadir - asf.utopian_point
+        # SLSQP evaluates the objective and the constraints at the same points
+        cache = {}
+
+        def differences(z):
+            key = z[:n].tobytes()
+            if key not in cache:
+                cache.clear()
+                cache[key] = np.squeeze(evaluator(z[:n])) - reference_point
+            return cache[key]
+
+        def objective(z):
+            return z[n] + asf.rho * np.sum(differences(z) / scale)
+
+        constraints.append(
+            NonlinearConstraint(lambda z: z[n] - asf.preferential_factors * differences(z), 0, np.inf)
+        )
+        z0 = np.append(x0, np.max(asf.preferential_factors * differences(np.append(x0, 0.0))))
+        z_bounds = None if bounds is None else np.vstack((bounds, [[-np.inf, np.inf]]))
+
+    res = minimize(
+        objective,
+        z0,
+        method="SLSQP",
+        bounds=z_bounds,
+        constraints=constraints,
+        options={"maxiter": maxiter, "ftol": MULTISTART_FTOL},
+    )
+    x = res.x[:n] if bounds is None else np.clip(res.x[:n], bounds[:, 0], bounds[:, -1])
+
+    # the value of the scalarization itself, to compare the solutions from different starting points
+    return {"x": x, "fun": float(np.squeeze(minimizer._scalarizer(x))), "success": bool(res.success)}
+
+
+def starting_points(x0: np.ndarray, bounds: np.ndarray, starts: int) -> np.ndarray:
+    """Spread starting points over the bounds of the variables by Latin hypercube sampling.
+
+    Args:
+        x0 (np.ndarray): The initial guess, the first of the points.
+        bounds (np.ndarray): The lower and upper bounds of the variables, one row per variable. Unbounded variables
+            are sampled around the initial guess.
+        starts (int): The number of points.
+
+    Returns:
+        np.ndarray: The points, one per row.
+    """
+    x0 = np.atleast_1d(np.asarray(x0, dtype=float))
+    samples = qmc.LatinHypercube(d=len(x0), seed=MULTISTART_SEED).random(starts - 1)
+
+    if bounds is None:
+        lower, upper = np.full(len(x0), -np.inf), np.full(len(x0), np.inf)
+    else:
+        lower, upper = np.asarray(bounds, dtype=float)[:, 0], np.asarray(bounds, dtype=float)[:, -1]
+
+    bounded = np.isfinite(lower) & np.isfinite(upper)
+    spread = np.maximum(np.abs(x0), 1.0)
+    points = np.where(bounded, lower + samples * (upper - lower), x0 + (2 * samples - 1) * spread)
+
+    return np.vstack((x0, points))
+
+
+# the functions solving the minimizations in the pool, by the name sent with a minimization
+_SOLVERS = {"minimize": _minimize, "local": local_minimize}
+
+
+def _initialize_worker():
+    # as in models.method_models, to be able to serialize lambdified expressions
+    dill.settings["recurse"] = True
+
+
+def _solve(payload: bytes, x0):
+    solver, minimizer, options = dill.loads(payload)
+    return _SOLVERS[solver](minimizer, x0, **options)
+
+
+def _deferred_minimize(minimizer, x0):
+    """Replaces `ScalarMinimizer.minimize`, sending the minimization to the pool within `parallel_scalarizations`."""
+    submit = getattr(_local, "submit", None)
+
+    if submit is None:
+        return _minimize(minimizer, x0)
+
+    return submit(minimizer, x0)
+
+
+def _get_pool(processes: int) -> ProcessPoolExecutor:
+    global _pool, _pool_size
+
+    with _pool_lock:
+        if _pool is None or _pool_size != processes:
+            if _pool is not None:
+                # the minimizations already sent to the old pool are still solved
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialize_worker,
+            )
+            _pool_size = processes
+
+        return _pool
+
+
+def _reset_pool(pool: ProcessPoolExecutor):
+    global _pool
+
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def shutdown_scalarization_pool():
+    """Shut down the pool of processes, e.g., when the app is torn down. A new one is started when needed."""
+    global _pool
+
+    with _pool_lock:
+        pool, _pool = _pool, None
+
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class _LazyResult(ABC):
+    """The result of a minimization, computed once read as the dict of the result."""
+
+    @abstractmethod
+    def result(self) -> dict:
+        """Compute the result, or wait for it.
+
+        Returns:
+            dict: The result, see `ScalarMinimizer.minimize`.
+        """
+
+    def __getitem__(self, key):
+        return self.result()[key]
+
+    def __contains__(self, key):
+        return key in self.result()
+
+    def get(self, key, default=None):
+        return self.result().get(key, default)
+
+    def __getattr__(self, name):
+        # e.g., the attributes of scipy's OptimizeResult
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.result(), name)
+
+
+class PendingMinimum(_LazyResult):
+    """The result of a minimization being solved in the pool, waited for once read.
+
+    Args:
+        payload (bytes): The name of the function solving the minimization, see _SOLVERS, the minimizer, and the
+            keyword arguments of the function, pickled with dill.
+        x0 (np.ndarray): The initial guess.
+        processes (int): The number of processes of the pool.
+        check (Callable, optional): Called while waiting, raising an exception to stop waiting, e.g.,
+            `utilities.cancellation.CancelToken.check`. Defaults to None.
+    """
+
+    def __init__(self, payload: bytes, x0, processes: int, check=None):
+        self._payload = payload
+        self._x0 = x0
+        self._check = check
+        self._result = None
+        self._pool = _get_pool(processes)
+        self._future = self._pool.submit(_solve, payload, x0)
+
+    def result(self) -> dict:
+        """Wait for the result of the minimization.
+
+        Returns:
+            dict: The result, see `ScalarMinimizer.minimize`.
+        """
+        if self._result is not None:
+            return self._result
+
+        while not wait([self._future], timeout=CHECK_INTERVAL).done:
+            if self._check is not None:
+                self._check()
+
+        try:
+            self._result = self._future.result()
+        except BrokenProcessPool:
+            # e.g., a process was killed, solve the minimization here instead
+            _reset_pool(self._pool)
+            self._result = _solve(self._payload, self._x0)
+
+        return self._result
+
+    def cancel(self):
+        """Cancel the minimization if it has not been started yet."""
+        self._future.cancel()
+
+
+class BestMinimum(_LazyResult):
+    """The best of the results of the local minimizations of a multi-start minimization: the one with the least
+    scalar value among the successful ones, or among all of them if none succeeded.
+
+    Args:
+        results (list): The results, dicts or `PendingMinimum`.
+    """
+
+    def __init__(self, results: list):
+        self._results = results
+        self._result = None
+
+    def result(self) -> dict:
+        if self._result is None:
+            results = [result.result() if isinstance(result, PendingMinimum) else result for result in self._results]
+            successful = [result for result in results if result["success"]] or results
+            self._result = min(successful, key=lambda result: result["fun"])
+
+        return self._result
+
+    def cancel(self):
+        for result in self._results:
+            if isinstance(result, PendingMinimum):
+                result.cancel()
+
+
+@contextmanager
+def parallel_scalarizations(
+    method, processes: int, starts: int = 0, maxiter: int = DEFAULT_MULTISTART_MAXITER, check=None
+):
+    """Solve the minimizations of a method in parallel, or from several starting points, within the context, see the
+    module docstring.
+
+    Only the minimizations made by the thread entering the context are affected.
+
+    Args:
+        method: The method. The minimizations are made as usual if the method is not listed in SCALARIZED_METHODS,
+            or in MULTISTART_METHODS with more than one starting point.
+        processes (int): The number of processes, 0 to solve the minimizations in the calling process.
+        starts (int, optional): The number of starting points of the multi-start minimizations. Defaults to 0.
+        maxiter (int, optional): The maximum number of iterations of each local minimization. Defaults to
+            DEFAULT_MULTISTART_MAXITER.
+        check (Callable, optional): Called while waiting for a minimization, e.g., to cancel the iteration. Defaults
+            to None.
+
+    Yields:
+        The method.
+    """
+    multistart = starts > 1 and type(method).__name__ in MULTISTART_METHODS
+    parallel = processes > 0 and type(method).__name__ in SCALARIZED_METHODS
+
+    if not (multistart or parallel):
+        yield method
+        return
+
+    if ScalarMinimizer.minimize is not _deferred_minimize:
+        ScalarMinimizer.minimize = _deferred_minimize
+
+    pending = []
+
+    def submit(minimizer, x0):
+        if not multistart:
+            # pickled now, since the method may be modified before the minimization is solved
+            with unhooked(method):
+                payload = dill.dumps(("minimize", minimizer, {}))
+            result = PendingMinimum(payload, x0, processes, check)
+        elif processes > 0:
+            with unhooked(method):
+                payload = dill.dumps(("local", minimizer, {"maxiter": maxiter}))
+            points = starting_points(x0, minimizer._bounds, starts)
+            result = BestMinimum([PendingMinimum(payload, point, processes, check) for point in points])
+        else:
+            points = starting_points(x0, minimizer._bounds, starts)
+            result = BestMinimum([local_minimize(minimizer, point, maxiter) for point in points])
+
+        pending.append(result)
+        return result
+
+    enclosing = getattr(_local, "submit", None)
+    _local.submit = submit
+
+    try:
+        yield method
+    finally:
+        _local.submit = enclosing
+
+        for result in pending:
+            result.cancel()
@@ -0,0 +1,253 @@
+"""Streams of the progress of method iterations, e.g., the generations of EAs, to the clients listening to them.
+
+The progress of an iteration is published while the method is iterated, see `utilities.iteration_hooks`, and each
+listener of the method session gets it through a queue of its own. Publishing to a session nobody listens to costs a
+dictionary lookup. The queues are bounded, and the oldest events are dropped for listeners too slow to keep up, so
+that a listener never slows down the iteration.
+
+The listeners are kept in the memory of the process, so a client gets the progress of the iterations run by the
+process serving its stream.
+
+A listener can be waited on by a thread, as when the app is served by a WSGI server, or by a coroutine, as when it is
+served by `utilities.asgi`, in which case a client waiting for progress costs no thread.
+"""
+import asyncio
+import threading
+from collections import deque
+
+import numpy as np
+import simplejson as json
+
+from utilities.expression_parser import NumpyEncoder
+
+DEFAULT_QUEUE_SIZE = 64
+
+
+class ProgressListener:
+    """A bounded queue of the events published to a method session.
+
+    Args:
+        front_size (int, optional): The maximum number of points of the current front of EAs wanted in the events.
+            Defaults to 0, in which case the front is not included.
+        max_size (int, optional): The maximum number of events queued. Defaults to DEFAULT_QUEUE_SIZE.
+    """
+
+    def __init__(self, front_size: int = 0, max_size: int = DEFAULT_QUEUE_SIZE):
+        self.front_size = front_size
+        self._events = deque(maxlen=max_size)
+        self._ready = threading.Condition()
+        # the futures of the coroutines waiting in get_async, with their event loops
+        self._waiters = []
+
+    def put(self, event: dict):
+        with self._ready:
+            self._events.append(event)
+            self._ready.notify()
+
+            for loop, waiter in self._waiters:
+                loop.call_soon_threadsafe(_wake, waiter)
+            self._waiters = []
+
+    def get(self, timeout: float = None):
+        """Remove and return the oldest event, waiting for one if needed.
+
+        Args:
+            timeout (float, optional): The maximum number of seconds to wait. Defaults to None, in which case the wait
+                is not limited.
+
+        Returns:
+            dict: The event, or None if no event was published before the timeout.
+        """
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._events, timeout=timeout):
+                return None
+            return self._events.popleft()
+
+    async def get_async(self, timeout: float = None):
+        """Remove and return the oldest event, waiting for one in the event loop if needed, see `get`.
+
+        Args:
+            timeout (float, optional): The maximum number of seconds to wait. Defaults to None, in which case the wait
+                is not limited.
+
+        Returns:
+            dict: The event, or None if no event was published before the timeout.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+
+        with self._ready:
+            if self._events:
+                return self._events.popleft()
+            self._waiters.append((loop, waiter))
+
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._ready:
+                self._waiters = [(other_loop, other) for other_loop, other in self._waiters if other is not waiter]
+
+        with self._ready:
+            return self._events.popleft() if self._events else None
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class EventStream:
+    """The events of a listener as server-sent events, until the end of the iteration.
+
+    The stream is iterated by WSGI servers, and asynchronously by ASGI servers. It is meant to be the response iterable
+    itself, e.g., `flask.Response(stream, direct_passthrough=True)`, so that an ASGI server can tell it apart.
+
+    Args:
+        listener (ProgressListener): The listener.
+        keepalive (float): The number of seconds between the comments sent while no events are published.
+        on_close (Callable, optional): Called once when the stream is closed, e.g., to unsubscribe the listener.
+    """
+
+    def __init__(self, listener: ProgressListener, keepalive: float, on_close=None):
+        self.listener = listener
+        self.keepalive = keepalive
+        self._on_close = on_close
+        self._finished = False
+
+    def _format(self, event) -> bytes:
+        if event is None:
+            # a comment, to keep the connection open through proxies
+            return b": keep-alive\n\n"
+
+        if event["event"] == "iteration":
+            self._finished = True
+
+        event_data = json.dumps(event["data"], cls=NumpyEncoder, ignore_nan=True)
+        return f"event: {event['event']}\ndata: {event_data}\n\n".encode()
+
+    def __iter__(self):
+        # sent right away, so that the headers are sent before the first event
+        yield b": listening\n\n"
+
+        while not self._finished:
+            yield self._format(self.listener.get(timeout=self.keepalive))
+
+    async def __aiter__(self):
+        yield b": listening\n\n"
+
+        while not self._finished:
+            yield self._format(await self.listener.get_async(timeout=self.keepalive))
+
+    def close(self):
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+
+class ProgressStreams:
+    """The listeners of the method sessions in the process."""
+
+    def __init__(self):
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, method_id: int, front_size: int = 0) -> ProgressListener:
+        """Start listening to the progress of a method session.
+
+        Args:
+            method_id (int): The id of the method session.
+            front_size (int, optional): See `ProgressListener`. Defaults to 0.
+
+        Returns:
+            ProgressListener: The listener, to be passed to `unsubscribe` when done.
+        """
+        listener = ProgressListener(front_size)
+
+        with self._lock:
+            self._listeners[method_id] = self._listeners.get(method_id, ()) + (listener,)
+
+        return listener
+
+    def unsubscribe(self, method_id: int, listener: ProgressListener):
+        with self._lock:
+            listeners = tuple(other for other in self._listeners.get(method_id, ()) if other is not listener)
+            if listeners:
+                self._listeners[method_id] = listeners
+            else:
+                self._listeners.pop(method_id, None)
+
+    def front_size(self, method_id: int) -> int:
+        """The number of points of the front wanted by the listeners of a method session.
+
+        Args:
+            method_id (int): The id of the method session.
+
+        Returns:
+            int: The largest number of points wanted, 0 if the front is not wanted.
+        """
+        return max((listener.front_size for listener in self._listeners.get(method_id, ())), default=0)
+
+    def publish(self, method_id: int, event_type: str, data: dict):
+        """Publish an event to the listeners of a method session.
+
+        Args:
+            method_id (int): The id of the method session.
+            event_type (str): The type of the event, e.g., 'generation'.
+            data (dict): The contents of the event. A front included in it is downsampled for each listener.
+        """
+        # the tuple of listeners is replaced, not modified, when subscribing, so it can be read without the lock
+        listeners = self._listeners.get(method_id)
+
+        if not listeners:
+            return
+
+        for listener in listeners:
+            if "front" in data:
+                listener_data = {**data, "front": downsample_front(data["front"], listener.front_size)}
+                if listener_data["front"] is None:
+                    del listener_data["front"]
+            else:
+                listener_data = data
+            listener.put({"event": event_type, "data": listener_data})
+
+    def observer(self, method_id: int):
+        """An observer of the generations of an iteration of a method session publishing them to its listeners, see
+        `utilities.iteration_hooks.observe_generations`.
+
+        Args:
+            method_id (int): The id of the method session.
+
+        Returns:
+            Callable: The observer.
+        """
+
+        def publish_generation(progress):
+            self.publish(method_id, "generation", progress)
+            return True
+
+        return publish_generation
+
+
+def downsample_front(front, size: int):
+    """Pick evenly spaced points of a front.
+
+    Args:
+        front: The points of the front, one per row.
+        size (int): The maximum number of points picked.
+
+    Returns:
+        list: The picked points as lists, or None if size is 0.
+    """
+    if not size:
+        return None
+
+    front = np.atleast_2d(front)
+    if front.shape[0] > size:
+        front = front[np.linspace(0, front.shape[0] - 1, size).round().astype(int)]
+
+    return front.tolist()
+
+
+progress_streams = ProgressStreams()
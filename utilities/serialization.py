@@ -0,0 +1,340 @@
+"""Serialization helpers for the pickled columns in the models.
+
+Pickled problems and method states, especially discrete problems and the states of EAs, tend to be large but compress
+very well. `compressed_dill` can be given to `db.PickleType` as its pickler to compress the pickled bytes before they
+are stored in the database. Rows stored before compression was introduced are still read transparently.
+
+Large NumPy arrays are not copied into the pickle at all. They are pickled out-of-band (pickle protocol 5) and stored
+as raw bytes in a `BufferStore`, a directory of files named by the hash of their contents. The column then holds only
+the metadata and the hashes of the buffers. When loaded, the files are memory-mapped and the arrays are reconstructed
+on top of the mappings without copying, so loading takes time proportional to the metadata instead of the data.
+"""
+import hashlib
+import io
+import mmap
+import os
+import struct
+import time
+import uuid
+import zlib
+
+import dill
+import numpy as np
+from flask import current_app, has_app_context
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover
+    lz4_frame = None
+
+
+# Compressed payloads are prefixed by MAGIC followed by a single byte identifying the codec used. Legacy rows contain
+# plain pickles, which always start with the PROTO opcode b"\x80" when protocol >= 2 is used, so the two can't be
+# confused.
+MAGIC = b"DZ"
+HEADER_LENGTH = len(MAGIC) + 1
+
+# Pickles with out-of-band buffers are prefixed by BUFFERS_MAGIC, the number of buffers (unsigned short), and the
+# sha256 digests of the buffers. The (possibly compressed) pickle follows.
+BUFFERS_MAGIC = b"DB"
+DIGEST_LENGTH = 32
+
+
+def _zstd_compress(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _lz4_compress(data: bytes, level: int) -> bytes:
+    return lz4_frame.compress(data, compression_level=level)
+
+
+def _lz4_decompress(data: bytes) -> bytes:
+    return lz4_frame.decompress(data)
+
+
+# name: (codec id, compress, decompress, is available)
+codecs = {
+    "zlib": (1, zlib.compress, zlib.decompress, True),
+    "zstd": (2, _zstd_compress, _zstd_decompress, zstandard is not None),
+    "lz4": (3, _lz4_compress, _lz4_decompress, lz4_frame is not None),
+}
+
+available_codecs = [name for name, codec in codecs.items() if codec[3]] + ["none"]
+
+# prefer the fastest codec installed
+DEFAULT_CODEC = "zstd" if zstandard is not None else "lz4" if lz4_frame is not None else "zlib"
+DEFAULT_LEVEL = 3 if DEFAULT_CODEC == "zstd" else 1
+
+
+def get_compression_settings():
+    """Return the codec and level to be used when compressing pickles.
+
+    Read from the config keys 'PICKLE_COMPRESSION' and 'PICKLE_COMPRESSION_LEVEL' of the current app, if any.
+
+    Returns:
+        (tuple): tuple containing:
+            (str): The name of the codec, one of `available_codecs`.
+            (int): The compression level.
+    """
+    if has_app_context():
+        return (
+            current_app.config.get("PICKLE_COMPRESSION", DEFAULT_CODEC),
+            current_app.config.get("PICKLE_COMPRESSION_LEVEL", DEFAULT_LEVEL),
+        )
+
+    return DEFAULT_CODEC, DEFAULT_LEVEL
+
+
+def compress(data: bytes, codec: str = None, level: int = None) -> bytes:
+    """Compress the given bytes and prefix them with a header identifying the codec.
+
+    Args:
+        data (bytes): The bytes to be compressed.
+        codec (str, optional): Name of the codec to use. Defaults to the codec set in the app's config.
+        level (int, optional): The compression level. Defaults to the level set in the app's config.
+
+    Raises:
+        ValueError: The codec is not known or the library implementing it is not installed.
+
+    Returns:
+        bytes: The compressed bytes with a header. If codec is 'none', the data is returned as is.
+    """
+    default_codec, default_level = get_compression_settings()
+    codec = default_codec if codec is None else codec
+    level = default_level if level is None else level
+
+    if codec == "none":
+        return data
+
+    if codec not in codecs or not codecs[codec][3]:
+        raise ValueError(f"The compression codec '{codec}' is not available. Available codecs are {available_codecs}.")
+
+    codec_id, compress_f, _, _ = codecs[codec]
+
+    return MAGIC + bytes([codec_id]) + compress_f(data, level)
+
+
+def decompress(data: bytes) -> bytes:
+    """Decompress bytes compressed by `compress`. Bytes without a compression header are returned as is.
+
+    Args:
+        data (bytes): The (possibly) compressed bytes.
+
+    Raises:
+        ValueError: The bytes were compressed using a codec not available.
+
+    Returns:
+        bytes: The decompressed bytes.
+    """
+    if data[: len(MAGIC)] != MAGIC:
+        # legacy, uncompressed row
+        return data
+
+    codec_id = data[len(MAGIC)]
+
+    for name, (id_, _, decompress_f, is_available) in codecs.items():
+        if id_ == codec_id:
+            if not is_available:
+                raise ValueError(f"Data was compressed with '{name}', which is not installed.")
+            return decompress_f(data[HEADER_LENGTH:])
+
+    raise ValueError(f"Unknown compression codec id {codec_id}.")
+
+
+class BufferStore:
+    """Stores raw buffers as files named by the sha256 digest of their contents.
+
+    Identical buffers, such as the data of a problem pickled both in `Problem` and `Method`, are stored only once.
+    When several nodes share a database, the directory must be shared by them as well.
+
+    Args:
+        directory (str): The directory where the buffers are stored. Created if it does not exist.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, digest: bytes) -> str:
+        return os.path.join(self.directory, digest.hex())
+
+    def put(self, buffer: memoryview) -> bytes:
+        """Store a buffer, unless an identical buffer is already stored.
+
+        Args:
+            buffer (memoryview): A contiguous buffer.
+
+        Returns:
+            bytes: The digest identifying the buffer.
+        """
+        digest = hashlib.sha256(buffer).digest()
+        path = self.path(digest)
+
+        if not os.path.exists(path):
+            # write to a temporary file first so that readers never see partial buffers
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(buffer)
+            os.replace(tmp_path, path)
+        else:
+            # mark as used so that garbage collection does not remove it
+            os.utime(path)
+
+        return digest
+
+    def get(self, digest: bytes) -> memoryview:
+        """Memory-map a stored buffer.
+
+        The mapping is copy-on-write: the arrays built on it are writable, but writes never reach the stored file.
+
+        Args:
+            digest (bytes): The digest returned by `put`.
+
+        Returns:
+            memoryview: A view of the memory-mapped file.
+        """
+        with open(self.path(digest), "rb") as f:
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+
+    def remove_unreferenced(self, referenced, min_age: float = 3600) -> int:
+        """Remove the stored buffers that are not referenced anymore.
+
+        Args:
+            referenced (set): The digests of the buffers still referenced, see `referenced_buffers`.
+            min_age (float, optional): Buffers used more recently than this many seconds ago are kept, since they may
+                belong to rows not committed yet. Defaults to 3600.
+
+        Returns:
+            int: The number of buffers removed.
+        """
+        referenced_names = {digest.hex() for digest in referenced}
+        now = time.time()
+        n_removed = 0
+
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name in referenced_names or now - os.path.getmtime(path) < min_age:
+                continue
+            os.remove(path)
+            n_removed += 1
+
+        return n_removed
+
+
+def get_buffer_store():
+    """Return the buffer store of the current app and the size threshold of out-of-band buffers.
+
+    Read from the config keys 'PICKLE_BUFFER_DIR' and 'PICKLE_BUFFER_THRESHOLD' of the current app.
+
+    Returns:
+        (tuple): tuple containing:
+            (BufferStore): The store, or None if buffers are not stored out-of-band.
+            (int): Buffers smaller than this many bytes are kept in the pickle.
+    """
+    if not has_app_context():
+        return None, None
+
+    directory = current_app.config.get("PICKLE_BUFFER_DIR")
+    threshold = current_app.config.get("PICKLE_BUFFER_THRESHOLD")
+
+    if not directory or not threshold:
+        return None, None
+
+    return BufferStore(directory), threshold
+
+
+class OutOfBandPickler(dill.Pickler):
+    """A dill pickler that pickles NumPy arrays out-of-band when a `buffer_callback` is given.
+
+    dill pickles arrays through their `__reduce__`, which always copies the data into the pickle. Here plain arrays
+    are reduced with `__reduce_ex__` instead, which gives their data as a `PickleBuffer` with protocol 5.
+    """
+
+    def reducer_override(self, obj):
+        if type(obj) is np.ndarray and self._buffer_callback is not None:
+            return obj.__reduce_ex__(self.proto)
+        return NotImplemented
+
+
+def referenced_buffers(data: bytes) -> list:
+    """Return the digests of the out-of-band buffers referenced by a stored pickle.
+
+    Args:
+        data (bytes): The pickle as stored in the database.
+
+    Returns:
+        list: The digests. Empty if there are no out-of-band buffers.
+    """
+    if data is None or data[: len(BUFFERS_MAGIC)] != BUFFERS_MAGIC:
+        return []
+
+    (n_buffers,) = struct.unpack_from(">H", data, len(BUFFERS_MAGIC))
+    start = len(BUFFERS_MAGIC) + 2
+
+    return [data[start + i * DIGEST_LENGTH : start + (i + 1) * DIGEST_LENGTH] for i in range(n_buffers)]
+
+
+class CompressedPickler:
+    """A pickler to be used with `db.PickleType`, which compresses the pickled bytes.
+
+    If the current app defines a buffer store (see `get_buffer_store`), NumPy arrays larger than the threshold are
+    stored out-of-band in the store.
+
+    Args:
+        pickler: The pickler to wrap, such as `dill`. Must implement `dumps` and `loads`.
+    """
+
+    def __init__(self, pickler):
+        self.pickler = pickler
+
+    def dumps(self, obj, protocol=None) -> bytes:
+        store, threshold = get_buffer_store()
+
+        if store is None or self.pickler is not dill:
+            return compress(self.pickler.dumps(obj, protocol))
+
+        digests = []
+
+        def buffer_callback(buffer) -> bool:
+            # returning True keeps the buffer in-band
+            raw = buffer.raw()
+            if raw.nbytes < threshold:
+                return True
+            digests.append(store.put(raw))
+            return False
+
+        file = io.BytesIO()
+        OutOfBandPickler(file, 5, buffer_callback=buffer_callback).dump(obj)
+        pickled = compress(file.getvalue())
+
+        if not digests:
+            return pickled
+
+        return BUFFERS_MAGIC + struct.pack(">H", len(digests)) + b"".join(digests) + pickled
+
+    def loads(self, data: bytes):
+        digests = referenced_buffers(data)
+
+        if not digests:
+            return self.pickler.loads(decompress(data))
+
+        store, _ = get_buffer_store()
+        if store is None:
+            raise ValueError("The pickle has out-of-band buffers, but no PICKLE_BUFFER_DIR is set.")
+
+        buffers = [store.get(digest) for digest in digests]
+        pickled = data[len(BUFFERS_MAGIC) + 2 + len(digests) * DIGEST_LENGTH :]
+
+        return self.pickler.loads(decompress(pickled), buffers=buffers)
+
+
+compressed_dill = CompressedPickler(dill)
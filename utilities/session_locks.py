@@ -0,0 +1,58 @@
+"""Locks serializing the requests that modify the same method session.
+
+Each method session (a row in `Method`) has its own lock, so requests on different sessions, even those of the same
+user, are served concurrently. Within a process, the requests on the same session are serialized by a
+`threading.Lock` of the session. Across processes, the row of the session is locked with SELECT ... FOR UPDATE on
+databases supporting it (SQLite ignores it, but serializes writes by itself).
+"""
+import threading
+import weakref
+from contextlib import contextmanager
+
+from database import db
+
+# the locks are dropped once no request holds or waits for them
+_locks = weakref.WeakValueDictionary()
+_locks_guard = threading.Lock()
+
+
+def get_session_lock(method_id: int) -> threading.Lock:
+    """Return the lock of a method session in the current process.
+
+    Args:
+        method_id (int): The id of the method session.
+
+    Returns:
+        threading.Lock: The lock of the session.
+    """
+    with _locks_guard:
+        lock = _locks.get(method_id)
+        if lock is None:
+            lock = threading.Lock()
+            _locks[method_id] = lock
+
+        return lock
+
+
+@contextmanager
+def session_lock(method_query):
+    """Hold the lock of a method session and refresh its row from the database.
+
+    The row is refreshed after the lock is acquired, so that the changes committed by the previous holder of the lock
+    are seen.
+
+    Args:
+        method_query (Method): The row of the method session.
+
+    Yields:
+        Method: The refreshed row.
+    """
+    lock = get_session_lock(method_query.id)
+
+    with lock:
+        db.session.refresh(method_query, with_for_update=True)
+        try:
+            yield method_query
+        finally:
+            # release the row lock of databases supporting it, if the holder did not commit
+            db.session.rollback()
@@ -0,0 +1,167 @@
+"""Portable snapshots of method sessions.
+
+A snapshot holds everything needed to continue a method session on another node: the state of the method, its last
+request, status, a reference to the problem being solved, and the history of NAUTILUS Navigator steps. It is a gzip
+stream starting with `SNAPSHOT_MAGIC` and the format version (unsigned short), followed by a sequence of dill pickles:
+
+    header (dict), method, last request, number of history states (int), history states (dict) ...
+
+The gzip stream is followed by an HMAC-SHA256 of its bytes, keyed by the 'SNAPSHOT_KEY' of the app. Since unpickling
+can run arbitrary code, the HMAC is verified before anything is unpickled, and snapshots without a valid one, e.g.,
+crafted or modified by a client, are rejected. Snapshots can therefore only be imported on nodes sharing the snapshot
+key of the node they were exported from, and the key must be kept as secret as the nodes themselves.
+
+Snapshots are written and read incrementally, so that neither the exported nor the imported bytes have to be held in
+memory as a whole: the imported bytes are spooled to a temporary file while the HMAC is computed. Unlike the pickled
+columns, the NumPy arrays are always stored in-band, so that snapshots do not depend on the buffer directory of the node
+they were exported from.
+"""
+import gzip
+import hashlib
+import hmac
+import struct
+import tempfile
+import zlib
+
+import dill
+
+SNAPSHOT_MAGIC = b"DSNP"
+SNAPSHOT_VERSION = 2
+
+DIGEST_SIZE = hashlib.sha256().digest_size
+# the imported bytes are kept in memory up to this size, and spooled to disk beyond it
+SPOOL_SIZE = 16 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class SnapshotError(ValueError):
+    """The bytes are not a snapshot, the snapshot is not signed by this node, or it is of an unsupported version."""
+
+
+def _signer(key) -> "hmac.HMAC":
+    return hmac.new(key.encode() if isinstance(key, str) else key, digestmod=hashlib.sha256)
+
+
+def write_snapshot(header: dict, method, last_request, history: list, key, level: int = 6):
+    """Write a snapshot of a method session.
+
+    Args:
+        header (dict): Metadata of the session, such as its name, status, and the problem being solved.
+        method: The method.
+        last_request: The last request of the method, or None if the method has not been started.
+        history (list): The history of the session as a list of dicts, e.g., the states of NAUTILUS Navigator.
+        key (Union[str, bytes]): The key the snapshot is signed with, e.g., the secret key of the app.
+        level (int, optional): The gzip compression level. Defaults to 6.
+
+    Yields:
+        bytes: The compressed snapshot in chunks, followed by its signature.
+    """
+    # wbits=31 writes the gzip container
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    signer = _signer(key)
+
+    def records():
+        yield SNAPSHOT_MAGIC + struct.pack(">H", SNAPSHOT_VERSION)
+        yield dill.dumps(header)
+        yield dill.dumps(method)
+        yield dill.dumps(last_request)
+        yield dill.dumps(len(history))
+        for state in history:
+            yield dill.dumps(state)
+
+    for record in records():
+        chunk = compressor.compress(record)
+        if chunk:
+            signer.update(chunk)
+            yield chunk
+
+    chunk = compressor.flush()
+    signer.update(chunk)
+    yield chunk
+
+    yield signer.digest()
+
+
+def _spool_verified(stream, key):
+    """Copy a stream to a temporary file without its signature, which is verified.
+
+    Raises:
+        SnapshotError: The signature is missing or does not match the bytes.
+
+    Returns:
+        tempfile.SpooledTemporaryFile: The signed bytes, positioned at the start.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    signer = _signer(key)
+    # the last bytes read are held back, since they may be the signature
+    tail = b""
+
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+
+            data = tail + chunk
+            body, tail = data[:-DIGEST_SIZE], data[-DIGEST_SIZE:]
+            signer.update(body)
+            spool.write(body)
+
+        if len(tail) < DIGEST_SIZE or not hmac.compare_digest(signer.digest(), tail):
+            raise SnapshotError("The snapshot is not signed by this instance, or it has been modified.")
+    except Exception:
+        spool.close()
+        raise
+
+    spool.seek(0)
+
+    return spool
+
+
+def read_snapshot(stream, key):
+    """Read a snapshot written by `write_snapshot`, verifying its signature before unpickling anything.
+
+    Args:
+        stream: A binary file-like object, such as the stream of an HTTP request, the snapshot is read from.
+        key (Union[str, bytes]): The key the snapshot was signed with.
+
+    Raises:
+        SnapshotError: The stream is not a snapshot, is not signed with the key, is corrupted, or is of an
+            unsupported version.
+
+    Returns:
+        (tuple): tuple containing:
+            (dict): The header of the session.
+            The method.
+            The last request of the method.
+            (list): The history of the session.
+    """
+    try:
+        spool = _spool_verified(stream, key)
+    except SnapshotError:
+        raise
+    except Exception as e:
+        raise SnapshotError(f"Could not read the method snapshot: {e}") from e
+
+    try:
+        with spool, gzip.GzipFile(fileobj=spool, mode="rb") as snapshot:
+            prefix = snapshot.read(len(SNAPSHOT_MAGIC) + 2)
+
+            if prefix[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                raise SnapshotError("Not a method snapshot.")
+
+            (version,) = struct.unpack(">H", prefix[len(SNAPSHOT_MAGIC) :])
+            if version != SNAPSHOT_VERSION:
+                raise SnapshotError(f"Snapshot of version {version}, the supported version is {SNAPSHOT_VERSION}.")
+
+            header = dill.load(snapshot)
+            method = dill.load(snapshot)
+            last_request = dill.load(snapshot)
+            history = [dill.load(snapshot) for _ in range(dill.load(snapshot))]
+    except SnapshotError:
+        raise
+    except Exception as e:
+        # e.g., a pickle referring to a module or an attribute not available on this instance
+        raise SnapshotError(f"Corrupted method snapshot: {e}") from e
+
+    return header, method, last_request, history
@@ -0,0 +1,191 @@
+"""Speculative iterations of methods offering the decision maker a few choices, such as E-NAUTILUS.
+
+While the decision maker looks at the intermediate points of E-NAUTILUS, the next iteration is computed in the
+background for each point the decision maker may choose, on a pool of 'SPECULATION_WORKERS' threads, each from a copy
+of the method. When the choice arrives, its iteration is served from the copy instead of being computed then. The
+iterations of the other choices are dropped, and cancelled if running.
+
+The copies are iterated as the iterations of the requests are, by `utilities.method_processes.call_method`, in a worker
+process if configured, and within the budget of the session. A speculative iteration is admitted only if a slot of the
+admission control is free when it starts, see `utilities.admission`, without waiting for one or taking the slots of the
+users, and is skipped otherwise.
+
+The results are kept in the memory of the process that computed them, see `utilities.background`, so a response served
+by another process, or given to another version of the method session, is iterated as usual.
+"""
+import logging
+from copy import deepcopy
+
+from desdeo_mcdm.interactive import ENautilusRequest
+from flask import current_app
+
+from utilities.admission import AdmissionLimits, AdmissionRejected, scheduler
+from utilities.background import PendingResults, get_executor, submit_to
+from utilities.budgets import IterationBudget
+from utilities.cancellation import CancelToken
+from utilities.method_processes import call_method
+from utilities.objective_index import ObjectiveIndex
+
+DEFAULT_WORKERS = 2
+
+# the role the speculative iterations are admitted as, limited only by the capacity of the admission control
+SPECULATION_ROLE = "speculation"
+
+logger = logging.getLogger(__name__)
+
+
+def enautilus_choices(request) -> dict:
+    """The responses of the choices offered by a request of E-NAUTILUS, see `ENautilus.handle_request`.
+
+    Args:
+        request (ENautilusRequest): The request.
+
+    Returns:
+        dict: The responses choosing each intermediate point without stepping back or changing the number of iterations
+            left, keyed by the index of the point. Empty if the request is not an `ENautilusRequest`.
+    """
+    if type(request).__name__ != ENautilusRequest.__name__:
+        return {}
+
+    return {
+        index: {"preferred_point_index": index, "step_back": False, "change_remaining": False}
+        for index in range(len(request.content["points"]))
+    }
+
+
+def enautilus_choice(response: dict):
+    """The choice made by a response to a request of E-NAUTILUS, if it is one of `enautilus_choices`.
+
+    Args:
+        response (dict): The response.
+
+    Returns:
+        int: The index of the point chosen, or None if the response does something else, e.g., steps back.
+    """
+    if response.get("step_back", True) or response.get("change_remaining", True):
+        return None
+
+    index = response.get("preferred_point_index")
+
+    return int(index) if isinstance(index, int) or getattr(index, "ndim", None) == 0 else None
+
+
+def _iterate_copy(
+    key, method, request, response: dict, token: CancelToken, budget: IterationBudget, objective_index: ObjectiveIndex
+) -> tuple:
+    """Iterate a copy of a method with a response, if admitted right away.
+
+    Args:
+        key: The key of the session.
+        method: The method, not modified.
+        request: The request of the method the response is to, not modified.
+        response (dict): The response.
+        token (CancelToken): Cancelled when the choice of the response is dropped.
+        budget (IterationBudget): The budget of the iteration.
+        objective_index (ObjectiveIndex): The index of the objective vectors of the problem of the method.
+
+    Returns:
+        tuple: The iterated method and the request it returned, or None if the iteration was not admitted.
+    """
+    limits = AdmissionLimits.from_config(current_app.config)
+    # not waiting for a slot
+    limits.user_queue_size = 0
+
+    try:
+        with scheduler.admit((SPECULATION_ROLE, key), SPECULATION_ROLE, limits):
+            method = deepcopy(method)
+            request = deepcopy(request)
+            request.response = response
+
+            return method, call_method(
+                method, "iterate", request, token=token, budget=budget, objective_index=objective_index
+            )
+    except AdmissionRejected:
+        return None
+
+
+class SpeculativeIterations:
+    """The iterations speculated for the choices of method sessions, keyed by the id of the session.
+
+    Args:
+        max_size (int, optional): The maximum number of sessions with speculated iterations. Defaults to 256.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self._pending = PendingResults(max_size)
+
+    def speculate(
+        self,
+        key,
+        state,
+        method,
+        request,
+        choices: dict,
+        budget: IterationBudget = None,
+        objective_index: ObjectiveIndex = None,
+    ):
+        """Start iterating copies of a method in the background, one for each choice.
+
+        The method and the request must not be modified afterwards, e.g., they have been committed.
+
+        Args:
+            key: The key of the session, e.g., its id.
+            state: The state of the session the iterations are valid for, e.g., its version.
+            method: The method.
+            request: The request of the method the choices are responses to.
+            choices (dict): The responses by choice, e.g., `enautilus_choices`.
+            budget (IterationBudget, optional): The budget of the iterations of the session. Defaults to None.
+            objective_index (ObjectiveIndex, optional): The index of the objective vectors of the problem of the
+                method. Defaults to None.
+        """
+        executor = get_executor("SPECULATION_WORKERS", DEFAULT_WORKERS)
+        tokens = {choice: CancelToken() for choice in choices}
+        futures = {
+            choice: submit_to(
+                executor, _iterate_copy, key, method, request, response, tokens[choice], budget, objective_index
+            )
+            for choice, response in choices.items()
+        }
+
+        self._pending.put(key, (futures, tokens, state))
+
+    def take(self, key, state, choice):
+        """Take the iteration speculated for a choice, dropping the others of the session.
+
+        Args:
+            key: The key of the session.
+            state: The current state of the session.
+            choice: The choice made, None to just drop the iterations of the session.
+
+        Returns:
+            tuple: The iterated method and the request it returned, or None if the iteration was not speculated, or
+                it failed. An iteration not started yet is not waited for.
+        """
+        pending = self._pending.pop(key)
+
+        if pending is None:
+            return None
+
+        futures, tokens, pending_state = pending
+        future = futures.pop(choice, None) if pending_state == state else None
+
+        for other, other_future in futures.items():
+            # stops the iterations already running at their next boundary
+            other_future.cancel()
+            tokens[other].cancel()
+
+        # cheaper to iterate in the request than to wait for a free background worker
+        if future is None or future.cancel():
+            return None
+
+        try:
+            return future.result()
+        except Exception:
+            logger.warning("Could not iterate the choice %s of %s in the background.", choice, key, exc_info=True)
+            return None
+
+    def __contains__(self, key):
+        return key in self._pending
+
+    def __len__(self):
+        return len(self._pending)